@@ -1,8 +1,9 @@
 import mimetypes
-from utils.language_detection import detect_language
+from utils.language_detection import detect_language_async
 from services.whisper_service import transcribe_audio
 from services.libretranslate_service import translate_text
 from services.gemini_service import process_text_with_gemini
+from services.artifact_cache import artifact_cache, hash_bytes, TRANSCRIPT_EN
 
 SUPPORTED_AUDIO_FORMATS = {
     "audio/mpeg",
@@ -13,7 +14,7 @@ SUPPORTED_AUDIO_FORMATS = {
     "audio/webm"
 }
 
-async def process_audio(file, prompt: str = None):
+async def process_audio(file, prompt: str = None, stream: bool = False):
     """
     Processes an uploaded audio file:
     - Reads the file
@@ -40,7 +41,7 @@ async def process_audio(file, prompt: str = None):
         audio_content = await file.read()
 
         # 🔹 Step 2: Transcribe the audio
-        transcription_result = transcribe_audio(audio_content)
+        transcription_result = await transcribe_audio(audio_content)
 
         # Debugging: Print transcription result
         print("DEBUG: Transcription Result =", transcription_result)
@@ -51,23 +52,30 @@ async def process_audio(file, prompt: str = None):
         transcribed_text = transcription_result["text"]
         print(f"✅ Transcription received: {transcribed_text[:100]}...")  # Debugging Log
 
-        # 🔹 Step 3: Detect language of transcription
-        detected_lang = detect_language(transcribed_text)
-        print(f"🌍 Detected Transcription Language: {detected_lang}")  # Debugging Log
+        # 🔹 Step 3: Reuse the English transcription of a previous upload of the same recording
+        content_hash = hash_bytes(audio_content)
+        english_text = await artifact_cache.get(TRANSCRIPT_EN, content_hash)
+        if english_text is not None:
+            transcribed_text = english_text
+        else:
+            # 🔹 Step 3b: Detect language of transcription
+            detected_lang = await detect_language_async(transcribed_text)
+            print(f"🌍 Detected Transcription Language: {detected_lang}")  # Debugging Log
 
-        # 🔹 Step 4: Translate transcription if needed
-        if detected_lang.lower() != "en":
-            print("🔄 Translating transcription to English...")  # Debugging Log
-            transcribed_text = translate_text(transcribed_text, detected_lang, "en")
+            # 🔹 Step 4: Translate transcription if needed
+            if detected_lang.lower() != "en":
+                print("🔄 Translating transcription to English...")  # Debugging Log
+                transcribed_text = await translate_text(transcribed_text, detected_lang, "en")
+            await artifact_cache.set(TRANSCRIPT_EN, content_hash, transcribed_text)
 
         # 🔹 Step 5: Translate prompt (if given)
         if prompt and prompt.strip():
-            prompt_lang = detect_language(prompt)
+            prompt_lang = await detect_language_async(prompt)
             print(f"🌍 Detected Prompt Language: {prompt_lang}")  # Debugging Log
             
             if prompt_lang.lower() != "en":
                 print("🔄 Translating prompt to English...")  # Debugging Log
-                prompt = translate_text(prompt, prompt_lang, "en")
+                prompt = await translate_text(prompt, prompt_lang, "en")
 
         # 🔹 Step 6: Create Final Prompt for Gemini
         if prompt and prompt.strip():
@@ -99,7 +107,7 @@ async def process_audio(file, prompt: str = None):
         print(f"✅ Final Prompt Sent to Gemini:\n{final_prompt[:200]}...\n")  # Debugging Log
 
         # 🔹 Step 7: Send to Gemini
-        response = await process_text_with_gemini(final_prompt)  # ✅ Await for async call
+        response = await process_text_with_gemini(final_prompt, stream=stream)  # ✅ Await for async call (text chunks if streaming)
 
         return {"response": response}
 
@@ -1,12 +1,43 @@
-import io
-import docx
-import fitz  # PyMuPDF for PDFs
 from fastapi import UploadFile
-from utils.language_detection import detect_language
-from services.libretranslate_service import translate_text
+from utils.language_detection import detect_language_async
+from services.libretranslate_service import translate_text, translate_long_text
 from services.gemini_service import process_text_with_gemini
+from services.artifact_cache import artifact_cache, hash_bytes, DOCUMENT_TEXT, DOCUMENT_TEXT_EN
+from utils.document_extraction import SUPPORTED_DOCUMENT_TYPES, extract_document
 
-async def process_document(file: UploadFile, prompt: str = None):
+async def _extract_and_translate(content: bytes, file_ext: str, content_hash: str):
+    """
+    Extracts the document text and translates it to English, caching both by content hash
+    (the extracted text is reused on its own if the translation failed last time).
+    """
+    cached = await artifact_cache.get(DOCUMENT_TEXT, content_hash)
+    if cached is not None:
+        extracted_text, detected_lang = cached["text"], cached["language"]
+    else:
+        # Extracted page by page in the process pool, up to DOCUMENT_MAX_CHARS
+        extraction = await extract_document(content, file_ext)
+        extracted_text = extraction["text"]
+        if not extracted_text.strip():
+            return ""
+        if extraction["truncated"]:
+            print(f"✂️ Document truncated after {len(extraction['pages'])} pages")  # Debugging Log
+
+        print(f"✅ Extracted text (first 100 chars): {extracted_text[:100]}...")  # Debugging Log
+
+        # 🔹 Step 2: Detect document language
+        detected_lang = await detect_language_async(extracted_text)
+        print(f"🌍 Detected Document Language: {detected_lang}")  # Debugging Log
+        await artifact_cache.set(DOCUMENT_TEXT, content_hash, {"text": extracted_text, "language": detected_lang})
+
+    # 🔹 Step 3: Translate document if not English (chunked, in parallel)
+    if detected_lang.lower() != "en":
+        print("🔄 Translating document to English...")  # Debugging Log
+        extracted_text = await translate_long_text(extracted_text, detected_lang, "en")
+
+    await artifact_cache.set(DOCUMENT_TEXT_EN, content_hash, extracted_text)
+    return extracted_text
+
+async def process_document(file: UploadFile, prompt: str = None, stream: bool = False):
     """
     Processes uploaded document files (.pdf, .docx, .txt)
     - Detects the language
@@ -22,43 +53,30 @@ async def process_document(file: UploadFile, prompt: str = None):
 
     extracted_text = ""
 
-    try:
-        if file_ext == "pdf":
-            doc = fitz.open(stream=content, filetype="pdf")  
-            extracted_text = "\n".join([page.get_text("text") for page in doc])
-
-        elif file_ext == "docx":
-            doc = docx.Document(io.BytesIO(content))  
-            extracted_text = "\n".join([para.text for para in doc.paragraphs])
-
-        elif file_ext == "txt":
-            extracted_text = content.decode("utf-8").strip()
+    if file_ext not in SUPPORTED_DOCUMENT_TYPES:
+        return {"error": "Unsupported file type. Please upload PDF, DOCX, or TXT."}
 
+    try:
+        # 🔹 Step 1: Reuse the (translated) text of a previous upload of the same file
+        content_hash = hash_bytes(content)
+        english_text = await artifact_cache.get(DOCUMENT_TEXT_EN, content_hash)
+        if english_text is not None:
+            print("✅ Reusing cached English document text")  # Debugging Log
+            extracted_text = english_text
         else:
-            return {"error": "Unsupported file type. Please upload PDF, DOCX, or TXT."}
+            extracted_text = await _extract_and_translate(content, file_ext, content_hash)
 
         if not extracted_text.strip():
             return {"error": "No readable text found in the document."}
 
-        print(f"✅ Extracted text (first 100 chars): {extracted_text[:100]}...")  # Debugging Log
-
-        # 🔹 Step 2: Detect document language
-        detected_lang = detect_language(extracted_text)
-        print(f"🌍 Detected Document Language: {detected_lang}")  # Debugging Log
-
-        # 🔹 Step 3: Translate document if not English
-        if detected_lang.lower() != "en":
-            print("🔄 Translating document to English...")  # Debugging Log
-            extracted_text = translate_text(extracted_text, detected_lang, "en")
-
         # 🔹 Step 4: Translate prompt (if given)
         if prompt and prompt.strip():
-            prompt_lang = detect_language(prompt)
+            prompt_lang = await detect_language_async(prompt)
             print(f"🌍 Detected Prompt Language: {prompt_lang}")  # Debugging Log
             
             if prompt_lang.lower() != "en":
                 print("🔄 Translating prompt to English...")  # Debugging Log
-                prompt = translate_text(prompt, prompt_lang, "en")
+                prompt = await translate_text(prompt, prompt_lang, "en")
 
         # 🔹 Step 5: Prepare Gemini Prompt
         if prompt and prompt.strip():
@@ -90,7 +108,7 @@ async def process_document(file: UploadFile, prompt: str = None):
         print(f"✅ Final Prompt Sent to Gemini:\n{final_prompt[:200]}...\n")  # Debugging Log
 
         # 🔹 Step 6: Send to Gemini
-        response = await process_text_with_gemini(final_prompt)
+        response = await process_text_with_gemini(final_prompt, stream=stream)
 
         return {"response": response}
 
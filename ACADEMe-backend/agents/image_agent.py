@@ -1,9 +1,9 @@
-import io
-import os
-import tempfile
 import requests
 from configs import LIBRETRANSLATE_URL
-from services.gemini_service import get_gemini_response
+from services.gemini_service import get_gemini_response, stream_gemini_response
+from services import libretranslate_service
+from utils.language_detection import detect_language_async
+from utils.image_processing import prepare_image_async
 
 # Supported image formats (MIME types)
 SUPPORTED_IMAGE_FORMATS = ["image/jpeg", "image/png", "image/gif"]
@@ -19,22 +19,16 @@ def get_supported_languages():
 
 SUPPORTED_LANGUAGES = get_supported_languages()
 
-def detect_language(text: str) -> str:
+async def detect_language(text: str) -> str:
     """
-    Detects the language of a given text using LibreTranslate.
+    Detects the language of a given text (locally, see utils.language_detection).
     """
-    data = {"q": text}
-    headers = {"Content-Type": "application/json"}
-
     try:
-        response = requests.post(f"{LIBRETRANSLATE_URL}/detect", json=data, headers=headers)
-        response.raise_for_status()
-        detected_lang = response.json()[0]["language"]
-        return detected_lang
-    except requests.exceptions.RequestException:
-        return "en"  # Default to English if detection fails
+        return await detect_language_async(text)
+    except ValueError:
+        return "en"  # Default to English for empty text
 
-def translate_text(text: str, source_lang: str, target_lang: str) -> str:
+async def translate_text(text: str, source_lang: str, target_lang: str) -> str:
     """
     Translates text using LibreTranslate.
 
@@ -51,14 +45,9 @@ def translate_text(text: str, source_lang: str, target_lang: str) -> str:
     if target_lang not in SUPPORTED_LANGUAGES:
         return f"Error: Unsupported target language '{target_lang}'."
 
-    data = {"q": text, "source": source_lang, "target": target_lang, "format": "text"}
-    headers = {"Content-Type": "application/json"}
-
     try:
-        response = requests.post(f"{LIBRETRANSLATE_URL}/translate", json=data, headers=headers)
-        response.raise_for_status()
-        return response.json().get("translatedText", text)
-    except requests.exceptions.RequestException as e:
+        return await libretranslate_service.translate_text(text, source_lang, target_lang)
+    except Exception as e:
         return f"Translation service error: {e}"
 
 def detect_image_format(image_data: bytes) -> str:
@@ -82,7 +71,7 @@ def detect_image_format(image_data: bytes) -> str:
     else:
         return "unsupported"
 
-async def process_image(image_data: bytes, prompt: str, source_lang: str = "auto", target_lang: str = "en") -> dict:
+async def process_image(image_data: bytes, prompt: str, source_lang: str = "auto", target_lang: str = "en", stream: bool = False) -> dict:
     try:
         # Validate image format
         image_format = detect_image_format(image_data)
@@ -95,35 +84,35 @@ async def process_image(image_data: bytes, prompt: str, source_lang: str = "auto
 
         # Detect language if source_lang is "auto"
         if source_lang == "auto":
-            source_lang = detect_language(prompt)  # Detect language
+            source_lang = await detect_language(prompt)  # Detect language
 
         # Translate prompt if needed
         translated_prompt = prompt
         if source_lang != target_lang:
-            translated_prompt = translate_text(prompt, source_lang, target_lang)
+            translated_prompt = await translate_text(prompt, source_lang, target_lang)
 
-        # Save image to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_image:
-            temp_image.write(image_data)
-            temp_image_path = temp_image.name
+        # Downscale in memory before upload (no temporary file)
+        image_bytes, mime_type = await prepare_image_async(image_data)
+
+        if stream:
+            # Text chunks are translated sentence by sentence by the caller
+            response = await stream_gemini_response(prompt=translated_prompt, image_data=image_bytes, image_mime_type=mime_type)
+            return {"response": response}
 
         # Send image to Gemini
-        response = get_gemini_response(prompt=translated_prompt, image_path=temp_image_path)
+        response = await get_gemini_response(prompt=translated_prompt, image_data=image_bytes, image_mime_type=mime_type)
 
         print(f"🔹 Gemini RAW Response: {response}")
 
-        # Clean up temporary image file
-        os.remove(temp_image_path)
-
         # Translate Gemini's response if needed
         if target_lang != "en":
             detected_lang = "hi"  # Default assumption (since Gemini responded in Hindi)
             
             # Try detecting the response language dynamically
             if source_lang == "auto":
-                detected_lang = detect_language(response)  # You need a function for this!
+                detected_lang = await detect_language(response)  # You need a function for this!
 
-            translated_response = translate_text(response, detected_lang, target_lang)  # Use detected language
+            translated_response = await translate_text(response, detected_lang, target_lang)  # Use detected language
             if "Error" not in translated_response:
                 response = translated_response
             else:
@@ -1,10 +1,12 @@
-from utils.language_detection import detect_language
-from services.gemini_service import get_gemini_response
+from utils.language_detection import detect_language_async
+from services.gemini_service import get_gemini_response, stream_gemini_response
 from services.libretranslate_service import translate_text
 
-async def process_text(text: str, target_language: str) -> str:
-    source_lang = detect_language(text)
-    english_text = translate_text(text, source_lang, target_language)
-    response = get_gemini_response(english_text)
+async def process_text(text: str, target_language: str, stream: bool = False):
+    source_lang = await detect_language_async(text)
+    english_text = await translate_text(text, source_lang, target_language)
+    if stream:
+        return await stream_gemini_response(english_text)
+    response = await get_gemini_response(english_text)
     # final_response = translate_text(response, "en", target_language)
     return response
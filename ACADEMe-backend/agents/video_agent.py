@@ -3,13 +3,15 @@ import asyncio
 import tempfile
 import aiofiles
 import traceback
-from services.gemini_service import get_gemini_response
+from services.gemini_service import get_gemini_response, stream_gemini_response
+from utils.video_processing import VIDEO_ANALYSIS_MODE, build_video_parts_async
 
-async def process_video(file, prompt: str = None):
+async def process_video(file, prompt: str = None, stream: bool = False):
     """
     Processes an uploaded video:
     - Saves it temporarily
-    - Sends the video directly to Gemini 2.0 Flash for analysis
+    - Sends sampled keyframes (+ low-bitrate audio) to Gemini 2.0 Flash for analysis,
+      or the whole video when VIDEO_ANALYSIS_MODE is "full"
     - Returns the relevant response
     """
     print(f"🔍 Received prompt: '{prompt}'")  # Debugging
@@ -30,9 +32,20 @@ async def process_video(file, prompt: str = None):
 
         print(f"✅ Video saved at: {temp_video_path}")  # Debugging Log
 
-        # 🔹 Step 2: Prepare prompt
+        # 🔹 Step 2: Extract keyframes and audio (bounded size, whatever the video length)
+        video_parts = None
+        if VIDEO_ANALYSIS_MODE == "keyframes":
+            try:
+                video_parts = await build_video_parts_async(temp_video_path)
+                print(f"✅ Prepared {len(video_parts)} keyframe/audio parts for analysis")  # Debugging Log
+            except Exception as e:
+                # Undecodable by moviepy/ffmpeg: let Gemini analyse the whole video instead
+                print(f"⚠️ Keyframe extraction failed ({e}), sending the full video")
+                video_parts = None
+
+        # 🔹 Step 3: Prepare prompt
         final_prompt = f"""
-        You are analyzing a video.
+        You are analyzing a video{" from timestamped keyframes and its audio track" if video_parts else ""}.
 
         **Task:**
         - Extract and summarize the most relevant details.
@@ -46,8 +59,13 @@ async def process_video(file, prompt: str = None):
 
         print(f"✅ Final Prompt Sent to Gemini:\n{final_prompt[:200]}...\n")  # Debugging Log
 
-        # 🔹 Step 3: Send to Gemini with video file
-        response = get_gemini_response(final_prompt, video_path=temp_video_path)  # ✅ Use video instead of image
+        # 🔹 Step 4: Send to Gemini with the keyframes (or the whole video file)
+        video_path = None if video_parts else temp_video_path
+        if stream:
+            # The video is read before returning, so the temp file can still be removed below
+            return {"response": await stream_gemini_response(final_prompt, video_path=video_path, attachments=video_parts)}
+
+        response = await get_gemini_response(final_prompt, video_path=video_path, attachments=video_parts)
 
         return {"response": response}
 
@@ -1,5 +1,7 @@
 import os
+import json
 import base64
+import hashlib
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -26,7 +28,7 @@ from fastapi import FastAPI, File, UploadFile, Form
 from routes import (
     users, courses, topics, quizzes, student_progress, 
     ai_recommendations, progress_visuals, admin_teacher_routes, 
-    teacher_exam_routes, firebase_auth
+    teacher_exam_routes, firebase_auth, metrics, translation_job_routes
 )
 from routes.teacher_routes import router as teacher_router
 from routes.teacher_auth_routes import router as teacher_auth_router
@@ -38,6 +40,14 @@ from agents.image_agent import process_image
 from agents.audio_agent import process_audio
 from agents.video_agent import process_video
 from agents.stt_agent import process_stt
+from services.course_catalog import course_catalog
+from services import libretranslate_service
+from services.translation_memory import translation_memory
+from services.translation_jobs import translation_jobs
+from utils.streaming import STREAM_MODES, translate_stream, stream_response, single_chunk, tee_stream
+from services.ai_response_cache import ai_response_cache, hash_upload
+from services.id_mapping_cache import id_mapping_cache, ID_MAPPING_CACHE_PRELOAD
+from utils import document_extraction
 
 app = FastAPI(title="ACADEMe API", version="1.0")
 
@@ -55,8 +65,28 @@ app.include_router(admin_teacher_router, prefix="/api")
 app.include_router(admin_teacher_routes.router, prefix="/api")
 app.include_router(teacher_exam_routes.router, prefix="/api")
 app.include_router(firebase_auth.router, prefix="/api")  # NEW: Firebase Auth router
-
-def process_and_translate(response, target_language):
+app.include_router(metrics.router, prefix="/api")
+app.include_router(translation_job_routes.router, prefix="/api")
+
+@app.on_event("startup")
+async def start_background_services():
+    # Keep the in-process course catalog in sync with Firestore
+    course_catalog.start()
+    # Background workers filling in content translations
+    await translation_jobs.start()
+    # Optionally load the ID → name mappings used by recommendations
+    if ID_MAPPING_CACHE_PRELOAD:
+        await id_mapping_cache.warm()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    course_catalog.stop()
+    await translation_jobs.stop()
+    await libretranslate_service.close_client()
+    translation_memory.close()
+    document_extraction.shutdown_pool()
+
+async def process_and_translate(response, target_language):
     # Ensure that errors are not processed further
     if isinstance(response, dict) and "error" in response:
         return response  # Return the error directly
@@ -65,29 +95,73 @@ def process_and_translate(response, target_language):
     Otherwise, return the original response.
     """
     if target_language.lower() != "en":
-        response = translate_response(response, target_language)
+        response = await translate_response(response, target_language)
     return response
 
-def process_and_translate_all(response, target_language):
+async def process_and_translate_all(response, target_language):
     # Handle errors first
     if isinstance(response, dict) and "error" in response:
         return response
     
     # Handle different response types
     if isinstance(response, str):
-        return translate_response_all(response, target_language)
+        return await translate_response_all(response, target_language)
     elif isinstance(response, dict):
-        return {k: translate_response_all(v, target_language) if isinstance(v, str) else v 
+        return {k: await translate_response_all(v, target_language) if isinstance(v, str) else v 
                for k, v in response.items()}
     return response
 
+def stream_and_translate(chunks, target_language, mode, detect_source=False, cache_as=None):
+    """
+    Streams Gemini text chunks as SSE/NDJSON events, translating sentence by sentence when
+    target_language is not English (or, with detect_source, whenever the source is not English).
+    With cache_as=(endpoint, key), the full text is cached once the stream completes.
+    """
+    translate = None
+    if detect_source:
+        translate = lambda sentence: translate_response_all(sentence, target_language)
+    elif target_language.lower() != "en":
+        translate = lambda sentence: translate_response(sentence, target_language)
+
+    translated = translate_stream(chunks, translate)
+    if cache_as:
+        translated = tee_stream(translated, lambda text: ai_response_cache.set(*cache_as, text))
+    return stream_response(translated, mode)
+
+def cached_response(cached, stream):
+    """Serves a cached tutor response (as a one-event stream when streaming was requested)."""
+    if stream:
+        text = cached if isinstance(cached, str) else json.dumps(cached, ensure_ascii=False)
+        return stream_response(single_chunk(text), stream)
+    return {"response": cached}
+
+def invalid_stream_mode(stream):
+    """Returns an error response for unknown `stream` values (None when valid or not streaming)."""
+    if stream and stream not in STREAM_MODES:
+        return {"error": f"Invalid stream mode '{stream}'. Use one of: {', '.join(STREAM_MODES)}."}
+    return None
+
 @app.post("/api/process_text")
 async def process_text_api(
     text: str = Form(...),
-    target_language: str = Form("en")
+    target_language: str = Form("en"),
+    stream: str = Form(None)
 ):
-    response = await process_text(text, "en")
-    return {"response": process_and_translate(response, target_language)}
+    if (error := invalid_stream_mode(stream)):
+        return error
+
+    cache_key = ai_response_cache.make_key("process_text", text, target_language=target_language)
+    cached = ai_response_cache.get("process_text", cache_key)
+    if cached is not None:
+        return cached_response(cached, stream)
+
+    response = await process_text(text, "en", stream=bool(stream))
+    if stream:
+        return stream_and_translate(response, target_language, stream, cache_as=("process_text", cache_key))
+
+    translated_response = await process_and_translate(response, target_language)
+    ai_response_cache.set("process_text", cache_key, translated_response, source=response)
+    return {"response": translated_response}
 
 @app.post("/api/process_stt")
 async def process_stt_api(file: UploadFile = File(...)):
@@ -101,16 +175,25 @@ async def process_stt_api(file: UploadFile = File(...)):
 
 @app.post("/api/translate_response")
 async def translate_response_api(text: str, target_language: str):
-    response = translate_response(text, target_language)
+    response = await translate_response(text, target_language)
     return {"response": response}
 
 @app.post("/api/process_document")
 async def process_document_api(
     file: UploadFile = File(...), 
     prompt: str = Form(None),
-    target_language: str = Form("en")
+    target_language: str = Form("en"),
+    stream: str = Form(None)
 ):
-    response = await process_document(file, prompt)
+    if (error := invalid_stream_mode(stream)):
+        return error
+
+    cache_key = ai_response_cache.make_key("process_document", prompt, await hash_upload(file), target_language)
+    cached = ai_response_cache.get("process_document", cache_key)
+    if cached is not None:
+        return cached_response(cached, stream)
+
+    response = await process_document(file, prompt, stream=bool(stream))
 
     print(f"Debug: Response from process_document -> {response}")
 
@@ -121,7 +204,11 @@ async def process_document_api(
     if "response" not in response:
         return {"error": "Unexpected response format from document processor."}
 
-    translated_response = process_and_translate(response["response"], target_language)
+    if stream:
+        return stream_and_translate(response["response"], target_language, stream, cache_as=("process_document", cache_key))
+
+    translated_response = await process_and_translate(response["response"], target_language)
+    ai_response_cache.set("process_document", cache_key, translated_response, source=response["response"])
     
     return {"response": translated_response}
 
@@ -130,13 +217,24 @@ async def process_image_endpoint(
     image: UploadFile = File(...), 
     prompt: str = Form("Describe this image"), 
     source_lang: str = Form("auto"), 
-    target_lang: str = Form("en")
+    target_lang: str = Form("en"),
+    stream: str = Form(None)
 ):
     """
     API endpoint to process images with optional multilingual prompts.
     """
+    if (error := invalid_stream_mode(stream)):
+        return error
+
     image_data = await image.read()
-    response = await process_image(image_data, prompt, source_lang, target_lang)
+    cache_key = ai_response_cache.make_key(
+        "process_image", prompt, hashlib.sha256(image_data).hexdigest(), target_lang, source_lang=source_lang
+    )
+    cached = ai_response_cache.get("process_image", cache_key)
+    if cached is not None:
+        return cached_response(cached, stream)
+
+    response = await process_image(image_data, prompt, source_lang, target_lang, stream=bool(stream))
     
     # Error handling and translation
     if isinstance(response, dict) and "error" in response:
@@ -145,7 +243,11 @@ async def process_image_endpoint(
     if "response" not in response:
         return {"error": "Unexpected response format from image processor."}
 
-    translated_response = process_and_translate(response["response"], target_lang)
+    if stream:
+        return stream_and_translate(response["response"], target_lang, stream, cache_as=("process_image", cache_key))
+
+    translated_response = await process_and_translate(response["response"], target_lang)
+    ai_response_cache.set("process_image", cache_key, translated_response, source=response["response"])
     
     return {"response": translated_response}
 
@@ -153,9 +255,18 @@ async def process_image_endpoint(
 async def process_audio_api(
     file: UploadFile = File(...),
     prompt: str = Form(None),
-    target_language: str = Form("en")
+    target_language: str = Form("en"),
+    stream: str = Form(None)
 ):
-    response = await process_audio(file, prompt)
+    if (error := invalid_stream_mode(stream)):
+        return error
+
+    cache_key = ai_response_cache.make_key("process_audio", prompt, await hash_upload(file), target_language)
+    cached = ai_response_cache.get("process_audio", cache_key)
+    if cached is not None:
+        return cached_response(cached, stream)
+
+    response = await process_audio(file, prompt, stream=bool(stream))
 
     # Ensure errors are returned properly
     if isinstance(response, dict) and "error" in response:
@@ -164,19 +275,33 @@ async def process_audio_api(
     if "response" not in response:
         return {"error": "Unexpected response format from AI."}
 
-    return {"response": process_and_translate(response["response"], target_language)}
+    if stream:
+        return stream_and_translate(response["response"], target_language, stream, cache_as=("process_audio", cache_key))
+
+    translated_response = await process_and_translate(response["response"], target_language)
+    ai_response_cache.set("process_audio", cache_key, translated_response, source=response["response"])
+    return {"response": translated_response}
 
 @app.post("/api/process_video")
 async def process_video_api(
     file: UploadFile = File(...),
     prompt: str = Form(None),
-    target_language: str = Form("en")
+    target_language: str = Form("en"),
+    stream: str = Form(None)
 ):
+    if (error := invalid_stream_mode(stream)):
+        return error
+
     allowed_video_types = {"video/mp4", "video/mkv", "video/webm", "video/avi"}
     if file.content_type not in allowed_video_types:
         return {"error": f"Invalid file type: {file.content_type}. Please upload a video file."}
 
-    response = await process_video(file, prompt)
+    cache_key = ai_response_cache.make_key("process_video", prompt, await hash_upload(file), target_language)
+    cached = ai_response_cache.get("process_video", cache_key)
+    if cached is not None:
+        return cached_response(cached, stream)
+
+    response = await process_video(file, prompt, stream=bool(stream))
 
     # Ensure errors are returned properly
     if isinstance(response, dict) and "error" in response:
@@ -185,7 +310,14 @@ async def process_video_api(
     if "response" not in response:
         return {"error": "Unexpected response format from AI."}
 
-    return {"response": process_and_translate_all(response["response"], target_language)}
+    if stream:
+        return stream_and_translate(
+            response["response"], target_language, stream, detect_source=True, cache_as=("process_video", cache_key)
+        )
+
+    translated_response = await process_and_translate_all(response["response"], target_language)
+    ai_response_cache.set("process_video", cache_key, translated_response, source=response["response"])
+    return {"response": translated_response}
 
 @app.get("/")
 def home():
@@ -14,6 +14,8 @@ class CourseResponse(BaseModel):
     description: str
     created_at: datetime
     updated_at: datetime
+    translation_status: Optional[str] = None  # "pending", "complete" or "failed"
+    translation_job_id: Optional[str] = None  # Poll GET /translation-jobs/{id} (create responses only)
 
     class Config:
         from_attributes = True  # ✅ Ensures conversion from Firestore docs
@@ -12,6 +12,8 @@ class MaterialResponse(MaterialCreate):
     id: str
     created_at: str
     updated_at: str
+    translation_status: Optional[str] = None  # "pending", "complete" or "failed"
+    translation_job_id: Optional[str] = None  # Poll GET /translation-jobs/{id} (create responses only)
 
     class Config:
         from_attributes=True
\ No newline at end of file
@@ -12,6 +12,8 @@ class QuizResponse(QuizCreate):
     created_at: str
     updated_at: str
     subtopic_id: Optional[str] = None  # ✅ Include for subtopic-based quizzes
+    translation_status: Optional[str] = None  # "pending", "complete" or "failed"
+    translation_job_id: Optional[str] = None  # Poll GET /translation-jobs/{id} (create responses only)
 
     class Config:
         from_attributes = True
@@ -29,6 +31,8 @@ class QuestionResponse(QuestionCreate):
     updated_at: str  # ✅ Added for consistency
     quiz_id: str  # ✅ Added to track which quiz the question belongs to
     subtopic_id: Optional[str] = None  # ✅ Include for subtopic-based questions
+    translation_status: Optional[str] = None  # "pending", "complete" or "failed"
+    translation_job_id: Optional[str] = None  # Poll GET /translation-jobs/{id} (create responses only)
 
     class Config:
         from_attributes = True
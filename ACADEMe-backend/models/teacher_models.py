@@ -16,6 +16,8 @@ class TeacherCourseResponse(BaseModel):
     teacher_id: str
     created_at: datetime
     updated_at: datetime
+    translation_status: Optional[str] = None  # "pending", "complete" or "failed"
+    translation_job_id: Optional[str] = None  # Poll GET /translation-jobs/{id} (create responses only)
     
     class Config:
         from_attributes = True
@@ -48,6 +50,8 @@ class TeacherMaterialResponse(TeacherMaterialCreate):
     topic_id: str
     created_at: str
     updated_at: str
+    translation_status: Optional[str] = None  # "pending", "complete" or "failed"
+    translation_job_id: Optional[str] = None  # Poll GET /translation-jobs/{id} (create responses only)
     
     class Config:
         from_attributes = True
@@ -8,14 +8,16 @@ router = APIRouter(prefix="/recommendations", tags=["AI Recommendations"])
 @router.get("/", response_model=AIRecommendationResponse)
 async def fetch_recommendations(
     user: dict = Depends(get_current_user),
-    target_language: str = Query("en", description="Target language for recommendations")
+    target_language: str = Query("en", description="Target language for recommendations"),
+    refresh: bool = Query(False, description="Regenerate even if progress is unchanged (at most once per refresh window)")
 ):
     """
     Analyze student progress and provide AI-driven learning recommendations in the specified target language.
-    Defaults to English if no language is specified.
+    Defaults to English if no language is specified; stored recommendations are served
+    until the student's progress changes.
     """
     try:
-        recommendations = await get_recommendations(user["id"], target_language)
+        recommendations = await get_recommendations(user["id"], target_language, force=refresh)
         return recommendations
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
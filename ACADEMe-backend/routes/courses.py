@@ -1,7 +1,6 @@
 from utils.auth import get_current_user
 from services.course_service import CourseService
 from fastapi import APIRouter, Depends, HTTPException
-from utils.class_filter import filter_courses_by_class
 from models.course_model import CourseCreate, CourseResponse
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
@@ -21,13 +20,13 @@ async def create_course(course: CourseCreate, user: dict = Depends(get_current_u
 
 @router.get("/", response_model=list[CourseResponse])
 async def get_courses(target_language: str = "en", user: dict = Depends(get_current_user)):
-    """Fetches all courses in the specified language."""
-    all_courses = CourseService.get_courses(target_language)
-    filtered_courses = filter_courses_by_class(all_courses, user["student_class"])
-    
-    # Convert Pydantic models to dictionaries if needed
-    if filtered_courses and hasattr(filtered_courses[0], 'dict'):
-        filtered_courses = [course.dict() for course in filtered_courses]
-    
-    # Sort courses by created_at in ascending order (oldest first)
-    return sorted(filtered_courses, key=lambda x: x['created_at'])
\ No newline at end of file
+    """Fetches the courses of the user's class in the specified language."""
+    # Users without a class (e.g. teachers, new students) see no courses; class_name=None means "all courses"
+    student_class = user.get("student_class")
+    if student_class is None:
+        return []
+
+    # ✅ Served from the in-process catalog cache, already filtered by class and sorted by created_at (oldest first)
+    courses = await CourseService.get_courses(target_language, student_class)
+
+    return [course.dict() for course in courses]
@@ -0,0 +1,29 @@
+from utils.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException
+from services.course_catalog import course_catalog
+from services.quiz_index import quiz_index
+from utils.identity_cache import identity_cache
+from services.translation_memory import translation_memory
+from services.translation_jobs import translation_jobs
+from services.ai_response_cache import ai_response_cache
+from services.id_mapping_cache import id_mapping_cache
+from services.artifact_cache import artifact_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/caches")
+async def get_cache_metrics(user: dict = Depends(get_current_user)):
+    """Returns hit/miss counters of the in-process caches (Admin-only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Permission denied: Admins only")
+
+    return {
+        "course_catalog": course_catalog.stats(),
+        "quiz_index": quiz_index.stats(),
+        "identity_cache": identity_cache.stats(),
+        "translation_memory": translation_memory.stats(),
+        "translation_jobs": translation_jobs.stats(),
+        "ai_responses": ai_response_cache.stats(),
+        "id_mappings": id_mapping_cache.stats(),
+        "artifacts": artifact_cache.stats(),
+    }
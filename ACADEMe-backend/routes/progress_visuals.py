@@ -10,7 +10,7 @@ router = APIRouter(prefix="/progress-visuals", tags=["Progress Visualization"])
 async def progress_visuals(user: dict = Depends(get_current_user)):
     try:
         # Fetch progress data from Firestore
-        progress_data = fetch_progress_from_firestore(user["id"])
+        progress_data = await fetch_progress_from_firestore(user["id"])
 
         # Debugging: Print progress_data type and content
         print(f"Progress Data Type: {type(progress_data)}")
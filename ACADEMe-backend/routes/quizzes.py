@@ -2,7 +2,7 @@ from typing import List
 from utils.auth import get_current_user
 from services.quiz_service import QuizService
 from fastapi import APIRouter, Depends, HTTPException
-from models.quiz_model import QuizCreate, QuizResponse, QuestionCreate
+from models.quiz_model import QuizCreate, QuizResponse, QuestionCreate, QuestionResponse
 
 router = APIRouter(prefix="/courses", tags=["Quizzes"])
 
@@ -61,7 +61,7 @@ async def get_subtopic_quizzes(
     return sorted(quizzes, key=lambda x: x.created_at)
 
 ### 📌 Add a Question to a Topic Quiz ###
-@router.post("/{course_id}/topics/{topic_id}/quizzes/{quiz_id}/questions/", response_model=QuestionCreate)
+@router.post("/{course_id}/topics/{topic_id}/quizzes/{quiz_id}/questions/", response_model=QuestionResponse)
 async def add_question_to_topic_quiz(
     course_id: str,
     topic_id: str,
@@ -75,7 +75,7 @@ async def add_question_to_topic_quiz(
     return await QuizService.add_question(course_id, topic_id, quiz_id, question_data, is_subtopic=False)
 
 ### 📌 Add a Question to a Subtopic Quiz ###
-@router.post("/{course_id}/topics/{topic_id}/subtopics/{subtopic_id}/quizzes/{quiz_id}/questions/", response_model=QuestionCreate)
+@router.post("/{course_id}/topics/{topic_id}/subtopics/{subtopic_id}/quizzes/{quiz_id}/questions/", response_model=QuestionResponse)
 async def add_question_to_subtopic_quiz(
     course_id: str,
     topic_id: str,
@@ -3,6 +3,7 @@ from fastapi.encoders import jsonable_encoder
 from fastapi import APIRouter, Depends, HTTPException, status
 from models.progress_model import ProgressCreate, ProgressUpdate
 from services.progress_service import log_progress, get_student_progress_list, update_progress_status
+from services.ai_service import schedule_recommendation_refresh
 
 router = APIRouter(prefix="/progress", tags=["Student Progress"])
 
@@ -11,6 +12,7 @@ async def track_progress(progress_data: ProgressCreate, user: dict = Depends(get
     """Logs student progress in Firestore."""
     progress_dict = jsonable_encoder(progress_data.dict())  # Ensure serialization
     response = await log_progress(user["id"], progress_dict)
+    schedule_recommendation_refresh(user["id"])
     return {"message": "Progress logged successfully", "progress": response}
 
 @router.get("/")
@@ -31,5 +33,6 @@ async def update_progress(progress_id: str, progress_update: ProgressUpdate, use
     updated_progress = await update_progress_status(user["id"], progress_id, update_data)
     if not updated_progress:
         raise HTTPException(status_code=404, detail="Progress record not found or not updated")
+    schedule_recommendation_refresh(user["id"])
 
     return {"message": "Progress updated successfully", "progress": updated_progress}
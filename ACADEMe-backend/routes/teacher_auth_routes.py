@@ -1,12 +1,10 @@
 from typing import List
 from fastapi import APIRouter, HTTPException
-from firebase_admin import firestore
 from pydantic import BaseModel, EmailStr
+from utils.async_firestore import async_db, fetch_all
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-db = firestore.client()
-
 class TeacherEmailResponse(BaseModel):
     emails: List[str]
 
@@ -15,7 +13,7 @@ async def get_teacher_emails():
     """Get all teacher email addresses for verification during registration."""
     try:
         # Get all teacher emails from teacher_profiles collection
-        teacher_profiles = db.collection("teacher_profiles").stream()
+        teacher_profiles = await fetch_all(async_db.collection("teacher_profiles"))
         emails = []
         
         for teacher_doc in teacher_profiles:
@@ -23,7 +21,7 @@ async def get_teacher_emails():
             emails.append(teacher_doc.id)
         
         # Also check for teachers in users collection with role = "teacher"
-        teachers_in_users = db.collection("users").where("role", "==", "teacher").stream()
+        teachers_in_users = await fetch_all(async_db.collection("users").where("role", "==", "teacher"))
         for teacher in teachers_in_users:
             teacher_data = teacher.to_dict()
             if teacher_data.get("email") and teacher_data["email"] not in emails:
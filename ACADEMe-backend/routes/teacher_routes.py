@@ -25,7 +25,7 @@ async def get_teacher_profile(user: dict = Depends(get_current_user)):
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.get_teacher_profile(user["id"])
+    return await TeacherService.get_teacher_profile(user["id"])
 
 @router.put("/profile/update")
 async def update_teacher_profile(
@@ -36,7 +36,7 @@ async def update_teacher_profile(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.update_teacher_profile(user["id"], profile_data)
+    return await TeacherService.update_teacher_profile(user["id"], profile_data)
 
 @router.put("/preferences/update")
 async def update_teacher_preferences(
@@ -47,7 +47,7 @@ async def update_teacher_preferences(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.update_teacher_preferences(user["id"], preferences)
+    return await TeacherService.update_teacher_preferences(user["id"], preferences)
 
 # Teacher Class Management
 @router.get("/allotted-classes", response_model=List[str])
@@ -56,7 +56,7 @@ async def get_allotted_classes(user: dict = Depends(get_current_user)):
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.get_teacher_allotted_classes(user["id"])
+    return await TeacherService.get_teacher_allotted_classes(user["id"])
 
 @router.get("/students/{class_name}", response_model=List[StudentInfo])
 async def get_students_by_class(
@@ -68,11 +68,11 @@ async def get_students_by_class(
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
     # Verify teacher has access to this class
-    teacher_classes = TeacherService.get_teacher_allotted_classes(user["id"])
+    teacher_classes = await TeacherService.get_teacher_allotted_classes(user["id"])
     if class_name not in teacher_classes:
         raise HTTPException(status_code=403, detail="Not authorized to view this class")
     
-    return TeacherService.get_students_by_class(class_name)
+    return await TeacherService.get_students_by_class(class_name)
 
 @router.get("/analytics/{class_name}", response_model=ClassAnalytics)
 async def get_class_analytics(
@@ -83,7 +83,7 @@ async def get_class_analytics(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.get_class_analytics(class_name, user["id"])
+    return await TeacherService.get_class_analytics(class_name, user["id"])
 
 # Teacher Course Management
 @router.get("/courses", response_model=List[TeacherCourseResponse])
@@ -95,7 +95,7 @@ async def get_teacher_courses(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    courses = TeacherCourseService.get_teacher_courses(user["id"], target_language)
+    courses = await TeacherCourseService.get_teacher_courses(user["id"], target_language)
     return sorted(courses, key=lambda x: x.created_at)
 
 @router.post("/courses/create", response_model=TeacherCourseResponse)
@@ -119,7 +119,7 @@ async def get_teacher_course_topics(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    topics = TeacherCourseService.get_teacher_course_topics(course_id, user["id"], target_language)
+    topics = await TeacherCourseService.get_teacher_course_topics(course_id, user["id"], target_language)
     return sorted(topics, key=lambda x: x['created_at'])
 
 @router.post("/courses/{course_id}/topics/create")
@@ -145,7 +145,7 @@ async def get_teacher_topic_materials(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    materials = TeacherCourseService.get_teacher_materials(course_id, topic_id, user["id"], target_language)
+    materials = await TeacherCourseService.get_teacher_materials(course_id, topic_id, user["id"], target_language)
     return sorted(materials, key=lambda x: x.created_at)
 
 @router.post("/courses/{course_id}/topics/{topic_id}/materials/create", response_model=TeacherMaterialResponse)
@@ -180,11 +180,11 @@ async def schedule_class(
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
     # Verify teacher has access to this class
-    teacher_classes = TeacherService.get_teacher_allotted_classes(user["id"])
+    teacher_classes = await TeacherService.get_teacher_allotted_classes(user["id"])
     if class_data.class_name not in teacher_classes:
         raise HTTPException(status_code=403, detail="Not authorized to schedule class for this grade")
     
-    return TeacherService.schedule_live_class(class_data, user["id"])
+    return await TeacherService.schedule_live_class(class_data, user["id"])
 
 @router.get("/classes/upcoming", response_model=List[LiveClassResponse])
 async def get_upcoming_classes(user: dict = Depends(get_current_user)):
@@ -192,7 +192,7 @@ async def get_upcoming_classes(user: dict = Depends(get_current_user)):
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.get_upcoming_classes(user["id"])
+    return await TeacherService.get_upcoming_classes(user["id"])
 
 @router.get("/classes/recorded", response_model=List[LiveClassResponse])
 async def get_recorded_classes(user: dict = Depends(get_current_user)):
@@ -200,7 +200,7 @@ async def get_recorded_classes(user: dict = Depends(get_current_user)):
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.get_recorded_classes(user["id"])
+    return await TeacherService.get_recorded_classes(user["id"])
 
 @router.post("/classes/{class_id}/start")
 async def start_class(
@@ -211,7 +211,7 @@ async def start_class(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.start_class(class_id, user["id"])
+    return await TeacherService.start_class(class_id, user["id"])
 
 @router.post("/recordings/share")
 async def share_recording(
@@ -223,7 +223,7 @@ async def share_recording(
     if user["role"] != "teacher":
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
-    return TeacherService.share_recording(class_id, recording_url, user["id"])
+    return await TeacherService.share_recording(class_id, recording_url, user["id"])
 
 @router.get("/progress/{class_name}", response_model=Dict[str, Any])
 async def get_comprehensive_class_progress(
@@ -248,7 +248,7 @@ async def get_class_progress_summary(
         raise HTTPException(status_code=403, detail="Permission denied: Teachers only")
     
     # Verify teacher has access to this class
-    teacher_classes = TeacherService.get_teacher_allotted_classes(user["id"])
+    teacher_classes = await TeacherService.get_teacher_allotted_classes(user["id"])
     if class_name not in teacher_classes:
         raise HTTPException(status_code=403, detail="Not authorized to view this class")
     
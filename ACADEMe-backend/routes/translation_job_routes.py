@@ -0,0 +1,27 @@
+from utils.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException
+from services.translation_jobs import translation_jobs
+
+router = APIRouter(prefix="/translation-jobs", tags=["Translation Jobs"])
+
+@router.get("/{job_id}")
+async def get_translation_job(job_id: str, user: dict = Depends(get_current_user)):
+    """Returns the status of a background translation job (Admins & Teachers)."""
+    if user["role"] not in ["admin", "teacher"]:
+        raise HTTPException(status_code=403, detail="Permission denied: Admins and teachers only")
+
+    job = await translation_jobs.get_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Translation job not found")
+    return job
+
+@router.post("/{job_id}/retry")
+async def retry_translation_job(job_id: str, user: dict = Depends(get_current_user)):
+    """Re-queues a failed translation job (Admin-only); other statuses are rejected with 409."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Permission denied: Admins only")
+
+    job = await translation_jobs.retry(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Translation job not found")
+    return {"message": "Translation job re-queued", "job_id": job_id}
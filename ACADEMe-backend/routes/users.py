@@ -1,7 +1,5 @@
-import asyncio
 from typing import List
 import firebase_admin
-from firebase_admin import firestore
 from utils.auth import get_current_user, verify_refresh_token, create_access_token, revoke_refresh_token, determine_user_role, ACCESS_TOKEN_EXPIRY
 from services.auth_service import fetch_admin_ids, send_otp, send_reset_otp, reset_password
 from fastapi import APIRouter, Depends, HTTPException
@@ -11,11 +9,10 @@ from models.user_model import UserCreate, UserLogin, TokenResponse, UserUpdateCl
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime
+from utils.async_firestore import async_db
 
 router = APIRouter(prefix="/users", tags=["Users & Authentication"])
 
-db = firestore.client()
-
 # Model for OTP request
 class OTPRequest(BaseModel):
     email: EmailStr
@@ -111,7 +108,7 @@ async def get_current_user_details(user: dict = Depends(get_current_user)):
     email = user.get("email")
 
     # Fetch user from Firestore
-    user_ref = db.collection("users").document(user_id).get()
+    user_ref = await async_db.collection("users").document(user_id).get()
     if not user_ref.exists:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -138,7 +135,7 @@ async def refresh_access_token(request: RefreshTokenRequest):
         user_id = payload.get("user_id")
 
         # Get user data from Firestore
-        user_ref = db.collection("users").document(user_id).get()
+        user_ref = await async_db.collection("users").document(user_id).get()
         if not user_ref.exists:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -192,10 +189,10 @@ async def logout(user: dict = Depends(get_current_user), refresh_token: str = No
 async def update_user_class(update_data: UserUpdateClass, user: dict = Depends(get_current_user)):
     """Deletes user progress and updates their class, returns updated user data."""
     user_id = user["id"]
-    user_ref = db.collection("users").document(user_id)
+    user_ref = async_db.collection("users").document(user_id)
 
     # Check if user exists
-    user_doc = user_ref.get()
+    user_doc = await user_ref.get()
     if not user_doc.exists:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -203,11 +200,10 @@ async def update_user_class(update_data: UserUpdateClass, user: dict = Depends(g
     await delete_user_progress(user_id)
 
     # Update class field asynchronously
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(None, lambda: user_ref.update({"student_class": update_data.new_class}))
+    await user_ref.update({"student_class": update_data.new_class})
 
     # Get updated user data
-    updated_user_doc = user_ref.get()
+    updated_user_doc = await user_ref.get()
     updated_user_data = updated_user_doc.to_dict()
 
     # Determine role
@@ -1,56 +1,33 @@
 import asyncio
 from datetime import datetime
 from typing import Dict, List, Any
-from firebase_admin import firestore
 from collections import defaultdict
-
-db = firestore.client()
+from utils.async_firestore import async_db, fetch_all, get_dict
+from services.class_stats import get_class_material_total
+from services.progress_aggregates import get_aggregate, get_aggregates, empty_aggregate
 
 class AccurateProgressService:
     
     @staticmethod
-    async def calculate_accurate_completion_rate(student_id: str, class_name: str = None) -> float:
+    async def calculate_accurate_completion_rate(student_id: str, class_name: str = None, aggregate: dict = None, total_materials: int = None) -> float:
         """Calculate accurate completion rate based on total materials vs completed materials."""
         try:
-            # Get all courses for the student's class
-            if not class_name:
-                student_ref = db.collection("users").document(student_id)
-                student_doc = student_ref.get()
-                if not student_doc.exists:
-                    return 0.0
-                class_name = student_doc.to_dict().get("student_class")
-            
-            # Get all courses for this class
-            courses_ref = db.collection("courses").where("class_name", "==", class_name).stream()
-            total_materials = 0
-            
-            # Count total materials across all courses, topics, and subtopics
-            for course in courses_ref:
-                course_id = course.id
+            if total_materials is None:
+                if not class_name:
+                    student_data = await get_dict(async_db.collection("users").document(student_id))
+                    if not student_data:
+                        return 0.0
+                    class_name = student_data.get("student_class")
                 
-                # Count materials in topics
-                topics_ref = db.collection("courses").document(course_id).collection("topics").stream()
-                for topic in topics_ref:
-                    topic_id = topic.id
-                    
-                    # Materials directly under topic
-                    topic_materials = db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("materials").stream()
-                    total_materials += len(list(topic_materials))
-                    
-                    # Materials under subtopics
-                    subtopics_ref = db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("subtopics").stream()
-                    for subtopic in subtopics_ref:
-                        subtopic_id = subtopic.id
-                        subtopic_materials = db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("subtopics").document(subtopic_id).collection("materials").stream()
-                        total_materials += len(list(subtopic_materials))
+                # Maintained per-class material total (one read instead of a course tree walk)
+                total_materials = await get_class_material_total(class_name)
             
             if total_materials == 0:
                 return 0.0
                 
-            # Get student's completed materials
-            progress_ref = db.collection("users").document(student_id).collection("progress")
-            progress_docs = progress_ref.where("activity_type", "==", "reading").where("status", "==", "completed").stream()
-            completed_materials = len(list(progress_docs))
+            # Get student's completed materials from the progress aggregate
+            aggregate = aggregate or await get_aggregate(student_id)
+            completed_materials = aggregate.get("completed_readings", 0)
             
             completion_rate = (completed_materials / total_materials) * 100
             return min(completion_rate, 100.0)  # Cap at 100%
@@ -60,36 +37,24 @@ class AccurateProgressService:
             return 0.0
     
     @staticmethod
-    async def calculate_accurate_quiz_score(student_id: str) -> Dict[str, float]:
-        """Calculate accurate overall quiz performance."""
+    async def calculate_accurate_quiz_score(student_id: str, aggregate: dict = None) -> Dict[str, float]:
+        """Calculate accurate overall quiz performance from the student's progress aggregate."""
         try:
-            progress_ref = db.collection("users").document(student_id).collection("progress")
-            quiz_docs = progress_ref.where("activity_type", "==", "quiz").where("status", "==", "completed").stream()
+            aggregate = aggregate or await get_aggregate(student_id)
             
-            quiz_scores = []
-            total_score = 0
-            quiz_count = 0
-            
-            for doc in quiz_docs:
-                data = doc.to_dict()
-                score = data.get("score", 0)
-                if score is not None and score > 0:
-                    quiz_scores.append(score)
-                    total_score += score
-                    quiz_count += 1
+            total_score = aggregate.get("completed_quiz_score_sum", 0)
+            quiz_count = aggregate.get("completed_quiz_count", 0)
             
             if quiz_count == 0:
                 return {"average_score": 0.0, "total_score": 0, "quiz_count": 0, "max_score": 0.0}
             
             average_score = total_score / quiz_count
-            max_score = max(quiz_scores) if quiz_scores else 0.0
             
             return {
                 "average_score": round(average_score, 2),
                 "total_score": total_score,
                 "quiz_count": quiz_count,
-                "max_score": max_score,
-                "all_scores": quiz_scores
+                "max_score": aggregate.get("completed_quiz_max_score", 0.0)
             }
             
         except Exception as e:
@@ -101,7 +66,7 @@ class AccurateProgressService:
         """Get accurate analytics for entire class."""
         try:
             # Get all students in class
-            students_ref = db.collection("users").where("student_class", "==", class_name).stream()
+            students_ref = await fetch_all(async_db.collection("users").where("student_class", "==", class_name))
             students_data = []
             class_totals = {
                 "total_students": 0,
@@ -111,13 +76,20 @@ class AccurateProgressService:
                 "students_with_progress": 0
             }
             
+            # One batched read of the per-student progress aggregates, class total read once
+            outcome, total_materials = await asyncio.gather(
+                get_aggregates([student_doc.id for student_doc in students_ref]),
+                get_class_material_total(class_name)
+            )
+            
             for student_doc in students_ref:
                 student_data = student_doc.to_dict()
                 student_id = student_doc.id
                 
                 # Calculate accurate metrics for each student
-                completion_rate = await AccurateProgressService.calculate_accurate_completion_rate(student_id, class_name)
-                quiz_data = await AccurateProgressService.calculate_accurate_quiz_score(student_id)
+                aggregate = outcome.results.get(student_id, empty_aggregate())
+                completion_rate = await AccurateProgressService.calculate_accurate_completion_rate(student_id, class_name, aggregate, total_materials)
+                quiz_data = await AccurateProgressService.calculate_accurate_quiz_score(student_id, aggregate)
                 
                 student_summary = {
                     "student_id": student_id,
@@ -158,7 +130,8 @@ class AccurateProgressService:
                     "average_quiz_score": round(class_avg_quiz_score, 2),
                     "students_with_progress": class_totals["students_with_progress"]
                 },
-                "students_details": sorted(students_data, key=lambda x: x["completion_rate"], reverse=True)
+                "students_details": sorted(students_data, key=lambda x: x["completion_rate"], reverse=True),
+                "progress_report": outcome.report()
             }
             
         except Exception as e:
@@ -170,8 +143,8 @@ class AccurateProgressService:
         """Get comprehensive student progress with visual analytics."""
         try:
             # Verify student exists and get class
-            student_ref = db.collection("users").document(student_id)
-            student_doc = student_ref.get()
+            student_ref = async_db.collection("users").document(student_id)
+            student_doc = await student_ref.get()
             
             if not student_doc.exists:
                 return {"error": "Student not found"}
@@ -181,7 +154,7 @@ class AccurateProgressService:
             
             # Verify teacher access
             from services.teacher_service import TeacherService
-            teacher_classes = TeacherService.get_teacher_allotted_classes(teacher_id)
+            teacher_classes = await TeacherService.get_teacher_allotted_classes(teacher_id)
             if class_name not in teacher_classes:
                 return {"error": "Access denied"}
             
@@ -191,7 +164,7 @@ class AccurateProgressService:
             
             # Get detailed progress for visuals
             from services.progress_service import fetch_progress_from_firestore, get_progress_visuals
-            progress_data = fetch_progress_from_firestore(student_id)
+            progress_data = await fetch_progress_from_firestore(student_id)
             visual_data = get_progress_visuals(progress_data)
             
             return {
@@ -1,11 +1,11 @@
 import uuid
 from datetime import datetime
 from typing import Dict, List, Any
-from firebase_admin import firestore, auth
+from firebase_admin import auth
 from fastapi import HTTPException
 from collections import defaultdict
-
-db = firestore.client()
+from utils.async_firestore import async_db, fetch_all, count, run_blocking
+from utils.identity_cache import identity_cache
 
 class AdminTeacherService:
     
@@ -16,15 +16,14 @@ class AdminTeacherService:
             email = teacher_data["email"]
 
             # Check if teacher already exists using email as document ID
-            teacher_ref = db.collection("teacher_profiles").document(email)
-            teacher_doc = teacher_ref.get()
+            teacher_ref = async_db.collection("teacher_profiles").document(email)
+            teacher_doc = await teacher_ref.get()
 
             if teacher_doc.exists:
                 raise HTTPException(status_code=400, detail="Teacher already exists")
 
             # Check if email exists in users collection
-            existing_user = db.collection("users").where("email", "==", email).limit(1).stream()
-            existing_user_list = list(existing_user)
+            existing_user_list = await fetch_all(async_db.collection("users").where("email", "==", email).limit(1))
 
             teacher_id = str(uuid.uuid4())
 
@@ -56,11 +55,11 @@ class AdminTeacherService:
                 teacher_profile["user_id"] = user_id
 
                 # Update user role
-                db.collection("users").document(user_id).update({"role": "teacher"})
+                await async_db.collection("users").document(user_id).update({"role": "teacher"})
 
                 # Update Firebase Auth custom claims
                 try:
-                    auth.set_custom_user_claims(user_id, {"role": "teacher"})
+                    await run_blocking(auth.set_custom_user_claims, user_id, {"role": "teacher"})
                 except:
                     pass  # Continue if Firebase Auth update fails
 
@@ -75,10 +74,13 @@ class AdminTeacherService:
                     "created_at": datetime.utcnow(),
                     "is_teacher": True
                 }
-                db.collection("users").document(teacher_id).set(user_data)
+                await async_db.collection("users").document(teacher_id).set(user_data)
 
             # Create teacher profile with email as document ID
-            db.collection("teacher_profiles").document(email).set(teacher_profile)
+            await async_db.collection("teacher_profiles").document(email).set(teacher_profile)
+
+            # Drop the cached role so the new teacher is recognized right away
+            identity_cache.invalidate(user_id=teacher_profile["user_id"], email=email)
 
             return {
                 "message": "Teacher added successfully",
@@ -97,8 +99,8 @@ class AdminTeacherService:
         """Remove a teacher from the system."""
         try:
             # Find teacher by email (email is document ID)
-            teacher_ref = db.collection("teacher_profiles").document(email)
-            teacher_doc = teacher_ref.get()
+            teacher_ref = async_db.collection("teacher_profiles").document(email)
+            teacher_doc = await teacher_ref.get()
 
             if not teacher_doc.exists:
                 raise HTTPException(status_code=404, detail="Teacher not found")
@@ -107,20 +109,22 @@ class AdminTeacherService:
             teacher_id = teacher_data["user_id"]
 
             # Remove teacher profile (no archiving)
-            teacher_ref.delete()
+            await teacher_ref.delete()
 
             # Update user role if user exists
-            user_ref = db.collection("users").document(teacher_id)
-            user_doc = user_ref.get()
+            user_ref = async_db.collection("users").document(teacher_id)
+            user_doc = await user_ref.get()
             if user_doc.exists:
-                user_ref.update({"role": "student"})  # Revert to student
+                await user_ref.update({"role": "student"})  # Revert to student
 
                 # Update Firebase Auth custom claims
                 try:
-                    auth.set_custom_user_claims(teacher_id, {"role": "student"})
+                    await run_blocking(auth.set_custom_user_claims, teacher_id, {"role": "student"})
                 except:
                     pass
 
+            identity_cache.invalidate(user_id=teacher_id, email=email)
+
             return {
                 "message": "Teacher removed successfully",
                 "email": email
@@ -138,8 +142,8 @@ class AdminTeacherService:
             email = update_data["email"]
 
             # Find teacher by email (email is document ID)
-            teacher_ref = db.collection("teacher_profiles").document(email)
-            teacher_doc = teacher_ref.get()
+            teacher_ref = async_db.collection("teacher_profiles").document(email)
+            teacher_doc = await teacher_ref.get()
 
             if not teacher_doc.exists:
                 raise HTTPException(status_code=404, detail="Teacher not found")
@@ -161,13 +165,15 @@ class AdminTeacherService:
             update_fields["updated_at"] = datetime.utcnow()
 
             # Update teacher profile
-            teacher_ref.update(update_fields)
+            await teacher_ref.update(update_fields)
 
             # Update user collection if name changed
             if update_data.get("name"):
-                user_ref = db.collection("users").document(teacher_id)
-                if user_ref.get().exists:
-                    user_ref.update({"name": update_data["name"]})
+                user_ref = async_db.collection("users").document(teacher_id)
+                if (await user_ref.get()).exists:
+                    await user_ref.update({"name": update_data["name"]})
+
+            identity_cache.invalidate(user_id=teacher_id, email=email)
 
             return {
                 "message": "Teacher updated successfully",
@@ -184,7 +190,7 @@ class AdminTeacherService:
     async def get_all_teachers_comprehensive() -> Dict[str, Any]:
         """Get comprehensive data of all teachers for admin dashboard."""
         try:
-            teachers_ref = db.collection("teacher_profiles").stream()
+            teachers_ref = await fetch_all(async_db.collection("teacher_profiles"))
             teachers_data = []
             overall_stats = {
                 "total_teachers": 0,
@@ -205,16 +211,14 @@ class AdminTeacherService:
                 # Count students in allotted classes
                 total_students = 0
                 for class_name in teacher_data.get("allotted_classes", []):
-                    students_in_class = list(db.collection("users").where("student_class", "==", class_name).stream())
-                    total_students += len(students_in_class)
+                    total_students += await count(async_db.collection("users").where("student_class", "==", class_name))
                 
                 # Get live classes data
-                live_classes = list(db.collection("live_classes").where("teacher_id", "==", teacher_id).stream())
+                live_classes = await fetch_all(async_db.collection("live_classes").where("teacher_id", "==", teacher_id))
                 classes_conducted = len([cls for cls in live_classes if cls.to_dict().get("status") == "completed"])
                 
                 # Get teacher courses created
-                teacher_courses = list(db.collection("teacher_courses").where("teacher_id", "==", teacher_id).stream())
-                content_created = len(teacher_courses)
+                content_created = await count(async_db.collection("teacher_courses").where("teacher_id", "==", teacher_id))
                 
                 teacher_summary = {
                     "teacher_id": teacher_id,
@@ -287,8 +291,8 @@ class AdminTeacherService:
         """Get detailed statistics for a specific teacher."""
         try:
             # Find teacher by email (email is document ID)
-            teacher_ref = db.collection("teacher_profiles").document(teacher_email)
-            teacher_doc = teacher_ref.get()
+            teacher_ref = async_db.collection("teacher_profiles").document(teacher_email)
+            teacher_doc = await teacher_ref.get()
 
             if not teacher_doc.exists:
                 raise HTTPException(status_code=404, detail="Teacher not found")
@@ -316,7 +320,7 @@ class AdminTeacherService:
             # Get basic class statistics without complex analytics
             total_students = 0
             for class_name in teacher_data.get("allotted_classes", []):
-                students_count = len(list(db.collection("users").where("student_class", "==", class_name).stream()))
+                students_count = await count(async_db.collection("users").where("student_class", "==", class_name))
                 total_students += students_count
 
                 detailed_stats["class_analytics"][class_name] = {
@@ -344,7 +348,7 @@ class AdminTeacherService:
     async def get_teachers_analytics_overview() -> Dict[str, Any]:
         """Get analytics overview for dashboard graphs."""
         try:
-            teachers_ref = list(db.collection("teacher_profiles").stream())
+            teachers_ref = await fetch_all(async_db.collection("teacher_profiles"))
             
             analytics = {
                 "teacher_performance_distribution": [],
@@ -366,7 +370,7 @@ class AdminTeacherService:
                 
                 # Count students synchronously
                 for class_name in allotted_classes:
-                    students_count = len(list(db.collection("users").where("student_class", "==", class_name).stream()))
+                    students_count = await count(async_db.collection("users").where("student_class", "==", class_name))
                     total_students += students_count
                 
                 # Use basic metrics instead of complex calculations
@@ -0,0 +1,111 @@
+import os
+import hashlib
+import unicodedata
+from collections import defaultdict
+from typing import Any, Optional
+from cachetools import TTLCache
+from fastapi import UploadFile
+
+# AI response cache settings (overridable via environment)
+AI_RESPONSE_CACHE_MAXSIZE = int(os.getenv("AI_RESPONSE_CACHE_MAXSIZE", "2000"))
+AI_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("AI_RESPONSE_CACHE_TTL_SECONDS", "3600"))
+# Comma-separated endpoints that never use the cache (e.g. "process_video,process_audio")
+AI_RESPONSE_CACHE_DISABLED_ENDPOINTS = {
+    endpoint.strip() for endpoint in os.getenv("AI_RESPONSE_CACHE_DISABLED_ENDPOINTS", "").split(",") if endpoint.strip()
+}
+
+def normalize_prompt(prompt: Optional[str]) -> str:
+    """Normalizes a prompt for cache lookups (Unicode form, case and whitespace)."""
+    if not prompt:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", prompt).casefold().split())
+
+async def hash_upload(file: UploadFile, chunk_size: int = 1024 * 1024) -> str:
+    """Returns the sha256 of an uploaded file, read in chunks, and rewinds it for the agent."""
+    digest = hashlib.sha256()
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+class AIResponseCache:
+    """
+    TTL + size bounded cache of final AI tutor responses.
+
+    Keys combine the endpoint, the normalized prompt, the content hash of any uploaded
+    image/video/audio/document and the target language, so identical questions about the
+    same worksheet are answered without calling Gemini (or LibreTranslate) again.
+    """
+
+    def __init__(self, maxsize: int = AI_RESPONSE_CACHE_MAXSIZE, ttl: float = AI_RESPONSE_CACHE_TTL_SECONDS,
+                 disabled_endpoints: set = None):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disabled_endpoints = set(AI_RESPONSE_CACHE_DISABLED_ENDPOINTS if disabled_endpoints is None else disabled_endpoints)
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def enabled(self, endpoint: str) -> bool:
+        return endpoint not in self.disabled_endpoints
+
+    @staticmethod
+    def make_key(endpoint: str, prompt: Optional[str], attachment_hash: str = None, target_language: str = "en", **options) -> str:
+        """Builds the cache key of a tutor request (`options` holds extra request parameters)."""
+        parts = [endpoint, normalize_prompt(prompt), attachment_hash or "", (target_language or "en").lower()]
+        parts.extend(f"{name}={options[name]}" for name in sorted(options))
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, endpoint: str, key: str) -> Optional[Any]:
+        """Returns a cached response (None on miss or when the endpoint opted out)."""
+        if not self.enabled(endpoint):
+            return None
+        response = self._entries.get(key)
+        if response is None:
+            self.misses[endpoint] += 1
+        else:
+            self.hits[endpoint] += 1
+        return response
+
+    @staticmethod
+    def _is_error(response: Any) -> bool:
+        if isinstance(response, dict):
+            return "error" in response
+        if isinstance(response, str):
+            return not response.strip() or response.startswith(("Error", "Translation service error"))
+        return response is None
+
+    def set(self, endpoint: str, key: str, response: Any, source: Any = None):
+        """
+        Caches a successful response. Errors are never cached; `source` is the untranslated
+        Gemini output, checked too since a translated error message no longer looks like one.
+        """
+        if not self.enabled(endpoint) or self._is_error(response):
+            return
+        if source is not None and self._is_error(source):
+            return
+        self._entries[key] = response
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache counters, overall and per endpoint."""
+        hits = sum(self.hits.values())
+        total = hits + sum(self.misses.values())
+        return {
+            "entries": len(self._entries),
+            "maxsize": self._entries.maxsize,
+            "ttl_seconds": self._entries.ttl,
+            "disabled_endpoints": sorted(self.disabled_endpoints),
+            "hits": hits,
+            "misses": total - hits,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "endpoints": {
+                endpoint: {"hits": self.hits[endpoint], "misses": self.misses[endpoint]}
+                for endpoint in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+ai_response_cache = AIResponseCache()
@@ -1,18 +1,128 @@
 import os
 import json
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Tuple
 import google.generativeai as genai
 from services.quiz_service import QuizService
 from services.course_service import CourseService
 from config.settings import GOOGLE_GEMINI_API_KEY
 from services.progress_service import fetch_student_performance
-from services.firebase_service import FirebaseService
+from services.gemini_service import generate_content
+from services.id_mapping_cache import id_mapping_cache
+from services.recommendation_prompt import flatten_progress, build_progress_section
+from services.progress_aggregates import aggregate_ref, get_aggregate
+from utils.async_firestore import async_db, fetch_all, get_many
 
 genai.configure(api_key=GOOGLE_GEMINI_API_KEY)
 
-# ✅ Initialize Firebase service
-firebase_service = FirebaseService()
+# 🔹 users/{user_id}/recommendations/{language} stores the last generated recommendations
+RECOMMENDATIONS_COLLECTION = "recommendations"
+# Stored recommendations are regenerated at most once per window, even if progress keeps arriving
+RECOMMENDATIONS_MIN_REFRESH_SECONDS = float(os.getenv("RECOMMENDATIONS_MIN_REFRESH_SECONDS", "300"))
+# Regenerate stored recommendations in the background after new progress is logged
+RECOMMENDATIONS_REFRESH_ON_PROGRESS = os.getenv("RECOMMENDATIONS_REFRESH_ON_PROGRESS", "false").lower() == "true"
+
+# In-flight generations, so concurrent requests for the same (user, language) share one Gemini call
+_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+_scheduled_refreshes = set()
+# Strong references to background refresh tasks (the event loop only keeps weak ones)
+_refresh_tasks = set()
+
+def recommendations_ref(user_id: str, target_language: str):
+    """Returns the reference of a user's stored recommendations in one language."""
+    return async_db.collection("users").document(user_id).collection(RECOMMENDATIONS_COLLECTION).document(target_language)
+
+def progress_watermark(aggregate: dict) -> str:
+    """Summarizes the progress aggregate; it changes whenever progress is logged or updated."""
+    return "|".join(str(aggregate.get(field)) for field in (
+        "total_activities", "completed_activities", "quiz_attempts", "quiz_score_sum", "last_activity_at"
+    ))
+
+def _age_seconds(stored: dict) -> float:
+    generated_at = stored.get("generated_at")
+    if generated_at is None:
+        return float("inf")
+    if generated_at.tzinfo is None:
+        generated_at = generated_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - generated_at).total_seconds()
+
+async def get_recommendations(user_id: str, target_language: str = "en", force: bool = False):
+    """
+    Returns the student's recommendations, served from the stored copy while it matches the
+    current progress watermark (aggregate + stored copy are read in one round trip).
 
-async def get_recommendations(user_id: str, target_language: str = "en"):
+    Recommendations are regenerated when progress changed (or the aggregate is missing or
+    being rebuilt, so the watermark cannot be checked), but at most once every
+    RECOMMENDATIONS_MIN_REFRESH_SECONDS; until then the previous ones are served. `force`
+    skips the watermark check only: forced refreshes are debounced too, to protect the quota.
+    """
+    aggregate_doc, stored_doc = await get_many([aggregate_ref(user_id), recommendations_ref(user_id, target_language)])
+    stored = stored_doc.to_dict() if stored_doc is not None and stored_doc.exists else None
+    aggregate = aggregate_doc.to_dict() if aggregate_doc is not None and aggregate_doc.exists else None
+
+    if stored:
+        if _age_seconds(stored) < RECOMMENDATIONS_MIN_REFRESH_SECONDS:
+            return {"recommendations": stored["recommendations"]}
+        if not force and aggregate and not aggregate.get("needs_rebuild") and stored.get("watermark") == progress_watermark(aggregate):
+            return {"recommendations": stored["recommendations"]}
+
+    return await _regenerate(user_id, target_language)
+
+async def _regenerate(user_id: str, target_language: str):
+    """Generates and stores recommendations, sharing the work with concurrent callers."""
+    key = (user_id, target_language)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_generate_and_store(user_id, target_language))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+async def _generate_and_store(user_id: str, target_language: str):
+    # Watermark taken before reading progress: anything logged meanwhile triggers the next refresh
+    aggregate = await get_aggregate(user_id)
+    result = await generate_recommendations(user_id, target_language)
+
+    if "recommendations" in result:
+        await recommendations_ref(user_id, target_language).set({
+            "recommendations": result["recommendations"],
+            "watermark": progress_watermark(aggregate),
+            "target_language": target_language,
+            "generated_at": datetime.utcnow(),
+        })
+    return result
+
+async def refresh_recommendations(user_id: str):
+    """
+    Background refresh after new progress: regenerates every stored language once the
+    debounce window of its last generation has passed (one pending refresh per user).
+    """
+    if user_id in _scheduled_refreshes:
+        return
+    _scheduled_refreshes.add(user_id)
+    try:
+        stored_docs = await fetch_all(async_db.collection("users").document(user_id).collection(RECOMMENDATIONS_COLLECTION))
+        if not stored_docs:
+            return
+
+        wait = max(0.0, max(RECOMMENDATIONS_MIN_REFRESH_SECONDS - _age_seconds(doc.to_dict()) for doc in stored_docs))
+        await asyncio.sleep(wait)
+        _scheduled_refreshes.discard(user_id)
+        await asyncio.gather(*(get_recommendations(user_id, doc.id) for doc in stored_docs))
+    except Exception as e:
+        print(f"⚠️ Background recommendation refresh failed for {user_id}: {e}")
+    finally:
+        _scheduled_refreshes.discard(user_id)
+
+def schedule_recommendation_refresh(user_id: str):
+    """Schedules `refresh_recommendations` after a progress write (if enabled)."""
+    if RECOMMENDATIONS_REFRESH_ON_PROGRESS:
+        task = asyncio.create_task(refresh_recommendations(user_id))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+
+async def generate_recommendations(user_id: str, target_language: str = "en"):
     """
     Fetch student progress, analyze it using Gemini AI, and return personalized recommendations.
     Automatically translates the response into the specified target language.
@@ -28,35 +138,25 @@ async def get_recommendations(user_id: str, target_language: str = "en"):
             except json.JSONDecodeError:
                 raise ValueError(f"Invalid JSON format in progress data: {progress_data}")
 
-        # ✅ Ensure progress_data is a list
-        if isinstance(progress_data, dict):
-            progress_data = [progress_data]
-
-        if not isinstance(progress_data, list):
+        if not isinstance(progress_data, (list, dict)):
             raise ValueError(f"Expected a list, but got: {type(progress_data)}")
 
-        # ✅ Extract unique IDs from progress data
-        unique_ids = extract_unique_ids(progress_data)
+        # ✅ Extract unique IDs from the raw progress records
+        unique_ids = extract_unique_ids(flatten_progress(progress_data))
         
         # ✅ Fetch only the required mappings from Firebase
         data_mappings = await fetch_mappings_from_firebase(unique_ids)
-        
-        # ✅ Enrich progress data with actual names
-        enriched_progress_data = enrich_progress_data(progress_data, data_mappings)
+
+        # ✅ Compact the history into per-quiz/per-topic statistics within the token budget
+        progress_section = build_progress_section(progress_data, data_mappings)
 
         # ✅ Construct a focused prompt for Gemini AI with only relevant data
         prompt = f"""
         You are an advanced AI tutor analyzing student learning progress.
-        You have access to the following relevant course data:
-
-        - Courses: {json.dumps(data_mappings["courses"], indent=2, ensure_ascii=False)}
-        - Topics: {json.dumps(data_mappings["topics"], indent=2, ensure_ascii=False)}
-        - Subtopics: {json.dumps(data_mappings["subtopics"], indent=2, ensure_ascii=False)}
-        - Quizzes: {json.dumps(data_mappings["quizzes"], indent=2, ensure_ascii=False)}
-        - Materials: {json.dumps(data_mappings["materials"], indent=2, ensure_ascii=False)}
+        Scores are out of 100; trends compare the student's older and newer attempts.
 
-        The student's progress data is as follows:
-        {json.dumps(enriched_progress_data, indent=2, ensure_ascii=False)}
+        The student's progress, summarized per quiz and topic:
+{progress_section}
 
         Based on the student's performance and learning history, provide personalized recommendations.
         Include:
@@ -71,8 +171,7 @@ async def get_recommendations(user_id: str, target_language: str = "en"):
         """
 
         # ✅ Generate AI recommendations
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
+        response = await generate_content(prompt)
 
         # ✅ Translate the recommendations into the target language
         translated_text = await CourseService.translate_text(response.text, target_language)
@@ -124,7 +223,8 @@ def extract_unique_ids(progress_data):
 
 async def fetch_mappings_from_firebase(unique_ids):
     """
-    Fetch only the required ID-to-name mappings from Firebase.
+    Fetch only the required ID-to-name mappings, served from the in-memory ID mapping
+    cache; the misses of all collections are fetched together in one round trip.
     """
     data_mappings = {
         "courses": {},
@@ -135,69 +235,16 @@ async def fetch_mappings_from_firebase(unique_ids):
     }
     
     try:
-        # ✅ Fetch courses
-        if unique_ids["course_ids"]:
-            courses = await firebase_service.get_courses_by_ids(unique_ids["course_ids"])
-            data_mappings["courses"] = {course["id"]: course.get("name", "Unknown Course") for course in courses}
-        
-        # ✅ Fetch topics
-        if unique_ids["topic_ids"]:
-            topics = await firebase_service.get_topics_by_ids(unique_ids["topic_ids"])
-            data_mappings["topics"] = {topic["id"]: topic.get("name", "Unknown Topic") for topic in topics}
-        
-        # ✅ Fetch subtopics
-        if unique_ids["subtopic_ids"]:
-            subtopics = await firebase_service.get_subtopics_by_ids(unique_ids["subtopic_ids"])
-            data_mappings["subtopics"] = {subtopic["id"]: subtopic.get("name", "Unknown Subtopic") for subtopic in subtopics}
-        
-        # ✅ Fetch quizzes
-        if unique_ids["quiz_ids"]:
-            quizzes = await firebase_service.get_quizzes_by_ids(unique_ids["quiz_ids"])
-            data_mappings["quizzes"] = {quiz["id"]: quiz.get("title", "Unknown Quiz") for quiz in quizzes}
-        
-        # ✅ Fetch materials
-        if unique_ids["material_ids"]:
-            materials = await firebase_service.get_materials_by_ids(unique_ids["material_ids"])
-            data_mappings["materials"] = {material["id"]: material.get("title", "Unknown Material") for material in materials}
-    
+        data_mappings.update(await id_mapping_cache.resolve({
+            "courses": unique_ids["course_ids"],
+            "topics": unique_ids["topic_ids"],
+            "subtopics": unique_ids["subtopic_ids"],
+            "quizzes": unique_ids["quiz_ids"],
+            "materials": unique_ids["material_ids"],
+        }))
     except Exception as e:
         print(f"Error fetching mappings from Firebase: {e}")
         # Return empty mappings if there's an error
         pass
     
     return data_mappings
-
-
-def enrich_progress_data(progress_data, data_mappings):
-    """
-    Enrich progress data with actual names instead of IDs.
-    """
-    enriched_data = []
-    
-    for record in progress_data:
-        if isinstance(record, dict):
-            enriched_record = record.copy()
-            
-            # ✅ Replace IDs with actual titles/content
-            if "quiz_id" in record and record["quiz_id"] in data_mappings["quizzes"]:
-                enriched_record["quiz_title"] = data_mappings["quizzes"][record["quiz_id"]]
-            
-            if "course_id" in record and record["course_id"] in data_mappings["courses"]:
-                enriched_record["course_title"] = data_mappings["courses"][record["course_id"]]
-            
-            if "topic_id" in record and record["topic_id"] in data_mappings["topics"]:
-                enriched_record["topic_title"] = data_mappings["topics"][record["topic_id"]]
-            
-            if "subtopic_id" in record and record["subtopic_id"] in data_mappings["subtopics"]:
-                enriched_record["subtopic_title"] = data_mappings["subtopics"][record["subtopic_id"]]
-            
-            if "material_id" in record and record["material_id"] in data_mappings["materials"]:
-                enriched_record["material_title"] = data_mappings["materials"][record["material_id"]]
-            
-            enriched_data.append(enriched_record)
-        else:
-            print(f"Warning: Unexpected progress data format: {record}")
-            # Still add the record even if it's not a dict
-            enriched_data.append(record)
-    
-    return enriched_data
@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from utils.async_firestore import run_blocking
+
+# Artifact cache settings (overridable via environment)
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", "artifact_cache")
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Artifact kinds
+TRANSCRIPT = "transcript"
+TRANSCRIPT_EN = "transcript_en"
+DOCUMENT_TEXT = "document_text"
+DOCUMENT_TEXT_EN = "document_text_en"
+
+def hash_bytes(data: bytes) -> str:
+    """Returns the sha256 of an upload, used as its content address."""
+    return hashlib.sha256(data).hexdigest()
+
+class ArtifactCache:
+    """
+    Content-addressed on-disk cache of upload artifacts: transcripts, extracted document
+    text and their English translations, keyed by kind and sha256 of the upload bytes.
+
+    Artifacts are JSON files under ARTIFACT_CACHE_DIR/{kind}/; the store is bounded by
+    ARTIFACT_CACHE_MAX_BYTES and evicts the least recently used files first (the index is
+    rebuilt from file modification times on startup). Only successful results are stored.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_CACHE_DIR, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._enabled = bool(directory) and max_bytes > 0
+        self._index: Optional[OrderedDict] = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.directory, kind, f"{key}.json")
+
+    def _load_index(self) -> OrderedDict:
+        """Scans the store on first use, oldest files first."""
+        if self._index is None:
+            files = []
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    if name.endswith(".json"):
+                        path = os.path.join(root, name)
+                        stat = os.stat(path)
+                        files.append((stat.st_mtime, path, stat.st_size))
+            self._index = OrderedDict((path, size) for _, path, size in sorted(files))
+            self._total_bytes = sum(self._index.values())
+        return self._index
+
+    def _read(self, kind: str, key: str) -> Optional[Any]:
+        path = self._path(kind, key)
+        with self._lock:
+            index = self._load_index()
+            if path not in index:
+                return None
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    value = json.load(file)
+            except (OSError, ValueError):
+                self._total_bytes -= index.pop(path)
+                return None
+            index.move_to_end(path)
+            os.utime(path)
+            return value
+
+    def _write(self, kind: str, key: str, value: Any):
+        path = self._path(kind, key)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            index = self._load_index()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+
+            self._total_bytes += len(data) - index.pop(path, 0)
+            index[path] = len(data)
+            while self._total_bytes > self.max_bytes and index:
+                evicted, size = index.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+
+    async def get(self, kind: str, key: str) -> Optional[Any]:
+        """Returns a cached artifact (None on miss or when the cache is disabled)."""
+        if not self._enabled:
+            return None
+        try:
+            value = await run_blocking(self._read, kind, key)
+        except OSError as e:
+            print(f"⚠️ Artifact cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, kind: str, key: str, value: Any):
+        """Stores an artifact (any JSON-serializable value)."""
+        if not self._enabled or value is None:
+            return
+        try:
+            await run_blocking(self._write, kind, key, value)
+        except OSError as e:
+            print(f"⚠️ Artifact cache write failed: {e}")
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        total = self.hits + self.misses
+        return {
+            "enabled": self._enabled,
+            "entries": len(self._index) if self._index is not None else None,
+            "bytes": self._total_bytes if self._index is not None else None,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+artifact_cache = ArtifactCache()
@@ -5,7 +5,7 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from fastapi import HTTPException
-from firebase_admin import auth, firestore
+from firebase_admin import auth
 from models.user_model import UserCreate, UserLogin, TokenResponse
 from utils.auth import (
     create_access_token,
@@ -16,10 +16,10 @@ from utils.auth import (
     hash_password,
     verify_password,
     store_refresh_token,
+    forget_firebase_revocation,
     ACCESS_TOKEN_EXPIRY
 )
-
-db = firestore.client()
+from utils.async_firestore import async_db, fetch_all, run_blocking
 
 # Email configuration - replace with your SMTP settings
 SMTP_SERVER = "smtp.gmail.com"
@@ -107,7 +107,7 @@ async def send_otp(email: str):
         
         # Check if email already exists in Firebase Auth
         try:
-            auth.get_user_by_email(email)
+            await run_blocking(auth.get_user_by_email, email)
             raise HTTPException(status_code=400, detail="Email already exists")
         except auth.UserNotFoundError:
             pass  # Email doesn't exist, continue
@@ -150,7 +150,7 @@ async def send_reset_otp(email: str):
             )
         
         # Check if email exists in our Firestore database
-        user_docs = list(db.collection("users").where("email", "==", email).limit(1).stream())
+        user_docs = await fetch_all(async_db.collection("users").where("email", "==", email).limit(1))
         if not user_docs:
             raise HTTPException(status_code=404, detail="Email not found in our records")
         
@@ -201,7 +201,7 @@ async def reset_password(email: str, otp: str, new_password: str):
         
         # OTP verified, proceed with password reset
         # Get user from Firestore
-        user_docs = list(db.collection("users").where("email", "==", email).limit(1).stream())
+        user_docs = await fetch_all(async_db.collection("users").where("email", "==", email).limit(1))
         if not user_docs:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -213,11 +213,12 @@ async def reset_password(email: str, otp: str, new_password: str):
         hashed_new_password = hash_password(new_password)
         
         # Update password in Firestore
-        db.collection("users").document(user_id).update({"password": hashed_new_password})
+        await async_db.collection("users").document(user_id).update({"password": hashed_new_password})
         
         # Update password in Firebase Auth
         try:
-            auth.update_user(user_id, password=new_password)
+            await run_blocking(lambda: auth.update_user(user_id, password=new_password))
+            forget_firebase_revocation(user_id)
         except Exception as e:
             print(f"Warning: Failed to update Firebase Auth password: {e}")
             # Continue anyway since Firestore is updated
@@ -251,7 +252,7 @@ async def register_user(user: UserCreate, otp: str):
 
         # OTP is valid - now check if user already exists
         try:
-            existing_user = auth.get_user_by_email(user.email)
+            existing_user = await run_blocking(auth.get_user_by_email, user.email)
             # If we get here, user already exists
             raise HTTPException(status_code=400, detail="Email already exists")
         except auth.UserNotFoundError:
@@ -263,7 +264,7 @@ async def register_user(user: UserCreate, otp: str):
 
         # Create user in Firebase Auth
         try:
-            user_record = auth.create_user(email=user.email, password=user.password)
+            user_record = await run_blocking(lambda: auth.create_user(email=user.email, password=user.password))
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to create user: {str(e)}")
 
@@ -282,7 +283,7 @@ async def register_user(user: UserCreate, otp: str):
         }
 
         # Store in Firestore
-        db.collection("users").document(user_record.uid).set(user_data)
+        await async_db.collection("users").document(user_record.uid).set(user_data)
 
         # Clean up OTP after successful registration
         if user.email in otp_storage:
@@ -334,7 +335,7 @@ async def register_user(user: UserCreate, otp: str):
 async def login_user(user: UserLogin):
     """Verifies user login credentials and returns tokens."""
     try:
-        user_docs = list(db.collection("users").where("email", "==", user.email).limit(1).stream())
+        user_docs = await fetch_all(async_db.collection("users").where("email", "==", user.email).limit(1))
 
         if not user_docs:
             raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -392,7 +393,7 @@ async def fetch_teacher_emails():
     """Fetch all teacher email addresses for verification."""
     try:
         # Get teacher emails from teacher_profiles collection
-        teacher_profiles = db.collection("teacher_profiles").stream()
+        teacher_profiles = await fetch_all(async_db.collection("teacher_profiles"))
         emails = []
         
         for teacher in teacher_profiles:
@@ -401,7 +402,7 @@ async def fetch_teacher_emails():
                 emails.append(teacher_data["email"])
         
         # Also check users collection for teachers
-        teachers_in_users = db.collection("users").where("role", "==", "teacher").stream()
+        teachers_in_users = await fetch_all(async_db.collection("users").where("role", "==", "teacher"))
         for teacher in teachers_in_users:
             teacher_data = teacher.to_dict()
             if teacher_data.get("email") and teacher_data["email"] not in emails:
@@ -414,8 +415,8 @@ async def fetch_teacher_emails():
 async def fetch_admin_ids():
     """Fetch all document IDs from the 'admins' collection in Firestore."""
     try:
-        admins_ref = db.collection("admins")
-        docs = admins_ref.stream()  # Ensure this is correct
+        admins_ref = async_db.collection("admins")
+        docs = await fetch_all(admins_ref)
 
         admin_ids = [doc.id for doc in docs]
         return admin_ids
@@ -434,7 +435,7 @@ async def google_signin_or_signup(user_data: dict):
             raise HTTPException(status_code=400, detail="Email is required")
 
         # Check if user exists
-        user_docs = list(db.collection("users").where("email", "==", email).limit(1).stream())
+        user_docs = await fetch_all(async_db.collection("users").where("email", "==", email).limit(1))
 
         if user_docs:
             # Existing user
@@ -483,7 +484,7 @@ async def google_signin_or_signup(user_data: dict):
             password = ''.join(secrets.choice(alphabet) for i in range(16))
             hashed_password = hash_password(password)
 
-            user_record = auth.create_user(email=email, password=password)
+            user_record = await run_blocking(lambda: auth.create_user(email=email, password=password))
             role = await determine_user_role(email, user_record.uid)
 
             new_user_data = {
@@ -496,7 +497,7 @@ async def google_signin_or_signup(user_data: dict):
                 "role": role
             }
 
-            db.collection("users").document(user_record.uid).set(new_user_data)
+            await async_db.collection("users").document(user_record.uid).set(new_user_data)
 
             access_token = create_access_token({
                 "id": user_record.uid,
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+from google.cloud.firestore import Increment, async_transactional
+from utils.async_firestore import async_db, course_ref, topic_ref, content_collection, fetch_all, count
+
+# 🔹 class_stats/{class_name} keeps maintained per-class counters
+CLASS_STATS_COLLECTION = "class_stats"
+COURSE_MATERIALS_FIELD = "course_materials"
+# Set by full counts only: a document created by increments alone holds no total yet
+COUNTED_AT_FIELD = "counted_at"
+
+def class_stats_ref(class_name: str):
+    """Returns the reference of a class's stats document."""
+    return async_db.collection(CLASS_STATS_COLLECTION).document(class_name)
+
+def increment_class_materials(batch, class_name: str, amount: int = 1):
+    """
+    Adds the bump of a class's course material total to the batch that writes the material.
+
+    Committing both together keeps the counter exact against a concurrent (transactional)
+    recount: the material is either counted by it or incremented on top of its result. The
+    merge-set creates missing stats documents; they carry no `counted_at` until a full count.
+    """
+    if not class_name:
+        return
+    batch.set(
+        class_stats_ref(class_name),
+        {COURSE_MATERIALS_FIELD: Increment(amount), "updated_at": datetime.utcnow()},
+        merge=True
+    )
+
+async def _count_topic_materials(course_id: str, topic_id: str, transaction=None) -> int:
+    """Counts the materials of a topic and of all its subtopics with aggregation queries."""
+    subtopics = await fetch_all(topic_ref(course_id, topic_id).collection("subtopics"), transaction)
+    counts = await asyncio.gather(
+        count(content_collection(course_id, topic_id, "materials"), transaction),
+        *(count(content_collection(course_id, topic_id, "materials", subtopic.id), transaction) for subtopic in subtopics)
+    )
+    return sum(counts)
+
+async def count_course_materials(class_name: str, transaction=None) -> int:
+    """Counts every course material of a class (server-side `count()`, no material documents read)."""
+    courses = await fetch_all(async_db.collection("courses").where("class_name", "==", class_name), transaction)
+    topic_keys = []
+    for topics in await asyncio.gather(*(fetch_all(course_ref(course.id).collection("topics"), transaction) for course in courses)):
+        topic_keys.extend((topic.reference.parent.parent.id, topic.id) for topic in topics)
+
+    counts = await asyncio.gather(*(_count_topic_materials(course_id, topic_id, transaction) for course_id, topic_id in topic_keys))
+    return sum(counts)
+
+async def recount_class_materials(class_name: str) -> int:
+    """
+    Recomputes and stores a class's course material total.
+
+    The stats document and the counts are read in the same transaction as the write, so a
+    material committed meanwhile (with its increment, see `increment_class_materials`) is
+    either counted here or incremented on top of the stored total, never lost.
+    """
+    stats_ref = class_stats_ref(class_name)
+
+    @async_transactional
+    async def _recount(transaction) -> int:
+        await stats_ref.get(transaction=transaction)
+        total = await count_course_materials(class_name, transaction)
+        now = datetime.utcnow()
+        transaction.set(stats_ref, {COURSE_MATERIALS_FIELD: total, COUNTED_AT_FIELD: now, "updated_at": now}, merge=True)
+        return total
+
+    total = await _recount(async_db.transaction())
+    print(f"📊 Counted {total} course materials for class {class_name}")
+    return total
+
+async def get_class_material_total(class_name: str) -> int:
+    """Returns the maintained course material total of a class (one read), counting it on first use."""
+    snapshot = await class_stats_ref(class_name).get()
+    if snapshot.exists:
+        data = snapshot.to_dict()
+        total = data.get(COURSE_MATERIALS_FIELD)
+        if total is not None and data.get(COUNTED_AT_FIELD) is not None:
+            return total
+    return await recount_class_materials(class_name)
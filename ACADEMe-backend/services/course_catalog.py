@@ -0,0 +1,172 @@
+import os
+import time
+import threading
+from typing import Dict, List, Optional
+from cachetools import LRUCache
+from fastapi import HTTPException
+from firebase_admin import firestore
+from models.course_model import CourseResponse
+from utils.async_firestore import async_db, fetch_dicts
+
+# Course catalog settings (overridable via environment)
+# Upper bound of the cached (class_name, language) course lists
+COURSE_CATALOG_MAX_VIEWS = int(os.getenv("COURSE_CATALOG_MAX_VIEWS", "256"))
+# Minimum delay between two restarts of a listener that stopped
+COURSE_CATALOG_RESTART_SECONDS = float(os.getenv("COURSE_CATALOG_RESTART_SECONDS", "60"))
+
+def _to_course_response(course_data: dict, target_language: str) -> CourseResponse:
+    """Builds the `CourseResponse` of a raw course document in the requested language."""
+    if "languages" not in course_data:
+        raise HTTPException(status_code=500, detail=f"Missing 'languages' field in course {course_data.get('id')}")
+    languages = course_data["languages"]
+
+    # 🏷️ Fetch content in requested language, fallback to English, and ensure both fields exist
+    lang_data = languages.get(target_language, {}) or languages.get("en", {})
+
+    return CourseResponse(
+        id=course_data["id"],
+        title=lang_data.get("title", languages.get(target_language, {}).get("title", "Untitled Course")),
+        class_name=course_data["class_name"],
+        description=lang_data.get("description", languages.get("en", {}).get("description", "No Description")),
+        created_at=course_data["created_at"].isoformat(),  # ✅ Convert Firestore timestamp
+        updated_at=course_data["updated_at"].isoformat(),  # ✅ Convert Firestore timestamp
+    )
+
+def _build_view(docs: List[dict], class_name: Optional[str], target_language: str) -> List[CourseResponse]:
+    """Builds the (sorted) course list of one class in one language."""
+    courses = [
+        _to_course_response(course_data, target_language)
+        for course_data in docs
+        if class_name is None or course_data.get("class_name") == class_name
+    ]
+    return sorted(courses, key=lambda c: c.created_at)
+
+class CourseCatalogCache:
+    """
+    Per-process cache of the course catalog.
+
+    A Firestore `on_snapshot` listener on `courses` keeps a raw copy of every course
+    document in memory; the per (class_name, language) `CourseResponse` lists are built
+    lazily from it and dropped whenever the listener reports a change, so the hot path
+    of `GET /api/courses` does zero Firestore reads. The lists are kept in an LRU bounded by
+    COURSE_CATALOG_MAX_VIEWS, since class names and languages come from the request.
+
+    If the listener fails or stops, the catalog is marked not ready (callers read Firestore
+    directly) and the listener is restarted at most every COURSE_CATALOG_RESTART_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._docs: Dict[str, dict] = {}
+        self._views = LRUCache(maxsize=COURSE_CATALOG_MAX_VIEWS)
+        self._watch = None
+        self._started_at = 0.0
+        # Set when a callback failed: later change sets are deltas on an incomplete copy
+        self._failed = False
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """Attaches the snapshot listener (idempotent)."""
+        if self._watch is not None:
+            return
+        self._started_at = time.monotonic()
+        self._failed = False
+        self._watch = firestore.client().collection("courses").on_snapshot(self._on_snapshot)
+        print("✅ Course catalog listener started")
+
+    def _invalidate(self):
+        """Marks the catalog not ready, so callers fall back to Firestore until the next snapshot."""
+        with self._lock:
+            self._ready.clear()
+            self._docs.clear()
+            self._views.clear()
+
+    def _check_watch(self):
+        """Detects a listener that stopped or failed and restarts it (rate-limited) for a full resync."""
+        watch = self._watch
+        if watch is None or (watch.is_active and not self._failed):
+            return
+        if self._ready.is_set():
+            print("⚠️ Course catalog listener stopped, falling back to Firestore reads")
+            self._invalidate()
+        if time.monotonic() - self._started_at >= COURSE_CATALOG_RESTART_SECONDS:
+            watch.unsubscribe()
+            self._watch = None
+            try:
+                self.start()
+            except Exception as e:
+                print(f"⚠️ Could not restart the course catalog listener: {e}")
+
+    def stop(self):
+        """Detaches the snapshot listener and forgets the cached catalog."""
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self._invalidate()
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        """Listener callback (runs on the Firestore watch thread)."""
+        if self._failed:
+            return
+        try:
+            with self._lock:
+                for change in changes:
+                    doc = change.document
+                    if change.type.name == "REMOVED":
+                        self._docs.pop(doc.id, None)
+                    else:
+                        self._docs[doc.id] = doc.to_dict()
+                self._views.clear()
+                self._ready.set()
+        except Exception as e:
+            # A partially applied change set would serve a wrong catalog
+            print(f"⚠️ Course catalog listener failed, falling back to Firestore reads: {e}")
+            self._failed = True
+            self._invalidate()
+
+    def upsert(self, course_data: dict):
+        """Write-through for courses created by this process (read-your-writes before the listener fires)."""
+        with self._lock:
+            if not self._ready.is_set():
+                return
+            self._docs[course_data["id"]] = course_data
+            self._views.clear()
+
+    async def get_courses(self, target_language: str = "en", class_name: Optional[str] = None) -> List[CourseResponse]:
+        """Returns the courses of a class (or all courses) in the requested language."""
+        self._check_watch()
+        key = (class_name, target_language)
+        with self._lock:
+            if self._ready.is_set():
+                view = self._views.get(key)
+                if view is not None:
+                    self.hits += 1
+                    return list(view)
+                self.misses += 1
+                view = _build_view(list(self._docs.values()), class_name, target_language)
+                self._views[key] = view
+                return list(view)
+            self.misses += 1
+
+        # 🔄 Listener not synced yet: read only the requested class straight from Firestore
+        query = async_db.collection("courses")
+        if class_name is not None:
+            query = query.where("class_name", "==", class_name)
+        return _build_view(await fetch_dicts(query), class_name, target_language)
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "ready": self._ready.is_set(),
+                "courses": len(self._docs),
+                "views": len(self._views),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+course_catalog = CourseCatalogCache()
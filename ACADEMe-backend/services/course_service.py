@@ -1,91 +1,94 @@
 import os
 import json
 import uuid
-import httpx
+import asyncio
 from datetime import datetime
 import utils.firestore_helpers as firestore_helpers
 from fastapi import HTTPException
-from firebase_admin import firestore
 from models.course_model import CourseCreate, CourseResponse
-from langdetect import detect, DetectorFactory
-
-db = firestore.client()
-DetectorFactory.seed = 0
+from utils.async_firestore import async_db, run_blocking
+from services.course_catalog import course_catalog
+from services import libretranslate_service
+from utils.language_detection import detect_first_language
+from services.translation_jobs import translation_jobs, pending_languages, STATUS_PENDING
 
 class CourseService:
     @staticmethod
     async def translate_text(text: str, target_lang: str) -> str:
-        """Translates text using the `/api/translate_response` endpoint."""
+        """Translates text in-process with the pooled LibreTranslate client."""
         if not text:
             return text  # ✅ Return original text if empty
 
-        url = "http://127.0.0.1:8000/api/translate_response"
-        payload = {"text": text, "target_language": target_lang}
-
-        print(f"🔍 Sending translation request: {payload}")  # ✅ Debug log
-
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, params=payload)  # ✅ Use `params=`
-                response.raise_for_status()
-                return response.json().get("response", text)
-        except httpx.HTTPStatusError as e:
-            print(f"🔥 Translation API error: {e.response.status_code} - {e.response.text}")
-        except httpx.RequestError as e:
-            print(f"⚠️ Connection error: {e}")
+            return await libretranslate_service.translate_text(text, "en", target_lang)
         except Exception as e:
-            print(f"❌ Unexpected error: {e}")
+            print(f"🔥 Translation error ({target_lang}): {e}")
 
         return text  # ✅ Return original text on failure
 
+    @staticmethod
+    async def translate_fields(fields: dict, target_languages: list[str], strict: bool = False) -> dict:
+        """
+        Translates several fields into several languages with one batched request per
+        language, all languages concurrently.
+
+        Field values may be strings or lists of strings (e.g. quiz options); empty values
+        are copied unchanged. A language whose request fails keeps the original texts,
+        unless `strict` is set, in which case the error is raised.
+        Returns `{lang: {field: translated_value}}`.
+        """
+        texts = []
+        for value in fields.values():
+            texts.extend(value if isinstance(value, list) else [value])
+        texts = [text or "" for text in texts]
+
+        async def translate_language(lang: str) -> list[str]:
+            try:
+                return await libretranslate_service.translate_batch(texts, "en", lang)
+            except Exception as e:
+                if strict:
+                    raise
+                print(f"🔥 Batch translation error ({lang}): {e}")
+                return texts
+
+        results = await asyncio.gather(*(translate_language(lang) for lang in target_languages))
+
+        translations = {}
+        for lang, translated in zip(target_languages, results):
+            position = 0
+            translations[lang] = {}
+            for field, value in fields.items():
+                if isinstance(value, list):
+                    translations[lang][field] = translated[position:position + len(value)]
+                    position += len(value)
+                else:
+                    translations[lang][field] = translated[position] if value else value
+                    position += 1
+        return translations
+
     @staticmethod
     async def detect_language(texts: list[str]) -> str:
-        """Detects language from a list of text fields, defaults to English on failure."""
-        for text in texts:
-            if text:  # Ensure we have text to analyze
-                try:
-                    return detect(text)  # Detect language from the first non-empty text
-                except Exception:
-                    continue  # If detection fails, try the next text
-        return "en"
+        """Detects language from a list of text fields (locally, memoized), defaults to English on failure."""
+        return await detect_first_language(texts)
 
     @staticmethod
     async def create_course(course: CourseCreate):
         """Creates a new course with multilingual support and updates Firestore ID mapping."""
         course_id = str(uuid.uuid4())
-        course_ref = db.collection("courses").document(course_id)
+        course_ref = async_db.collection("courses").document(course_id)
 
-        if course_ref.get().exists:
+        if (await course_ref.get()).exists:
             raise HTTPException(status_code=400, detail="Course already exists")
 
         now = datetime.utcnow()
 
         # 🔍 Detect language dynamically
         detected_lang = await CourseService.detect_language([course.title, course.description])
-        translations = {
-            detected_lang: {
-                "title": course.title,
-                "description": course.description,
-            }
-        }
+        source_fields = {"title": course.title, "description": course.description}
 
-        # 🌎 Translate into other languages (excluding detected language)
+        # 🌎 Translate into other languages (excluding detected language) in the background
         target_languages = ["fr", "es", "de", "zh", "ar", "hi", "en"]
-
-        translation_tasks = {
-            lang: {
-                "title": CourseService.translate_text(course.title, lang),
-                "description": CourseService.translate_text(course.description, lang),
-            }
-            for lang in target_languages
-        }
-
-        # 🔄 Wait for all translations to complete
-        for lang in target_languages:
-            translations[lang] = {
-                "title": await translation_tasks[lang]["title"],
-                "description": await translation_tasks[lang]["description"],
-            }
+        translations = pending_languages(source_fields, target_languages, detected_lang)
 
         course_data = {
             "id": course_id,
@@ -93,43 +96,30 @@ class CourseService:
             "created_at": now,
             "updated_at": now,
             "languages": translations,
+            "translation_status": STATUS_PENDING,
         }
 
         # ✅ **Write to Firestore**
         print(f"📌 Storing course {course_id} in Firestore: {course.title}")
-        course_ref.set(course_data)
+        await course_ref.set(course_data)
+        course_catalog.upsert(course_data)
+        job_id = await translation_jobs.enqueue(course_ref, source_fields, [lang for lang in target_languages if lang != detected_lang])
 
         # ✅ **Store ID mapping in Firestore instead of JSON**
-        firestore_helpers.FirestoreUtils.store_id_mapping("courses", course_id, course.title)
+        await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "courses", course_id, course.title)
 
         return CourseResponse(
             **course_data,
             title=translations[detected_lang]["title"],
-            description=translations[detected_lang]["description"]
+            description=translations[detected_lang]["description"],
+            translation_job_id=job_id
         )
 
     @staticmethod
-    def get_courses(target_language: str = "en"):
-        """Fetches courses and returns them in the requested language."""
-        courses_ref = db.collection("courses").stream()
-
-        courses = []
-        for doc in courses_ref:
-            course_data = doc.to_dict()
-
-            if "languages" not in course_data:
-                raise HTTPException(status_code=500, detail=f"Missing 'languages' field in course {doc.id}")
-
-            # 🏷️ Fetch content in requested language, fallback to English, and ensure both fields exist
-            lang_data = course_data["languages"].get(target_language, {}) or course_data["languages"].get("en", {})
-
-            courses.append(CourseResponse(
-                id=course_data["id"],
-                title=lang_data.get("title", course_data["languages"].get(target_language, {}).get("title", "Untitled Course")),
-                class_name=course_data["class_name"],
-                description=lang_data.get("description", course_data["languages"].get("en", {}).get("description", "No Description")),
-                created_at=course_data["created_at"].isoformat(),  # ✅ Convert Firestore timestamp
-                updated_at=course_data["updated_at"].isoformat(),  # ✅ Convert Firestore timestamp
-            ))
-
-        return courses
+    async def get_courses(target_language: str = "en", class_name: str = None):
+        """
+        Fetches courses in the requested language from the in-process catalog cache.
+
+        `class_name=None` returns every course (internal callers only; routes must pass the user's class).
+        """
+        return await course_catalog.get_courses(target_language, class_name)
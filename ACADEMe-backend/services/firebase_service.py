@@ -60,46 +60,12 @@ class FirebaseService:
     async def _get_documents_by_ids(self, collection_name: str, document_ids: List[str]) -> List[Dict[str, Any]]:
         """
         Generic method to fetch documents by IDs from a Firestore subcollection.
-        Uses batch operations for better performance.
+        Uses a single batch get (one round trip) instead of 10-item 'in' queries.
         """
         if not document_ids:
             return []
         
-        # Firestore 'in' query supports up to 10 items, so we need to batch
-        documents = []
-        batch_size = 10
-        
-        for i in range(0, len(document_ids), batch_size):
-            batch_ids = document_ids[i:i + batch_size]
-            batch_docs = await self._fetch_batch_documents(collection_name, batch_ids)
-            documents.extend(batch_docs)
-        
-        return documents
-    
-    async def _fetch_batch_documents(self, collection_name: str, document_ids: List[str]) -> List[Dict[str, Any]]:
-        """
-        Fetch a batch of documents using Firestore 'in' query from subcollection.
-        """
-        def fetch_documents():
-            try:
-                # Query the subcollection under id-mapping/default/
-                collection_ref = self.base_path.collection(collection_name)
-                query = collection_ref.where("id", "in", document_ids)
-                docs = query.get()
-                
-                documents = []
-                for doc in docs:
-                    doc_data = doc.to_dict()
-                    documents.append(doc_data)
-                
-                return documents
-            except Exception as e:
-                print(f"Error fetching documents from {collection_name}: {e}")
-                return []
-        
-        # Run the synchronous Firestore operation in a thread pool
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, fetch_documents)
+        return await self.batch_get_documents(collection_name, list(dict.fromkeys(document_ids)))
     
     async def get_document_by_id(self, collection_name: str, document_id: str) -> Dict[str, Any]:
         """
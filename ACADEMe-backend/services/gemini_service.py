@@ -1,52 +1,144 @@
+import os
+import asyncio
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from configs import GOOGLE_GEMINI_API_KEY
+from utils.async_firestore import run_blocking
 
 # Configure Gemini API key
 genai.configure(api_key=GOOGLE_GEMINI_API_KEY)
 
+# Gemini client settings (overridable via environment)
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+
+# Errors worth retrying (quota / transient backend errors)
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+)
+
+# ✅ One model instance and one concurrency limit shared by every caller
+_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+def get_model() -> genai.GenerativeModel:
+    """Returns the shared Gemini model instance."""
+    return _model
+
+async def generate_content(contents, **kwargs):
+    """
+    Calls `generate_content_async` on the shared model.
+
+    At most GEMINI_MAX_CONCURRENCY calls run at once across the process; each call is bounded
+    by GEMINI_TIMEOUT_SECONDS, and quota/transient errors are retried with exponential backoff.
+    """
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            async with _semaphore:
+                return await asyncio.wait_for(
+                    _model.generate_content_async(contents, request_options={"timeout": GEMINI_TIMEOUT_SECONDS}, **kwargs),
+                    timeout=GEMINI_TIMEOUT_SECONDS
+                )
+        except RETRYABLE_ERRORS as e:
+            if attempt >= GEMINI_MAX_RETRIES:
+                raise
+            delay = 2 ** attempt
+            print(f"⚠️ Gemini call failed ({type(e).__name__}), retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+async def stream_content(contents, **kwargs):
+    """
+    Streaming variant of `generate_content`: yields text chunks as Gemini produces them.
+
+    Errors before the first chunk are retried like `generate_content`; once text has been
+    yielded the stream cannot be replayed, so later errors are raised to the consumer.
+
+    The concurrency slot is only held while the stream is opened: chunks are consumed at the
+    client's pace (and translated on the way), which must not block other Gemini calls. Each
+    chunk is bounded by GEMINI_TIMEOUT_SECONDS, so a stalled stream fails instead of hanging.
+    """
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        started = False
+        try:
+            async with _semaphore:
+                response = await asyncio.wait_for(
+                    _model.generate_content_async(contents, stream=True, request_options={"timeout": GEMINI_TIMEOUT_SECONDS}, **kwargs),
+                    timeout=GEMINI_TIMEOUT_SECONDS
+                )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), timeout=GEMINI_TIMEOUT_SECONDS)
+                except StopAsyncIteration:
+                    break
+                text = getattr(chunk, "text", "")
+                if text:
+                    started = True
+                    yield text
+            return
+        except RETRYABLE_ERRORS as e:
+            if started or attempt >= GEMINI_MAX_RETRIES:
+                raise
+            delay = 2 ** attempt
+            print(f"⚠️ Gemini stream failed ({type(e).__name__}), retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+async def _build_parts(prompt: str, chat_history=None, image_data: bytes = None, image_mime_type: str = "image/jpeg", video_path=None, attachments: list = None) -> list:
+    """
+    Builds the message parts of a tutor request (images are passed in memory, videos read eagerly).
+    `attachments` are extra, already prepared parts (e.g. video keyframes).
+    """
+    # Define system prompt for ASKMe's identity
+    systemPrompt = "Your name is ASKMe, the 24/7 AI Tutor of ACADEMe—an innovative, gamified educational platform with a multilingual interface supporting text, image, audio, video, and document inputs. You provide clear, concise answers to help students learn effectively. ACADEMe is developed by Team VISI0N (avoid mentioning this unless necessary)."
+
+    # Prepare message parts
+    parts = [{"text": systemPrompt + "\n\n" + prompt + "\n\n**Please provide a suitable answer.**"}]
+
+    # Include chat history if available
+    if chat_history:
+        for message in chat_history:
+            if isinstance(message, dict) and "content" in message:
+                parts.append({"text": message["content"]})
+            else:
+                parts.append({"text": str(message)})
+
+    # If an image is provided, attach it
+    if image_data:
+        parts.append({"mime_type": image_mime_type, "data": image_data})
+
+    # If a video is provided, attach it
+    if video_path:
+        try:
+            video_bytes = await run_blocking(_read_file, video_path)
+            parts.append({"mime_type": "video/mp4", "data": video_bytes})  # ✅ Correct MIME type for video
+        except Exception as e:
+            print(f"Error loading video: {e}")
+
+    if attachments:
+        parts.extend(attachments)
+
+    return parts
+
 # Function to get a response from Gemini 2.0 Flash
-def get_gemini_response(prompt: str, chat_history=None, image_path=None, video_path=None) -> str:
+async def get_gemini_response(prompt: str, chat_history=None, image_data: bytes = None, image_mime_type: str = "image/jpeg", video_path=None, attachments: list = None) -> str:
     """
     Interacts with Gemini 2.0 Flash to generate a response.
     """
     try:
-        # Initialize the Gemini model
-        model = genai.GenerativeModel("gemini-2.0-flash")
-
-        # Define system prompt for ASKMe's identity
-        systemPrompt = "Your name is ASKMe, the 24/7 AI Tutor of ACADEMe—an innovative, gamified educational platform with a multilingual interface supporting text, image, audio, video, and document inputs. You provide clear, concise answers to help students learn effectively. ACADEMe is developed by Team VISI0N (avoid mentioning this unless necessary)."
-
-        # Prepare message parts
-        parts = [{"text": systemPrompt + "\n\n" + prompt + "\n\n**Please provide a suitable answer.**"}]
-
-        # Include chat history if available
-        if chat_history:
-            for message in chat_history:
-                if isinstance(message, dict) and "content" in message:
-                    parts.append({"text": message["content"]})
-                else:
-                    parts.append({"text": str(message)})
-
-        # If an image is provided, attach it
-        if image_path:
-            try:
-                with open(image_path, "rb") as img_file:
-                    image_bytes = img_file.read()
-                parts.append({"mime_type": "image/jpeg", "data": image_bytes})  # Adjust mime_type if needed
-            except Exception as e:
-                print(f"Error loading image: {e}")
-
-        # If a video is provided, attach it
-        if video_path:
-            try:
-                with open(video_path, "rb") as video_file:
-                    video_bytes = video_file.read()
-                parts.append({"mime_type": "video/mp4", "data": video_bytes})  # ✅ Correct MIME type for video
-            except Exception as e:
-                print(f"Error loading video: {e}")
+        parts = await _build_parts(prompt, chat_history, image_data, image_mime_type, video_path, attachments)
 
         # Send request to Gemini
-        response = model.generate_content(parts)
+        response = await generate_content(parts)
 
         # Extract text response safely
         if response and hasattr(response, "text"):
@@ -57,14 +149,23 @@ def get_gemini_response(prompt: str, chat_history=None, image_path=None, video_p
     except Exception as e:
         return f"Error in Gemini response: {str(e)}"
 
+async def stream_gemini_response(prompt: str, chat_history=None, image_data: bytes = None, image_mime_type: str = "image/jpeg", video_path=None, attachments: list = None):
+    """
+    Streaming variant of `get_gemini_response`: returns an async iterator of text chunks.
+
+    Attachments are read before returning, so callers may delete their temp files right away.
+    """
+    parts = await _build_parts(prompt, chat_history, image_data, image_mime_type, video_path, attachments)
+    return stream_content(parts)
 
 # Function for processing text using Gemini
-async def process_text_with_gemini(text: str) -> str:
+async def process_text_with_gemini(text: str, stream: bool = False):
     """
     Processes text using Gemini 2.0 Flash.
 
     Args:
         text (str): The text to be processed.
+        stream (bool): Return an async iterator of text chunks instead of the full text.
 
     Returns:
         str: Gemini's response to the text.
@@ -87,4 +188,6 @@ async def process_text_with_gemini(text: str) -> str:
     Important: Do NOT include the corrected transcription in your response. Only provide a brief and relevant response to the prompt without changing the original meaning of the transcription.
     """
 
-    return get_gemini_response(prompt)
+    if stream:
+        return await stream_gemini_response(prompt)
+    return await get_gemini_response(prompt)
@@ -0,0 +1,120 @@
+import os
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional
+from cachetools import TTLCache
+from utils.async_firestore import async_db, fetch_dicts, get_many
+
+# ID mapping cache settings (overridable via environment)
+ID_MAPPING_CACHE_MAXSIZE = int(os.getenv("ID_MAPPING_CACHE_MAXSIZE", "50000"))
+# Bounds staleness of names renamed by another worker process
+ID_MAPPING_CACHE_TTL_SECONDS = float(os.getenv("ID_MAPPING_CACHE_TTL_SECONDS", "3600"))
+# Load every mapping collection on startup instead of warming up lazily
+ID_MAPPING_CACHE_PRELOAD = os.getenv("ID_MAPPING_CACHE_PRELOAD", "false").lower() == "true"
+
+# Collections resolved for recommendations
+MAPPING_COLLECTIONS = ("courses", "topics", "subtopics", "quizzes", "materials")
+
+def mapping_ref(collection_name: str, doc_id: str):
+    """Returns the async reference of an id-mapping/default/{collection_name}/{doc_id} document."""
+    return async_db.collection("id-mapping").document("default").collection(collection_name).document(doc_id)
+
+def mapping_name(collection_name: str, data: dict) -> Optional[str]:
+    """Quizzes and materials store a `title`; courses, topics and subtopics a `name`."""
+    if collection_name in ("quizzes", "materials"):
+        return data.get("title")
+    return data.get("name")
+
+class IdMappingCache:
+    """
+    In-memory (collection, id) → name dictionary in front of the id-mapping collections.
+
+    `FirestoreUtils.store_id_mapping/update_id_mapping/delete_id_mapping` keep it in sync on
+    writes; misses of a lookup are fetched together with a single `get_all` round trip,
+    whatever the number of collections involved. Those writers run in worker threads
+    (`run_blocking`), so every access to the underlying TTLCache holds `_lock`.
+    """
+
+    def __init__(self, maxsize: int = ID_MAPPING_CACHE_MAXSIZE, ttl: float = ID_MAPPING_CACHE_TTL_SECONDS):
+        self._names = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, collection_name: str, doc_id: str, name: Optional[str]):
+        if name is not None:
+            with self._lock:
+                self._names[(collection_name, doc_id)] = name
+
+    def forget(self, collection_name: str, doc_id: str):
+        with self._lock:
+            self._names.pop((collection_name, doc_id), None)
+
+    async def resolve(self, ids_by_collection: Dict[str, Iterable[str]]) -> Dict[str, Dict[str, str]]:
+        """
+        Returns {collection: {id: name}} for the requested IDs (unknown IDs are left out).
+
+        Args:
+            ids_by_collection: IDs to resolve per mapping collection, e.g. {"topics": [...]}
+        """
+        names: Dict[str, Dict[str, str]] = {collection_name: {} for collection_name in ids_by_collection}
+        missing = []
+        with self._lock:
+            for collection_name, doc_ids in ids_by_collection.items():
+                for doc_id in set(doc_ids):
+                    name = self._names.get((collection_name, doc_id))
+                    if name is None:
+                        missing.append((collection_name, doc_id))
+                    else:
+                        names[collection_name][doc_id] = name
+        self.hits += sum(len(found) for found in names.values())
+        self.misses += len(missing)
+
+        if missing:
+            snapshots = await get_many([mapping_ref(collection_name, doc_id) for collection_name, doc_id in missing])
+            for (collection_name, doc_id), snapshot in zip(missing, snapshots):
+                if snapshot is None or not snapshot.exists:
+                    continue
+                name = mapping_name(collection_name, snapshot.to_dict())
+                if name is not None:
+                    self.put(collection_name, doc_id, name)
+                    names[collection_name][doc_id] = name
+        return names
+
+    async def warm(self, collections: List[str] = MAPPING_COLLECTIONS):
+        """Loads whole mapping collections into the cache (concurrently)."""
+        base = async_db.collection("id-mapping").document("default")
+        results = await asyncio.gather(
+            *(fetch_dicts(base.collection(collection_name)) for collection_name in collections),
+            return_exceptions=True
+        )
+        loaded = 0
+        for collection_name, documents in zip(collections, results):
+            if isinstance(documents, Exception):
+                print(f"⚠️ Could not preload ID mappings for {collection_name}: {documents}")
+                continue
+            for data in documents:
+                if data.get("id"):
+                    self.put(collection_name, data["id"], mapping_name(collection_name, data))
+                    loaded += 1
+        print(f"✅ Preloaded {loaded} ID mappings")
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        total = self.hits + self.misses
+        with self._lock:
+            entries = len(self._names)
+        return {
+            "entries": entries,
+            "maxsize": self._names.maxsize,
+            "ttl_seconds": self._names.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+id_mapping_cache = IdMappingCache()
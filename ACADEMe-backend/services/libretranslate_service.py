@@ -1,21 +1,187 @@
-import requests
+import os
+import re
+import asyncio
+import httpx
+from typing import Callable, List, Optional, Tuple
 from configs import LIBRETRANSLATE_URL
+from services.translation_memory import translation_memory
 
-def translate_text(text: str, source_lang: str, target_lang: str) -> str:
+# LibreTranslate client settings (overridable via environment)
+LIBRETRANSLATE_TIMEOUT_SECONDS = float(os.getenv("LIBRETRANSLATE_TIMEOUT_SECONDS", "15"))
+LIBRETRANSLATE_MAX_RETRIES = int(os.getenv("LIBRETRANSLATE_MAX_RETRIES", "2"))
+LIBRETRANSLATE_MAX_CONNECTIONS = int(os.getenv("LIBRETRANSLATE_MAX_CONNECTIONS", "20"))
+# Maximum number of strings sent in one batched `/translate` request
+LIBRETRANSLATE_BATCH_SIZE = int(os.getenv("LIBRETRANSLATE_BATCH_SIZE", "50"))
+
+# Large texts are split into chunks of at most this many characters, translated concurrently
+LIBRETRANSLATE_CHUNK_CHARS = int(os.getenv("LIBRETRANSLATE_CHUNK_CHARS", "2000"))
+LIBRETRANSLATE_CHUNK_CONCURRENCY = int(os.getenv("LIBRETRANSLATE_CHUNK_CONCURRENCY", "4"))
+
+# Status codes worth retrying (rate limiting / transient server errors)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_client: httpx.AsyncClient = None
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared keep-alive client (created on first use)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=LIBRETRANSLATE_URL,
+            timeout=httpx.Timeout(LIBRETRANSLATE_TIMEOUT_SECONDS, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=LIBRETRANSLATE_MAX_CONNECTIONS,
+                max_keepalive_connections=LIBRETRANSLATE_MAX_CONNECTIONS
+            ),
+            headers={"Content-Type": "application/json"}
+        )
+    return _client
+
+async def close_client():
+    """Closes the shared client (called on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def post_with_retries(path: str, payload: dict):
+    """
+    POSTs a JSON payload to LibreTranslate and returns the decoded response.
+
+    Connection errors, timeouts and retryable status codes are retried with a short
+    exponential backoff, up to LIBRETRANSLATE_MAX_RETRIES times.
+    """
+    client = get_client()
+    for attempt in range(LIBRETRANSLATE_MAX_RETRIES + 1):
+        try:
+            response = await client.post(path, json=payload)
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < LIBRETRANSLATE_MAX_RETRIES:
+                raise httpx.HTTPStatusError("Retryable status", request=response.request, response=response)
+            if response.status_code != 200:
+                raise Exception(f"Translation error: {response.text}")
+            return response.json()
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            if attempt >= LIBRETRANSLATE_MAX_RETRIES:
+                raise Exception(f"Translation service error: {e}")
+            await asyncio.sleep(0.25 * (2 ** attempt))
+
+async def _translate_remote(text: str, source_lang: str, target_lang: str) -> str:
     data = {"q": text, "source": source_lang, "target": target_lang, "format": "text"}
-    headers = {"Content-Type": "application/json"}
+    result = await post_with_retries("/translate", data)
+    return result.get("translatedText", text)
+
+async def _translate_remote_batch(texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+    translations = []
+    for start in range(0, len(texts), LIBRETRANSLATE_BATCH_SIZE):
+        chunk = texts[start:start + LIBRETRANSLATE_BATCH_SIZE]
+        data = {"q": chunk, "source": source_lang, "target": target_lang, "format": "text"}
+        result = await post_with_retries("/translate", data)
+        translated = result.get("translatedText", chunk)
+        if not isinstance(translated, list) or len(translated) != len(chunk):
+            raise Exception(f"Translation error: unexpected batch response for {len(chunk)} texts")
+        translations.extend(translated)
+    return translations
+
+async def translate_text(text: str, source_lang: str, target_lang: str) -> str:
+    """
+    Translates text with LibreTranslate over the shared connection pool.
+
+    Repeated (text, source, target) requests are served from the translation memory.
+    """
+    return await translation_memory.translate(text, source_lang, target_lang, _translate_remote)
+
+async def translate_batch(texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+    """
+    Translates several strings into one target language in a single request (`q` as a list).
+
+    Empty strings are returned as-is and duplicates are sent once; remembered strings are
+    served from the translation memory.
+    """
+    to_translate = [text for text in texts if text]
+    if not to_translate:
+        return list(texts)
+
+    translated = iter(await translation_memory.translate_many(to_translate, source_lang, target_lang, _translate_remote_batch))
+    return [next(translated) if text else text for text in texts]
+
+def _split_long_segment(segment: str, max_chars: int) -> List[Tuple[str, str]]:
+    """Splits an oversized paragraph on sentence boundaries, hard-cutting at spaces as a last resort."""
+    pieces = []
+    parts = re.split(r"(?<=[.!?\u3002\uff01\uff1f])(\s+)", segment)
+    for index in range(0, len(parts), 2):
+        sentence = parts[index]
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append((sentence[:cut], sentence[cut:cut + 1] if sentence[cut:cut + 1] == " " else ""))
+            sentence = sentence[cut + 1:] if sentence[cut:cut + 1] == " " else sentence[cut:]
+        pieces.append((sentence, separator))
+    return pieces
+
+def split_for_translation(text: str, max_chars: int = None) -> List[Tuple[str, str]]:
+    """
+    Splits a text into `(chunk, separator)` pairs of at most `max_chars` characters, on
+    paragraph boundaries first and sentence boundaries second.
 
-    try:
-        response = requests.post(f"{LIBRETRANSLATE_URL}/translate", json=data, headers=headers)
+    Joining every chunk followed by its separator rebuilds the original text exactly, so
+    translated chunks can be reassembled in order with the original layout.
+    """
+    max_chars = max_chars or LIBRETRANSLATE_CHUNK_CHARS
+    units = []
+    parts = re.split(r"(\n+)", text)
+    for index in range(0, len(parts), 2):
+        paragraph = parts[index]
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        if len(paragraph) <= max_chars:
+            units.append((paragraph, separator))
+        else:
+            pieces = _split_long_segment(paragraph, max_chars)
+            last_text, last_separator = pieces[-1]
+            units.extend(pieces[:-1] + [(last_text, last_separator + separator)])
 
-        print("Response Status:", response.status_code)
-        print("Response JSON:", response.json())
+    # Greedily merge small units so each request carries up to max_chars characters
+    chunks = []
+    for unit_text, unit_separator in units:
+        if chunks:
+            chunk_text, chunk_separator = chunks[-1]
+            if len(chunk_text) + len(chunk_separator) + len(unit_text) <= max_chars:
+                chunks[-1] = (chunk_text + chunk_separator + unit_text, unit_separator)
+                continue
+        chunks.append((unit_text, unit_separator))
+    return chunks
 
-        if response.status_code != 200:
-            raise Exception(f"Translation error: {response.text}")
+async def translate_long_text(
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    max_chars: int = None,
+    concurrency: int = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """
+    Translates a large text (e.g. an extracted document) chunk by chunk.
 
-        return response.json().get("translatedText", text)
+    Chunks are translated concurrently, at most `concurrency` at a time, and reassembled in
+    order. `on_progress(done, total)` is called as each chunk completes.
+    """
+    chunks = split_for_translation(text, max_chars)
+    semaphore = asyncio.Semaphore(concurrency or LIBRETRANSLATE_CHUNK_CONCURRENCY)
+    done = 0
 
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Translation service error: {e}")
+    async def translate_chunk(chunk: str) -> str:
+        nonlocal done
+        if not chunk.strip():
+            translated = chunk
+        else:
+            async with semaphore:
+                translated = await translate_text(chunk, source_lang, target_lang)
+        done += 1
+        if on_progress:
+            on_progress(done, len(chunks))
+        else:
+            print(f"🔄 Translated chunk {done}/{len(chunks)} ({source_lang} → {target_lang})")
+        return translated
 
+    translations = await asyncio.gather(*(translate_chunk(chunk) for chunk, _ in chunks))
+    return "".join(translated + separator for translated, (_, separator) in zip(translations, chunks))
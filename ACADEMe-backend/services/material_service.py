@@ -3,12 +3,12 @@ import json
 import uuid
 from datetime import datetime
 from fastapi import HTTPException
-from firebase_admin import firestore
 from services.course_service import CourseService
 from models.material_model import MaterialResponse
 import utils.firestore_helpers as firestore_helpers
-
-db = firestore.client()
+from utils.async_firestore import async_db, course_ref, content_collection, fetch_all, get_dict, run_blocking
+from services.class_stats import increment_class_materials
+from services.translation_jobs import translation_jobs, pending_languages, STATUS_PENDING
 
 class MaterialService:
     @staticmethod
@@ -33,58 +33,37 @@ class MaterialService:
                 detected_lang = await CourseService.detect_language(text_fields) or "en"
 
             # 🔹 Organize translations under "languages" key
-            languages = {
-                detected_lang: {
-                    "content": material.get("content", ""),
-                    "optional_text": material.get("optional_text", ""),
-                }
+            source_fields = {
+                "content": material.get("content", ""),
+                "optional_text": material.get("optional_text", ""),
             }
 
-            # 🔹 Translate only `content` if type == "text", and always translate `optional_text`
+            # 🔹 Translate only `content` if type == "text", and always translate `optional_text` (in the background)
             target_languages = ["fr", "es", "de", "zh", "ar", "hi", "en"]
-
-            translation_tasks = {
-                lang: {
-                    "content": CourseService.translate_text(material["content"], lang) if material["type"] == "text" else None,
-                    "optional_text": CourseService.translate_text(material["optional_text"], lang) if material.get("optional_text") else None,
-                }
-                for lang in target_languages
-            }
-
-            for lang in target_languages:
-                languages[lang] = {
-                    "content": await translation_tasks[lang]["content"] if translation_tasks[lang]["content"] else material["content"],
-                    "optional_text": await translation_tasks[lang]["optional_text"] if translation_tasks[lang]["optional_text"] else "",
-                }
-
-            material["languages"] = languages
+            material["languages"] = pending_languages(source_fields, target_languages, detected_lang)
+            material["translation_status"] = STATUS_PENDING
 
             # 🔹 Determine Firestore reference
-            if is_subtopic and subtopic_id:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("subtopics")
-                    .document(subtopic_id)
-                    .collection("materials")
-                    .document(material_id)
-                )
-            else:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("materials")
-                    .document(material_id)
-                )
-
-            ref.set(material, merge=True)
+            ref = content_collection(course_id, topic_id, "materials", subtopic_id if is_subtopic else None).document(material_id)
+
+            # 📊 Write the material and bump the class material total atomically
+            course_data = await get_dict(course_ref(course_id)) or {}
+            batch = async_db.batch()
+            batch.set(ref, material, merge=True)
+            increment_class_materials(batch, course_data.get("class_name"))
+            await batch.commit()
+            material["translation_job_id"] = await translation_jobs.enqueue(
+                ref,
+                {
+                    "content": material["content"] if material["type"] == "text" else None,
+                    "optional_text": material.get("optional_text") or None,
+                },
+                [lang for lang in target_languages if lang != detected_lang],
+                fallbacks={"content": material["content"], "optional_text": ""}
+            )
 
             # ✅ **Store ID mapping in Firestore instead of JSON**
-            firestore_helpers.FirestoreUtils.store_id_mapping("materials", material_id, material["content"])
+            await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "materials", material_id, material["content"])
 
             return MaterialResponse(**material)
 
@@ -102,26 +81,8 @@ class MaterialService:
         """Fetches all materials under a topic or subtopic in the requested language."""
         try:
             # 🔹 Determine Firestore reference
-            if is_subtopic and subtopic_id:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("subtopics")
-                    .document(subtopic_id)
-                    .collection("materials")
-                )
-            else:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("materials")
-                )
-
-            materials = ref.stream()
+            ref = content_collection(course_id, topic_id, "materials", subtopic_id if is_subtopic else None)
+            materials = await fetch_all(ref)
             material_list = []
 
             for material in materials:
@@ -0,0 +1,267 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+from google.cloud.firestore import async_transactional
+from utils.async_firestore import async_db, fetch_dicts, get_many
+from utils.fan_out import fan_out, FanOutResult
+
+# 🔹 users/{user_id}/aggregates/progress holds the running totals of the user's progress records
+AGGREGATES_COLLECTION = "aggregates"
+PROGRESS_AGGREGATE_ID = "progress"
+NO_TOPIC_KEY = "unassigned"
+
+# Background repairs of stale aggregates scheduled by read paths, one per user
+_pending_rebuilds = {}
+
+def aggregate_ref(user_id: str):
+    """Returns the reference of a user's progress aggregate document."""
+    return async_db.collection("users").document(user_id).collection(AGGREGATES_COLLECTION).document(PROGRESS_AGGREGATE_ID)
+
+def progress_collection(user_id: str):
+    return async_db.collection("users").document(user_id).collection("progress")
+
+def _is_fresh(snapshot) -> bool:
+    return snapshot is not None and snapshot.exists and not snapshot.to_dict().get("needs_rebuild")
+
+def empty_aggregate() -> dict:
+    """Returns an aggregate with every counter at zero."""
+    return {
+        "total_activities": 0,
+        "completed_activities": 0,
+        "completed_readings": 0,
+        "quiz_attempts": 0,
+        # All quiz records carrying a score (teacher dashboards)
+        "quiz_score_sum": 0.0,
+        "quiz_score_count": 0,
+        # Completed quiz records with a positive score (accurate analytics)
+        "completed_quiz_score_sum": 0.0,
+        "completed_quiz_count": 0,
+        "completed_quiz_max_score": 0.0,
+        "topics": {},
+        "needs_rebuild": False,
+        "last_activity_at": None,
+        "updated_at": datetime.utcnow(),
+    }
+
+def _empty_topic() -> dict:
+    return {
+        "activities": 0,
+        "completed": 0,
+        "materials_read": 0,
+        "quiz_attempts": 0,
+        "quiz_score_sum": 0.0,
+        "quiz_score_count": 0,
+        "max_quiz_score": 0.0,
+    }
+
+def _apply(aggregate: dict, record: dict, sign: int = 1):
+    """Adds (sign=1) or removes (sign=-1) the contribution of one progress record."""
+    activity_type = record.get("activity_type")
+    completed = record.get("status") == "completed"
+    score = record.get("score")
+    is_quiz = activity_type == "quiz"
+
+    topic_key = record.get("topic_id") or NO_TOPIC_KEY
+    topic = aggregate["topics"].setdefault(topic_key, _empty_topic())
+
+    aggregate["total_activities"] += sign
+    topic["activities"] += sign
+
+    if completed:
+        aggregate["completed_activities"] += sign
+        topic["completed"] += sign
+
+    if activity_type == "reading" and completed:
+        aggregate["completed_readings"] += sign
+    if activity_type == "reading" and record.get("material_id") is not None:
+        topic["materials_read"] += sign
+
+    if is_quiz:
+        aggregate["quiz_attempts"] += sign
+        topic["quiz_attempts"] += sign
+
+        if score is not None:
+            aggregate["quiz_score_sum"] += sign * score
+            aggregate["quiz_score_count"] += sign
+
+        if completed and score is not None:
+            topic["quiz_score_sum"] += sign * score
+            topic["quiz_score_count"] += sign
+
+            if sign > 0:
+                topic["max_quiz_score"] = max(topic["max_quiz_score"], score)
+            elif score >= topic["max_quiz_score"]:
+                # A max cannot be decremented; recount on the next read
+                aggregate["needs_rebuild"] = True
+
+        if completed and score is not None and score > 0:
+            aggregate["completed_quiz_score_sum"] += sign * score
+            aggregate["completed_quiz_count"] += sign
+
+            if sign > 0:
+                aggregate["completed_quiz_max_score"] = max(aggregate["completed_quiz_max_score"], score)
+            elif score >= aggregate["completed_quiz_max_score"]:
+                aggregate["needs_rebuild"] = True
+
+    timestamp = record.get("timestamp")
+    last_activity = aggregate.get("last_activity_at")
+    if sign > 0 and timestamp and (last_activity is None or str(timestamp) > str(last_activity)):
+        aggregate["last_activity_at"] = timestamp
+
+def build_aggregate(records: List[dict]) -> dict:
+    """Builds an aggregate from scratch out of a full list of progress records."""
+    aggregate = empty_aggregate()
+    for record in records:
+        _apply(aggregate, record)
+    return aggregate
+
+async def rebuild_aggregate(user_id: str) -> dict:
+    """
+    Recounts a user's aggregate from the full progress history (backfill / repair).
+
+    The history and the aggregate are read in the same transaction as the write, so a
+    `record_progress` committing meanwhile is either counted or retried on top of the
+    rebuilt aggregate, never lost. An aggregate already repaired by someone else is kept.
+    """
+    agg_ref = aggregate_ref(user_id)
+
+    @async_transactional
+    async def _rebuild(transaction) -> dict:
+        snapshot = await agg_ref.get(transaction=transaction)
+        if _is_fresh(snapshot):
+            return snapshot.to_dict()
+
+        records = [doc.to_dict() async for doc in progress_collection(user_id).stream(transaction=transaction)]
+        aggregate = build_aggregate(records)
+        transaction.set(agg_ref, aggregate)
+        print(f"🔄 Rebuilt progress aggregate for user {user_id} from {len(records)} records")
+        return aggregate
+
+    return await _rebuild(async_db.transaction())
+
+async def compute_aggregate(user_id: str) -> dict:
+    """
+    Read-only recount for read paths: returns the aggregate built from the history and
+    schedules the (transactional) repair of the stored one in the background.
+    """
+    aggregate = build_aggregate(await fetch_dicts(progress_collection(user_id)))
+    schedule_rebuild(user_id)
+    return aggregate
+
+def schedule_rebuild(user_id: str):
+    """Repairs a user's stored aggregate in the background (at most one pending per user)."""
+    if user_id in _pending_rebuilds:
+        return
+    task = asyncio.create_task(rebuild_aggregate(user_id))
+    _pending_rebuilds[user_id] = task
+
+    def _done(finished: asyncio.Task):
+        _pending_rebuilds.pop(user_id, None)
+        if not finished.cancelled() and finished.exception():
+            print(f"⚠️ Background aggregate rebuild failed for {user_id}: {finished.exception()}")
+
+    task.add_done_callback(_done)
+
+async def reset_aggregate(user_id: str):
+    """Resets a user's aggregate (e.g. after their progress is deleted)."""
+    await aggregate_ref(user_id).set(empty_aggregate())
+
+async def record_progress(user_id: str, progress_ref, progress_data: dict):
+    """
+    Writes a new progress record and folds it into the user's aggregate in one transaction.
+
+    Users without an aggregate yet (history logged before aggregates existed) are
+    backfilled with a full recount right after the write.
+    """
+    agg_ref = aggregate_ref(user_id)
+
+    @async_transactional
+    async def _write(transaction) -> bool:
+        snapshot = await agg_ref.get(transaction=transaction)
+        transaction.set(progress_ref, progress_data)
+        if not snapshot.exists:
+            return False
+
+        aggregate = snapshot.to_dict()
+        _apply(aggregate, progress_data)
+        aggregate["updated_at"] = datetime.utcnow()
+        transaction.set(agg_ref, aggregate)
+        return True
+
+    if not await _write(async_db.transaction()):
+        await rebuild_aggregate(user_id)
+
+async def record_progress_update(user_id: str, progress_ref, update_data: dict) -> bool:
+    """
+    Updates a progress record and swaps its old contribution for the new one in one transaction.
+
+    Returns False when the progress record does not exist.
+    """
+    agg_ref = aggregate_ref(user_id)
+
+    @async_transactional
+    async def _write(transaction) -> Optional[bool]:
+        progress_doc = await progress_ref.get(transaction=transaction)
+        snapshot = await agg_ref.get(transaction=transaction)
+        if not progress_doc.exists:
+            return None
+
+        transaction.update(progress_ref, update_data)
+        if not snapshot.exists:
+            return False
+
+        old_record = progress_doc.to_dict()
+        new_record = {**old_record, **update_data}
+        aggregate = snapshot.to_dict()
+        _apply(aggregate, old_record, sign=-1)
+        _apply(aggregate, new_record)
+        aggregate["updated_at"] = datetime.utcnow()
+        transaction.set(agg_ref, aggregate)
+        return True
+
+    result = await _write(async_db.transaction())
+    if result is None:
+        return False
+    if result is False:
+        await rebuild_aggregate(user_id)
+    return True
+
+async def get_aggregate(user_id: str) -> dict:
+    """
+    Returns a user's aggregate (one document read). Missing or stale aggregates are
+    recounted without writing; the stored copy is repaired in the background.
+    """
+    snapshot = await aggregate_ref(user_id).get()
+    if _is_fresh(snapshot):
+        return snapshot.to_dict()
+    return await compute_aggregate(user_id)
+
+async def get_aggregates(user_ids: List[str]) -> FanOutResult:
+    """
+    Returns the aggregates of several users: one batched read, then a bounded-concurrency
+    recount of the missing/stale ones (repaired in the background). Users whose recount
+    failed or ran past the deadline are reported in the result instead of failing the whole call.
+    """
+    snapshots = await get_many([aggregate_ref(user_id) for user_id in user_ids])
+
+    stale = []
+    fresh = {}
+    for user_id, snapshot in zip(user_ids, snapshots):
+        if _is_fresh(snapshot):
+            fresh[user_id] = snapshot.to_dict()
+        else:
+            stale.append(user_id)
+
+    outcome = await fan_out(stale, compute_aggregate)
+    outcome.results.update(fresh)
+    return outcome
+
+def completion_rate(aggregate: dict) -> float:
+    """Percentage of the user's activities that are completed."""
+    total = aggregate.get("total_activities", 0)
+    return (aggregate.get("completed_activities", 0) / total) * 100 if total > 0 else 0.0
+
+def average_quiz_score(aggregate: dict) -> float:
+    """Average score over every scored quiz record."""
+    count = aggregate.get("quiz_score_count", 0)
+    return aggregate.get("quiz_score_sum", 0.0) / count if count > 0 else 0.0
@@ -7,18 +7,17 @@ import matplotlib.pyplot as plt
 from fastapi import HTTPException
 from typing import Dict, Any, List
 from collections import defaultdict
-from firebase_admin import firestore
 from fastapi.encoders import jsonable_encoder
-from services.quiz_service import QuizService
+from services.quiz_index import quiz_index
 from services.course_service import CourseService
 from google.cloud.firestore import DocumentReference
 from models.graph_model import ProgressVisualResponse
-
-db = firestore.client()
+from utils.async_firestore import async_db, fetch_all
+from services.progress_aggregates import record_progress, record_progress_update, reset_aggregate
 
 async def log_progress(user_id: str, progress_data: dict):
     """Logs student progress in Firestore."""
-    progress_ref = db.collection("users").document(user_id).collection("progress").document()
+    progress_ref = async_db.collection("users").document(user_id).collection("progress").document()
     progress_id = progress_ref.id  # ✅ Generate a unique progress ID
 
     # Ensure `course_id` is included
@@ -29,13 +28,14 @@ async def log_progress(user_id: str, progress_data: dict):
     progress_data["progress_id"] = progress_id  # ✅ Include progress ID
     progress_data["course_id"] = course_id  # ✅ Store `course_id`
 
-    progress_ref.set(progress_data)  # Store in Firestore
+    # ✅ Store in Firestore and fold into the per-student aggregate (single transaction)
+    await record_progress(user_id, progress_ref, progress_data)
     return {"progress_id": progress_id, **progress_data}  # ✅ Return progress_id in response
 
 async def get_student_progress_list(user_id: str):
     """Fetches student progress records."""
-    progress_ref = db.collection("users").document(user_id).collection("progress")
-    docs = progress_ref.stream()
+    progress_ref = async_db.collection("users").document(user_id).collection("progress")
+    docs = await fetch_all(progress_ref)
 
     progress_list = []
     for doc in docs:
@@ -62,13 +62,12 @@ async def get_student_progress_list(user_id: str):
     return progress_list
 
 async def get_student_progress(user_id: str):
-    """Fetches all progress entries for a student using Firestore's `stream()` asynchronously."""
+    """Fetches all progress entries for a student using the async Firestore client."""
     try:
-        progress_ref = db.collection("users").document(user_id).collection("progress")
+        progress_ref = async_db.collection("users").document(user_id).collection("progress")
 
-        # ✅ Run `stream()` in a separate thread to prevent blocking
-        loop = asyncio.get_running_loop()
-        progress_docs = await loop.run_in_executor(None, lambda: list(progress_ref.stream()))
+        # ✅ Native async stream (no executor thread needed)
+        progress_docs = await fetch_all(progress_ref)
 
         # ✅ Convert Firestore documents to JSON serializable format
         progress_list = [{**doc.to_dict(), "id": doc.id} for doc in progress_docs if doc.exists]
@@ -79,28 +78,25 @@ async def get_student_progress(user_id: str):
 
 async def update_progress_status(user_id: str, progress_id: str, update_data: dict):
     """Updates student progress."""
-    progress_ref = db.collection("users").document(user_id).collection("progress").document(progress_id)
-    progress_doc = progress_ref.get()
+    progress_ref = async_db.collection("users").document(user_id).collection("progress").document(progress_id)
 
     print(f"🔍 Checking progress record: {progress_ref.path}")
 
-    if not progress_doc.exists:
+    # ✅ Store data in Firestore and update the per-student aggregate (single transaction)
+    json_data = jsonable_encoder(update_data)  # Ensure proper serialization
+    if not await record_progress_update(user_id, progress_ref, json_data):
         print(f"❌ Progress {progress_id} not found for user {user_id}")
         return None  # ✅ Return None if progress not found
 
-    # ✅ Store data in Firestore
-    json_data = jsonable_encoder(update_data)  # Ensure proper serialization
-    progress_ref.update(json_data)
-
     print(f"✅ Progress {progress_id} updated successfully for user {user_id}")
 
     return json_data  # Return the updated data
 
-def fetch_quiz_progress(user_id: str):
+async def fetch_quiz_progress(user_id: str):
     """Fetches only quiz-related progress entries for analytics."""
     try:
-        progress_ref = db.collection("users").document(user_id).collection("progress")
-        progress_docs = progress_ref.where("category", "==", "quiz").stream()
+        progress_ref = async_db.collection("users").document(user_id).collection("progress")
+        progress_docs = await fetch_all(progress_ref.where("category", "==", "quiz"))
 
         return [{**doc.to_dict(), "id": doc.id} for doc in progress_docs if doc.exists]
     except Exception as e:
@@ -218,11 +214,8 @@ async def fetch_student_performance(user_id: str):
         if not quiz_progress:
             return {"recommendations": "No quiz progress data available for analysis."}
 
-        # ✅ Call `get_all_quizzes()` correctly (NO await)
-        quizzes = QuizService.get_all_quizzes()
-
-        if not isinstance(quizzes, dict):
-            raise ValueError(f"get_all_quizzes() returned {type(quizzes)}, expected dict.")
+        # ✅ O(1) title lookups from the maintained quiz index (no catalog tree walk)
+        quizzes = await quiz_index.get_titles(p.get("quiz_id") for p in quiz_progress)
 
         for p in quiz_progress:
             quiz_id = p.get("quiz_id")
@@ -241,13 +234,12 @@ async def fetch_student_performance(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching student performance: {str(e)}")
 
-def fetch_progress_from_firestore(user_id):
+async def fetch_progress_from_firestore(user_id):
     try:
-        db = firestore.client()
         print(f"Fetching Firestore Progress for user ID: {user_id}")  # ✅ Log User ID
 
-        progress_ref = db.collection("users").document(user_id).collection("progress")
-        progress_docs = progress_ref.stream()  # ✅ Fetch multiple documents
+        progress_ref = async_db.collection("users").document(user_id).collection("progress")
+        progress_docs = await fetch_all(progress_ref)  # ✅ Fetch multiple documents
 
         progress_data = []
         for doc in progress_docs:
@@ -264,12 +256,11 @@ def fetch_progress_from_firestore(user_id):
 
 async def delete_user_progress(user_id: str):
     """Deletes all progress records for a user."""
-    progress_ref = db.collection("users").document(user_id).collection("progress")
-    docs = list(progress_ref.stream())  # Convert to list to avoid iterator issues
+    progress_ref = async_db.collection("users").document(user_id).collection("progress")
+    docs = await fetch_all(progress_ref)
 
-    loop = asyncio.get_running_loop()
-    
-    # Properly pass the callable `delete` method using a lambda
-    await asyncio.gather(*(loop.run_in_executor(None, lambda doc=doc: doc.reference.delete()) for doc in docs))
+    # ✅ Deletes run concurrently on the async client
+    await asyncio.gather(*(doc.reference.delete() for doc in docs))
+    await reset_aggregate(user_id)
 
     return {"message": f"All progress records deleted for user {user_id}"}
@@ -0,0 +1,77 @@
+import time
+import asyncio
+from typing import Dict, Iterable, Optional, Set
+from utils.async_firestore import async_db, fetch_all
+from services.id_mapping_cache import id_mapping_cache, ID_MAPPING_CACHE_TTL_SECONDS
+
+class QuizTitleIndex:
+    """
+    Per-process index of course quizzes, backed by the shared `id_mapping_cache`.
+
+    Titles live in `id_mapping_cache` under "quizzes"; this index only tracks which quiz IDs
+    belong to courses. It is built with a single `collection_group("quizzes")` query (instead
+    of walking courses → topics → subtopics → quizzes), rebuilt once the cache TTL has
+    elapsed, and kept up to date incrementally by `QuizService.add_quiz`.
+    """
+
+    def __init__(self):
+        self._quiz_ids: Set[str] = set()
+        self._built_at: Optional[float] = None
+        self._build_lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < ID_MAPPING_CACHE_TTL_SECONDS
+
+    async def _ensure_built(self):
+        """Builds the index on first use and after the cache TTL (one collection-group query)."""
+        if self._is_fresh():
+            return
+        async with self._build_lock:
+            if self._is_fresh():
+                return
+            quizzes = await fetch_all(async_db.collection_group("quizzes").select(["title"]))
+            quiz_ids = set()
+            for quiz in quizzes:
+                # Only course quizzes (courses/{c}/topics/{t}[/subtopics/{s}]/quizzes/{q})
+                if quiz.reference.path.startswith("courses/"):
+                    quiz_ids.add(quiz.id)
+                    id_mapping_cache.put("quizzes", quiz.id, (quiz.to_dict() or {}).get("title", "Unknown Quiz"))
+            self._quiz_ids = quiz_ids
+            self._built_at = time.monotonic()
+            print(f"✅ Quiz title index built with {len(self._quiz_ids)} quizzes")
+
+    def put(self, quiz_id: str, title: str):
+        """Adds or updates a quiz title (called on quiz create/update)."""
+        self._quiz_ids.add(quiz_id)
+        id_mapping_cache.put("quizzes", quiz_id, title)
+
+    def remove(self, quiz_id: str):
+        """Drops a quiz from the index."""
+        self._quiz_ids.discard(quiz_id)
+        id_mapping_cache.forget("quizzes", quiz_id)
+
+    async def get_titles(self, quiz_ids: Iterable[Optional[str]]) -> Dict[str, str]:
+        """
+        Resolves quiz IDs to titles.
+
+        IDs missing from the cache (e.g. quizzes created by another worker) are looked up
+        in `id-mapping/default/quizzes` in a single batched read.
+        """
+        await self._ensure_built()
+        names = await id_mapping_cache.resolve({"quizzes": [quiz_id for quiz_id in quiz_ids if quiz_id]})
+        return names["quizzes"]
+
+    async def get_all(self) -> Dict[str, str]:
+        """Returns the titles of every course quiz."""
+        await self._ensure_built()
+        return await self.get_titles(list(self._quiz_ids))
+
+    def stats(self) -> dict:
+        """Returns the index counters (lookups are counted by `id_mapping_cache`)."""
+        return {
+            "built": self._built_at is not None,
+            "quizzes": len(self._quiz_ids),
+            "age_seconds": round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None,
+        }
+
+quiz_index = QuizTitleIndex()
@@ -4,13 +4,13 @@ import uuid
 import httpx
 from datetime import datetime
 from fastapi import HTTPException
-from firebase_admin import firestore
 from services.course_service import CourseService
 import utils.firestore_helpers as firestore_helpers
 from models.quiz_model import QuizResponse, QuestionResponse
 from models.quiz_model import QuizCreate, QuizResponse, QuestionCreate, QuestionResponse
-
-db = firestore.client()
+from services.quiz_index import quiz_index
+from services.translation_jobs import translation_jobs, pending_languages, STATUS_PENDING
+from utils.async_firestore import content_collection, fetch_all, fetch_dicts, run_blocking
 
 class QuizService:
     @staticmethod
@@ -37,42 +37,18 @@ class QuizService:
             if detected_language not in target_languages:
                 detected_language = "en"
 
-            quiz_dict["languages"] = {detected_language: {"title": quiz_data.title, "description": quiz_data.description}}
-
-            # ✅ Translate title & description
-            for lang in target_languages:
-                if lang != detected_language:
-                    quiz_dict["languages"][lang] = {
-                        "title": await CourseService.translate_text(quiz_data.title, lang),
-                        "description": await CourseService.translate_text(quiz_data.description, lang)
-                    }
+            source_fields = {"title": quiz_data.title, "description": quiz_data.description}
+            quiz_dict["languages"] = pending_languages(source_fields, target_languages, detected_language)
+            quiz_dict["translation_status"] = STATUS_PENDING
 
-            # ✅ Store quiz in Firestore
-            if is_subtopic and subtopic_id:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("subtopics")
-                    .document(subtopic_id)
-                    .collection("quizzes")
-                    .document(quiz_id)
-                )
-            else:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("quizzes")
-                    .document(quiz_id)
-                )
-
-            ref.set(quiz_dict, merge=True)
+            # ✅ Store quiz in Firestore, translate title & description in the background
+            ref = content_collection(course_id, topic_id, "quizzes", subtopic_id if is_subtopic else None).document(quiz_id)
+            await ref.set(quiz_dict, merge=True)
+            quiz_dict["translation_job_id"] = await translation_jobs.enqueue(ref, source_fields, [lang for lang in target_languages if lang != detected_language])
 
             # ✅ **Store ID mapping in Firestore instead of JSON**
-            firestore_helpers.FirestoreUtils.store_id_mapping("quizzes", quiz_id, quiz_data.title)
+            await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "quizzes", quiz_id, quiz_data.title)
+            quiz_index.put(quiz_id, quiz_data.title)
 
             return QuizResponse(**quiz_dict)
 
@@ -89,27 +65,8 @@ class QuizService:
     ) -> list[QuizResponse]:
         """Fetches quizzes either under a topic or subtopic from Firestore, supporting multilingual responses."""
         try:
-            if is_subtopic and subtopic_id:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("subtopics")
-                    .document(subtopic_id)
-                    .collection("quizzes")
-                )
-            else:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("quizzes")
-                )
-
-            quizzes = ref.stream()
-            quiz_list = [quiz.to_dict() for quiz in quizzes]
+            ref = content_collection(course_id, topic_id, "quizzes", subtopic_id if is_subtopic else None)
+            quiz_list = await fetch_dicts(ref)
 
             if not quiz_list:
                 return []
@@ -160,48 +117,21 @@ class QuizService:
             if detected_language not in target_languages:
                 detected_language = "en"  # Default to English if the detected language is not supported
 
-            question_dict["languages"] = {
-                detected_language: {
-                    "question_text": question_data.question_text,
-                    "options": question_data.options
-                }
-            }
-
-            # ✅ Translate question_text & options
-            for lang in target_languages:
-                if lang != detected_language:
-                    question_dict["languages"][lang] = {
-                        "question_text": await CourseService.translate_text(question_data.question_text, lang),
-                        "options": [await CourseService.translate_text(opt, lang) for opt in question_data.options]
-                    }
+            source_fields = {"question_text": question_data.question_text, "options": question_data.options}
+            question_dict["languages"] = pending_languages(source_fields, target_languages, detected_language)
+            question_dict["translation_status"] = STATUS_PENDING
 
             # ✅ Store question in Firestore
-            if is_subtopic and subtopic_id:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("subtopics")
-                    .document(subtopic_id)
-                    .collection("quizzes")
-                    .document(quiz_id)
-                    .collection("questions")
-                    .document(question_id)
-                )
-            else:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("quizzes")
-                    .document(quiz_id)
-                    .collection("questions")
-                    .document(question_id)
-                )
-
-            ref.set(question_dict, merge=True)
+            ref = (
+                content_collection(course_id, topic_id, "quizzes", subtopic_id if is_subtopic else None)
+                .document(quiz_id)
+                .collection("questions")
+                .document(question_id)
+            )
+            await ref.set(question_dict, merge=True)
+
+            # ✅ Translate question_text & options in the background
+            question_dict["translation_job_id"] = await translation_jobs.enqueue(ref, source_fields, [lang for lang in target_languages if lang != detected_language])
             return QuestionResponse(**question_dict)
 
         except Exception as e:
@@ -218,30 +148,12 @@ class QuizService:
     ) -> list[QuestionResponse]:
         """Fetches all questions under a quiz from Firestore, supporting multilingual responses."""
         try:
-            if is_subtopic and subtopic_id:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("subtopics")
-                    .document(subtopic_id)
-                    .collection("quizzes")
-                    .document(quiz_id)
-                    .collection("questions")
-                )
-            else:
-                ref = (
-                    db.collection("courses")
-                    .document(course_id)
-                    .collection("topics")
-                    .document(topic_id)
-                    .collection("quizzes")
-                    .document(quiz_id)
-                    .collection("questions")
-                )
-
-            questions = ref.stream()
+            ref = (
+                content_collection(course_id, topic_id, "quizzes", subtopic_id if is_subtopic else None)
+                .document(quiz_id)
+                .collection("questions")
+            )
+            questions = await fetch_all(ref)
             question_list = []
 
             for question in questions:
@@ -269,38 +181,9 @@ class QuizService:
             raise HTTPException(status_code=500, detail=f"Error fetching questions: {str(e)}")
 
     @staticmethod
-    def get_all_quizzes() -> dict:
-        """Fetch all quizzes across courses and return a mapping {quiz_id: quiz_title}."""
+    async def get_all_quizzes() -> dict:
+        """Return a mapping {quiz_id: quiz_title} of all course quizzes from the maintained quiz title index."""
         try:
-            quiz_mapping = {}
-
-            # Fetch all courses
-            courses = db.collection("courses").stream()
-            for course in courses:
-                course_id = course.id
-
-                # Fetch all topics in this course
-                topics = db.collection("courses").document(course_id).collection("topics").stream()
-                for topic in topics:
-                    topic_id = topic.id
-
-                    # Fetch quizzes under the topic
-                    quizzes = db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("quizzes").stream()
-                    for quiz in quizzes:
-                        quiz_data = quiz.to_dict()
-                        quiz_mapping[quiz.id] = quiz_data.get("title", "Unknown Quiz")
-
-                    # Fetch subtopics in the topic
-                    subtopics = db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("subtopics").stream()
-                    for subtopic in subtopics:
-                        subtopic_id = subtopic.id
-
-                        # Fetch quizzes under subtopics
-                        subtopic_quizzes = db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("subtopics").document(subtopic_id).collection("quizzes").stream()
-                        for quiz in subtopic_quizzes:
-                            quiz_data = quiz.to_dict()
-                            quiz_mapping[quiz.id] = quiz_data.get("title", "Unknown Quiz")
-
-            return quiz_mapping
+            return await quiz_index.get_all()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching all quizzes: {str(e)}")
@@ -0,0 +1,175 @@
+import os
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Recommendation prompt settings (overridable via environment)
+# Upper bound of the progress section of the Gemini prompt, in (estimated) tokens
+RECOMMENDATION_PROMPT_TOKEN_BUDGET = int(os.getenv("RECOMMENDATION_PROMPT_TOKEN_BUDGET", "2000"))
+# Rough characters-per-token ratio used for estimates (no tokenizer round trip)
+RECOMMENDATION_PROMPT_CHARS_PER_TOKEN = float(os.getenv("RECOMMENDATION_PROMPT_CHARS_PER_TOKEN", "4"))
+# Score difference between the older and newer half of the attempts reported as a trend
+TREND_THRESHOLD = 5.0
+MAX_NAME_LENGTH = 80
+# Fields that make a dict a progress record (see models.progress_model.ProgressBase)
+PROGRESS_FIELDS = ("course_id", "topic_id", "subtopic_id", "material_id", "quiz_id", "score", "status", "activity_type")
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the token count of a text."""
+    return math.ceil(len(text) / RECOMMENDATION_PROMPT_CHARS_PER_TOKEN)
+
+def flatten_progress(progress_data) -> List[dict]:
+    """
+    Returns the raw progress records, whether given as a list of records or as
+    `fetch_student_performance` summaries (which nest them under `progress_details`).
+    Dicts without progress fields (e.g. the "no quiz progress" message) are skipped.
+    """
+    if isinstance(progress_data, dict):
+        progress_data = [progress_data]
+
+    records = []
+    for item in progress_data or []:
+        if not isinstance(item, dict):
+            continue
+        if isinstance(item.get("progress_details"), list):
+            records.extend(record for record in item["progress_details"] if isinstance(record, dict))
+        elif any(field in item for field in PROGRESS_FIELDS):
+            records.append(item)
+    return records
+
+def _timestamp(record: dict) -> str:
+    """Returns the record timestamp as an ISO string ('' when missing), for ordering."""
+    value = record.get("timestamp")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value) if value else ""
+
+def _name(value: Optional[str], fallback: str) -> str:
+    name = value or fallback
+    return name if len(name) <= MAX_NAME_LENGTH else name[:MAX_NAME_LENGTH - 1] + "…"
+
+def _trend(scores: List[float]) -> Optional[float]:
+    """Mean of the newer half of the attempts minus the mean of the older half."""
+    if len(scores) < 2:
+        return None
+    half = len(scores) // 2
+    older, newer = scores[:half], scores[-half:]
+    return sum(newer) / len(newer) - sum(older) / len(older)
+
+def _trend_label(delta: Optional[float]) -> str:
+    if delta is None:
+        return "n/a"
+    if delta >= TREND_THRESHOLD:
+        return f"improving (+{delta:.0f})"
+    if delta <= -TREND_THRESHOLD:
+        return f"declining ({delta:.0f})"
+    return "steady"
+
+def _group(records: List[dict], key: str) -> Dict[str, List[dict]]:
+    groups: Dict[str, List[dict]] = {}
+    for record in records:
+        if record.get(key):
+            groups.setdefault(record[key], []).append(record)
+    return groups
+
+def _stats(records: List[dict]) -> dict:
+    """Attempts, mean/last score, trend and last-seen date of a group of records (oldest first)."""
+    records = sorted(records, key=_timestamp)
+    scores = [float(r["score"]) for r in records if isinstance(r.get("score"), (int, float))]
+    last_seen = _timestamp(records[-1])[:10] if records else ""
+    return {
+        "activities": len(records),
+        "attempts": len(scores),
+        "mean": sum(scores) / len(scores) if scores else None,
+        "last": scores[-1] if scores else None,
+        "trend": _trend(scores),
+        "completed": sum(1 for r in records if r.get("status") in ("complete", "completed")),
+        "last_seen": last_seen,
+    }
+
+def _signal(stats: dict, recency: float) -> float:
+    """
+    How much an entry tells the tutor: low or declining scores, repeated attempts and recent
+    activity rank high; ungraded or long-finished, well-scored entries are dropped first.
+    """
+    signal = 20.0 * recency + 5.0 * min(stats["attempts"], 5)
+    if stats["mean"] is not None:
+        signal += 100.0 - min(stats["mean"], 100.0)
+    if stats["trend"] is not None:
+        signal += min(abs(stats["trend"]), 50.0)
+    return signal
+
+def _format_scores(stats: dict) -> str:
+    if stats["mean"] is None:
+        return "no scores"
+    return (f"attempts {stats['attempts']}, mean {stats['mean']:.0f}, last {stats['last']:.0f}, "
+            f"trend {_trend_label(stats['trend'])}")
+
+def summarize_progress(records: List[dict], mappings: dict) -> dict:
+    """
+    Compacts progress records into an overview plus one line of statistics per quiz and
+    per topic, each line carrying its signal score.
+    """
+    entries = []
+    for quiz_id, quiz_records in _group(records, "quiz_id").items():
+        stats = _stats(quiz_records)
+        topic_id = quiz_records[-1].get("topic_id")
+        title = quiz_records[-1].get("quiz_title") or mappings.get("quizzes", {}).get(quiz_id)
+        line = f"- Quiz \"{_name(title, quiz_id)}\""
+        if topic_id:
+            line += f" (topic \"{_name(mappings.get('topics', {}).get(topic_id), topic_id)}\")"
+        entries.append({"stats": stats, "line": f"{line}: {_format_scores(stats)}, last seen {stats['last_seen'] or 'n/a'}"})
+
+    for topic_id, topic_records in _group(records, "topic_id").items():
+        stats = _stats(topic_records)
+        course_id = topic_records[-1].get("course_id")
+        line = f"- Topic \"{_name(mappings.get('topics', {}).get(topic_id), topic_id)}\""
+        if course_id:
+            line += f" (course \"{_name(mappings.get('courses', {}).get(course_id), course_id)}\")"
+        entries.append({
+            "stats": stats,
+            "line": (f"{line}: {stats['activities']} activities, {stats['completed']} completed, "
+                     f"{_format_scores(stats)}, last seen {stats['last_seen'] or 'n/a'}"),
+        })
+
+    # Recency as the rank of the last-seen date (1.0 = most recent entry)
+    by_date = {date: rank for rank, date in enumerate(sorted({entry["stats"]["last_seen"] for entry in entries}), 1)}
+    for entry in entries:
+        entry["signal"] = _signal(entry["stats"], by_date[entry["stats"]["last_seen"]] / len(by_date))
+    entries.sort(key=lambda entry: entry["signal"], reverse=True)
+
+    overall = _stats(records)
+    first_seen = _timestamp(min(records, key=_timestamp))[:10] if records else ""
+    overview = (f"{overall['activities']} activities ({overall['completed']} completed) between "
+                f"{first_seen or 'n/a'} and {overall['last_seen'] or 'n/a'}; quiz scores: {_format_scores(overall)}")
+    return {"overview": overview, "entries": entries}
+
+def build_progress_section(progress_data, mappings: dict, token_budget: int = None) -> str:
+    """
+    Renders the student's progress as compact statistics within `token_budget` tokens.
+
+    Entries are added from the highest signal down; whatever does not fit is summarized in a
+    single "omitted" line, so the section stays bounded however long the history is.
+    """
+    token_budget = RECOMMENDATION_PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    records = flatten_progress(progress_data)
+    if not records:
+        return "No progress recorded yet."
+
+    summary = summarize_progress(records, mappings)
+    lines = [f"Overview: {summary['overview']}", "Quizzes and topics (most relevant first):"]
+    # Reserve room for the "omitted" line
+    used = estimate_tokens("\n".join(lines)) + 20
+    included = 0
+    for entry in summary["entries"]:
+        cost = estimate_tokens(entry["line"]) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(entry["line"])
+        used += cost
+        included += 1
+
+    omitted = len(summary["entries"]) - included
+    if omitted:
+        lines.append(f"- ({omitted} lower-signal quizzes/topics omitted)")
+    return "\n".join(lines)
@@ -1,7 +1,6 @@
 import uuid
 from datetime import datetime
 from fastapi import HTTPException
-from firebase_admin import firestore
 from services.course_service import CourseService
 from models.teacher_models import (
     TeacherCourseCreate, TeacherCourseResponse,
@@ -9,45 +8,28 @@ from models.teacher_models import (
     TeacherMaterialCreate, TeacherMaterialResponse
 )
 import utils.firestore_helpers as firestore_helpers
-
-db = firestore.client()
+from utils.async_firestore import async_db, fetch_all, run_blocking
+from services.translation_jobs import translation_jobs, pending_languages, STATUS_PENDING
 
 class TeacherCourseService:
     @staticmethod
     async def create_teacher_course(course: TeacherCourseCreate, teacher_id: str):
         """Creates a new teacher course with multilingual support."""
         course_id = str(uuid.uuid4())
-        course_ref = db.collection("teacher_courses").document(course_id)
+        course_ref = async_db.collection("teacher_courses").document(course_id)
 
-        if course_ref.get().exists:
+        if (await course_ref.get()).exists:
             raise HTTPException(status_code=400, detail="Course already exists")
 
         now = datetime.utcnow()
 
         # Detect language dynamically
         detected_lang = await CourseService.detect_language([course.title, course.description])
-        translations = {
-            detected_lang: {
-                "title": course.title,
-                "description": course.description,
-            }
-        }
+        source_fields = {"title": course.title, "description": course.description}
 
-        # Translate into other languages
+        # Translate into other languages in the background
         target_languages = ["fr", "es", "de", "zh", "ar", "hi", "en"]
-        translation_tasks = {
-            lang: {
-                "title": CourseService.translate_text(course.title, lang),
-                "description": CourseService.translate_text(course.description, lang),
-            }
-            for lang in target_languages
-        }
-
-        for lang in target_languages:
-            translations[lang] = {
-                "title": await translation_tasks[lang]["title"],
-                "description": await translation_tasks[lang]["description"],
-            }
+        translations = pending_languages(source_fields, target_languages, detected_lang)
 
         course_data = {
             "id": course_id,
@@ -56,23 +38,26 @@ class TeacherCourseService:
             "created_at": now,
             "updated_at": now,
             "languages": translations,
+            "translation_status": STATUS_PENDING,
         }
 
-        course_ref.set(course_data)
+        await course_ref.set(course_data)
+        job_id = await translation_jobs.enqueue(course_ref, source_fields, [lang for lang in target_languages if lang != detected_lang])
         
         # Store ID mapping
-        firestore_helpers.FirestoreUtils.store_id_mapping("teacher_courses", course_id, course.title)
+        await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "teacher_courses", course_id, course.title)
 
         return TeacherCourseResponse(
             **course_data,
             title=translations[detected_lang]["title"],
-            description=translations[detected_lang]["description"]
+            description=translations[detected_lang]["description"],
+            translation_job_id=job_id
         )
 
     @staticmethod
-    def get_teacher_courses(teacher_id: str, target_language: str = "en"):
+    async def get_teacher_courses(teacher_id: str, target_language: str = "en"):
         """Fetches teacher courses in the requested language."""
-        courses_ref = db.collection("teacher_courses").where("teacher_id", "==", teacher_id).stream()
+        courses_ref = await fetch_all(async_db.collection("teacher_courses").where("teacher_id", "==", teacher_id))
 
         courses = []
         for doc in courses_ref:
@@ -101,8 +86,8 @@ class TeacherCourseService:
         topic_id = str(uuid.uuid4())
         
         # Verify teacher owns the course
-        course_ref = db.collection("teacher_courses").document(course_id)
-        course_doc = course_ref.get()
+        course_ref = async_db.collection("teacher_courses").document(course_id)
+        course_doc = await course_ref.get()
         
         if not course_doc.exists:
             raise HTTPException(status_code=404, detail="Course not found")
@@ -113,44 +98,37 @@ class TeacherCourseService:
 
         detected_lang = await CourseService.detect_language([topic.title, topic.description or ""])
 
-        languages = {
-            detected_lang: {"title": topic.title, "description": topic.description or ""}
-        }
-
+        source_fields = {"title": topic.title, "description": topic.description or ""}
         target_languages = ["fr", "es", "de", "zh", "ar", "hi", "en"]
-        translation_tasks = {
-            lang: {
-                "title": CourseService.translate_text(topic.title, lang),
-                "description": CourseService.translate_text(topic.description or "", lang),
-            }
-            for lang in target_languages
-        }
-
-        for lang in target_languages:
-            languages[lang] = {
-                "title": await translation_tasks[lang]["title"],
-                "description": await translation_tasks[lang]["description"],
-            }
+        languages = pending_languages(source_fields, target_languages, detected_lang)
 
         topic_data = {
             "id": topic_id,
             "course_id": course_id,
             "created_at": datetime.utcnow(),
             "languages": languages,
+            "translation_status": STATUS_PENDING,
         }
 
-        db.collection("teacher_courses").document(course_id).collection("topics").document(topic_id).set(topic_data)
+        ref = async_db.collection("teacher_courses").document(course_id).collection("topics").document(topic_id)
+        await ref.set(topic_data)
+        job_id = await translation_jobs.enqueue(ref, source_fields, [lang for lang in target_languages if lang != detected_lang])
         
-        firestore_helpers.FirestoreUtils.store_id_mapping("teacher_topics", topic_id, topic.title)
+        await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "teacher_topics", topic_id, topic.title)
 
-        return {"message": "Topic created successfully", "topic_id": topic_id}
+        return {
+            "message": "Topic created successfully",
+            "topic_id": topic_id,
+            "translation_status": STATUS_PENDING,
+            "translation_job_id": job_id,
+        }
 
     @staticmethod
-    def get_teacher_course_topics(course_id: str, teacher_id: str, target_language: str = "en"):
+    async def get_teacher_course_topics(course_id: str, teacher_id: str, target_language: str = "en"):
         """Fetches all topics for a teacher course."""
         # Verify teacher owns the course
-        course_ref = db.collection("teacher_courses").document(course_id)
-        course_doc = course_ref.get()
+        course_ref = async_db.collection("teacher_courses").document(course_id)
+        course_doc = await course_ref.get()
         
         if not course_doc.exists:
             raise HTTPException(status_code=404, detail="Course not found")
@@ -159,7 +137,7 @@ class TeacherCourseService:
         if course_data["teacher_id"] != teacher_id:
             raise HTTPException(status_code=403, detail="Not authorized to access this course")
 
-        topics_ref = db.collection("teacher_courses").document(course_id).collection("topics").stream()
+        topics_ref = await fetch_all(async_db.collection("teacher_courses").document(course_id).collection("topics"))
         topics = []
 
         for topic in topics_ref:
@@ -189,8 +167,8 @@ class TeacherCourseService:
     ) -> TeacherMaterialResponse:
         """Adds a material to teacher topic."""
         # Verify teacher owns the course
-        course_ref = db.collection("teacher_courses").document(course_id)
-        course_doc = course_ref.get()
+        course_ref = async_db.collection("teacher_courses").document(course_id)
+        course_doc = await course_ref.get()
         
         if not course_doc.exists:
             raise HTTPException(status_code=404, detail="Course not found")
@@ -213,32 +191,17 @@ class TeacherCourseService:
             if any(text_fields):
                 detected_lang = await CourseService.detect_language(text_fields) or "en"
 
-            languages = {
-                detected_lang: {
-                    "content": material.get("content", ""),
-                    "optional_text": material.get("optional_text", ""),
-                }
+            source_fields = {
+                "content": material.get("content", ""),
+                "optional_text": material.get("optional_text", ""),
             }
 
             target_languages = ["fr", "es", "de", "zh", "ar", "hi", "en"]
-            translation_tasks = {
-                lang: {
-                    "content": CourseService.translate_text(material["content"], lang) if material["type"] == "text" else None,
-                    "optional_text": CourseService.translate_text(material["optional_text"], lang) if material.get("optional_text") else None,
-                }
-                for lang in target_languages
-            }
-
-            for lang in target_languages:
-                languages[lang] = {
-                    "content": await translation_tasks[lang]["content"] if translation_tasks[lang]["content"] else material["content"],
-                    "optional_text": await translation_tasks[lang]["optional_text"] if translation_tasks[lang]["optional_text"] else "",
-                }
-
-            material["languages"] = languages
+            material["languages"] = pending_languages(source_fields, target_languages, detected_lang)
+            material["translation_status"] = STATUS_PENDING
 
             ref = (
-                db.collection("teacher_courses")
+                async_db.collection("teacher_courses")
                 .document(course_id)
                 .collection("topics")
                 .document(topic_id)
@@ -246,9 +209,18 @@ class TeacherCourseService:
                 .document(material_id)
             )
 
-            ref.set(material, merge=True)
+            await ref.set(material, merge=True)
+            material["translation_job_id"] = await translation_jobs.enqueue(
+                ref,
+                {
+                    "content": material["content"] if material["type"] == "text" else None,
+                    "optional_text": material.get("optional_text") or None,
+                },
+                [lang for lang in target_languages if lang != detected_lang],
+                fallbacks={"content": material["content"], "optional_text": ""}
+            )
             
-            firestore_helpers.FirestoreUtils.store_id_mapping("teacher_materials", material_id, material["content"])
+            await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "teacher_materials", material_id, material["content"])
 
             return TeacherMaterialResponse(**material)
 
@@ -256,7 +228,7 @@ class TeacherCourseService:
             raise HTTPException(status_code=500, detail=f"Error adding material: {str(e)}")
 
     @staticmethod
-    def get_teacher_materials(
+    async def get_teacher_materials(
         course_id: str, 
         topic_id: str, 
         teacher_id: str,
@@ -264,8 +236,8 @@ class TeacherCourseService:
     ) -> list[TeacherMaterialResponse]:
         """Fetches all materials under a teacher topic."""
         # Verify teacher owns the course
-        course_ref = db.collection("teacher_courses").document(course_id)
-        course_doc = course_ref.get()
+        course_ref = async_db.collection("teacher_courses").document(course_id)
+        course_doc = await course_ref.get()
         
         if not course_doc.exists:
             raise HTTPException(status_code=404, detail="Course not found")
@@ -276,14 +248,14 @@ class TeacherCourseService:
 
         try:
             ref = (
-                db.collection("teacher_courses")
+                async_db.collection("teacher_courses")
                 .document(course_id)
                 .collection("topics")
                 .document(topic_id)
                 .collection("materials")
             )
 
-            materials = ref.stream()
+            materials = await fetch_all(ref)
             material_list = []
 
             for material in materials:
@@ -1,11 +1,9 @@
 import uuid
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-from firebase_admin import firestore
 from fastapi import HTTPException
 from collections import defaultdict
-
-db = firestore.client()
+from utils.async_firestore import async_db, fetch_all, count
 
 class TeacherExamService:
     
@@ -15,7 +13,7 @@ class TeacherExamService:
         try:
             # Verify teacher has access to the class
             from services.teacher_service import TeacherService
-            teacher_classes = TeacherService.get_teacher_allotted_classes(teacher_id)
+            teacher_classes = await TeacherService.get_teacher_allotted_classes(teacher_id)
             if exam_data["class_name"] not in teacher_classes:
                 raise HTTPException(status_code=403, detail="Not authorized to create exam for this class")
             
@@ -43,8 +41,8 @@ class TeacherExamService:
             }
             
             # Store exam in Firestore
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_ref.set(exam_doc)
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            await exam_ref.set(exam_doc)
             
             # Add quiz questions
             for i, question in enumerate(exam_data.get("quiz_questions", [])):
@@ -83,7 +81,7 @@ class TeacherExamService:
             "created_at": datetime.utcnow()
         }
         
-        db.collection("teacher_exams").document(exam_id).collection("questions").document(question_id).set(question_doc)
+        await async_db.collection("teacher_exams").document(exam_id).collection("questions").document(question_id).set(question_doc)
     
     @staticmethod
     async def _add_subjective_question_internal(exam_id: str, question_data: Dict, question_number: int):
@@ -101,28 +99,27 @@ class TeacherExamService:
             "created_at": datetime.utcnow()
         }
         
-        db.collection("teacher_exams").document(exam_id).collection("questions").document(question_id).set(question_doc)
+        await async_db.collection("teacher_exams").document(exam_id).collection("questions").document(question_id).set(question_doc)
     
     @staticmethod
     async def get_teacher_exams(teacher_id: str, class_name: str = None) -> List[Dict[str, Any]]:
         """Get all exams created by teacher."""
         try:
-            query = db.collection("teacher_exams").where("teacher_id", "==", teacher_id)
+            query = async_db.collection("teacher_exams").where("teacher_id", "==", teacher_id)
             if class_name:
                 query = query.where("class_name", "==", class_name)
             
-            exams_ref = query.stream()
+            exams_ref = await fetch_all(query)
             exams = []
             
             for exam_doc in exams_ref:
                 exam_data = exam_doc.to_dict()
                 
                 # Get submission count
-                submissions_count = len(list(
-                    db.collection("exam_submissions")
+                submissions_count = await count(
+                    async_db.collection("exam_submissions")
                     .where("exam_id", "==", exam_doc.id)
-                    .stream()
-                ))
+                )
                 
                 exam_summary = {
                     "id": exam_data["id"],
@@ -152,8 +149,8 @@ class TeacherExamService:
         """Get detailed exam information with all questions."""
         try:
             # Get exam document
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -165,7 +162,7 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized to view this exam")
             
             # Get all questions
-            questions_ref = exam_ref.collection("questions").order_by("question_number").stream()
+            questions_ref = await fetch_all(exam_ref.collection("questions").order_by("question_number"))
             questions = []
             
             for question_doc in questions_ref:
@@ -190,8 +187,8 @@ class TeacherExamService:
         """Add a quiz question to an existing exam."""
         try:
             # Verify exam ownership
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -201,14 +198,14 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Get next question number
-            questions_count = len(list(exam_ref.collection("questions").stream()))
+            questions_count = await count(exam_ref.collection("questions"))
             next_question_number = questions_count + 1
             
             # Add question
             await TeacherExamService._add_quiz_question_internal(exam_id, question_data, next_question_number)
             
             # Update exam totals
-            exam_ref.update({
+            await exam_ref.update({
                 "quiz_questions_count": exam_data.get("quiz_questions_count", 0) + 1,
                 "total_questions": exam_data.get("total_questions", 0) + 1,
                 "total_marks": exam_data.get("total_marks", 0) + question_data.get("marks", 1),
@@ -227,8 +224,8 @@ class TeacherExamService:
         """Add a subjective question to an existing exam."""
         try:
             # Verify exam ownership
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -238,14 +235,14 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Get next question number
-            questions_count = len(list(exam_ref.collection("questions").stream()))
+            questions_count = await count(exam_ref.collection("questions"))
             next_question_number = questions_count + 1
             
             # Add question
             await TeacherExamService._add_subjective_question_internal(exam_id, question_data, next_question_number)
             
             # Update exam totals
-            exam_ref.update({
+            await exam_ref.update({
                 "subjective_questions_count": exam_data.get("subjective_questions_count", 0) + 1,
                 "total_questions": exam_data.get("total_questions", 0) + 1,
                 "total_marks": exam_data.get("total_marks", 0) + question_data.get("marks", 5),
@@ -263,8 +260,8 @@ class TeacherExamService:
     async def publish_exam(exam_id: str, teacher_id: str) -> Dict[str, Any]:
         """Publish an exam to make it available to students."""
         try:
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -274,12 +271,12 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Check if exam has questions
-            questions_count = len(list(exam_ref.collection("questions").stream()))
+            questions_count = await count(exam_ref.collection("questions"))
             if questions_count == 0:
                 raise HTTPException(status_code=400, detail="Cannot publish exam without questions")
             
             # Publish exam
-            exam_ref.update({
+            await exam_ref.update({
                 "is_published": True,
                 "published_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
@@ -297,8 +294,8 @@ class TeacherExamService:
         """Get all submissions for an exam."""
         try:
             # Verify exam ownership
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -308,15 +305,15 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Get submissions
-            submissions_ref = db.collection("exam_submissions").where("exam_id", "==", exam_id).stream()
+            submissions_ref = await fetch_all(async_db.collection("exam_submissions").where("exam_id", "==", exam_id))
             submissions = []
             
             for submission_doc in submissions_ref:
                 submission_data = submission_doc.to_dict()
                 
                 # Get student info
-                student_ref = db.collection("users").document(submission_data["student_id"])
-                student_doc = student_ref.get()
+                student_ref = async_db.collection("users").document(submission_data["student_id"])
+                student_doc = await student_ref.get()
                 student_name = "Unknown Student"
                 if student_doc.exists:
                     student_name = student_doc.to_dict().get("name", "Unknown Student")
@@ -350,8 +347,8 @@ class TeacherExamService:
         """Get analytics for an exam."""
         try:
             # Verify exam ownership
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -361,7 +358,7 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Get submissions for analytics
-            submissions_ref = db.collection("exam_submissions").where("exam_id", "==", exam_id).stream()
+            submissions_ref = await fetch_all(async_db.collection("exam_submissions").where("exam_id", "==", exam_id))
             submissions = [doc.to_dict() for doc in submissions_ref]
             
             if not submissions:
@@ -415,8 +412,8 @@ class TeacherExamService:
     async def delete_exam(exam_id: str, teacher_id: str) -> Dict[str, Any]:
         """Delete an exam if no submissions exist."""
         try:
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -426,17 +423,17 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Check for existing submissions
-            submissions = list(db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1).stream())
+            submissions = await fetch_all(async_db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1))
             if submissions:
                 raise HTTPException(status_code=400, detail="Cannot delete exam with existing submissions")
             
             # Delete all questions first
-            questions_ref = exam_ref.collection("questions").stream()
+            questions_ref = await fetch_all(exam_ref.collection("questions"))
             for question in questions_ref:
-                question.reference.delete()
+                await question.reference.delete()
             
             # Delete exam document
-            exam_ref.delete()
+            await exam_ref.delete()
             
             return {"message": "Exam deleted successfully"}
             
@@ -449,8 +446,8 @@ class TeacherExamService:
     async def update_exam(exam_id: str, update_data: Dict[str, Any], teacher_id: str) -> Dict[str, Any]:
         """Update exam information."""
         try:
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -461,7 +458,7 @@ class TeacherExamService:
             
             # Check if exam is published and has submissions
             if exam_data.get("is_published") and update_data.get("is_published") is False:
-                submissions = list(db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1).stream())
+                submissions = await fetch_all(async_db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1))
                 if submissions:
                     raise HTTPException(status_code=400, detail="Cannot unpublish exam with existing submissions")
             
@@ -469,7 +466,7 @@ class TeacherExamService:
             update_fields = {k: v for k, v in update_data.items() if v is not None}
             update_fields["updated_at"] = datetime.utcnow()
             
-            exam_ref.update(update_fields)
+            await exam_ref.update(update_fields)
             
             return {"message": "Exam updated successfully", "updated_fields": list(update_fields.keys())}
             
@@ -482,8 +479,8 @@ class TeacherExamService:
     async def remove_question(exam_id: str, question_id: str, teacher_id: str) -> Dict[str, Any]:
         """Remove a question from an exam."""
         try:
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -493,13 +490,13 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Check if exam has submissions
-            submissions = list(db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1).stream())
+            submissions = await fetch_all(async_db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1))
             if submissions:
                 raise HTTPException(status_code=400, detail="Cannot modify exam with existing submissions")
             
             # Get question to determine type and marks
             question_ref = exam_ref.collection("questions").document(question_id)
-            question_doc = question_ref.get()
+            question_doc = await question_ref.get()
             
             if not question_doc.exists:
                 raise HTTPException(status_code=404, detail="Question not found")
@@ -509,7 +506,7 @@ class TeacherExamService:
             marks = question_data.get("marks", 1)
             
             # Delete question
-            question_ref.delete()
+            await question_ref.delete()
             
             # Update exam counters
             update_data = {
@@ -523,7 +520,7 @@ class TeacherExamService:
             else:
                 update_data["subjective_questions_count"] = max(0, exam_data.get("subjective_questions_count", 1) - 1)
             
-            exam_ref.update(update_data)
+            await exam_ref.update(update_data)
             
             return {"message": "Question removed successfully"}
             
@@ -536,8 +533,8 @@ class TeacherExamService:
     async def unpublish_exam(exam_id: str, teacher_id: str) -> Dict[str, Any]:
         """Unpublish an exam."""
         try:
-            exam_ref = db.collection("teacher_exams").document(exam_id)
-            exam_doc = exam_ref.get()
+            exam_ref = async_db.collection("teacher_exams").document(exam_id)
+            exam_doc = await exam_ref.get()
             
             if not exam_doc.exists:
                 raise HTTPException(status_code=404, detail="Exam not found")
@@ -547,11 +544,11 @@ class TeacherExamService:
                 raise HTTPException(status_code=403, detail="Not authorized")
             
             # Check for submissions
-            submissions = list(db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1).stream())
+            submissions = await fetch_all(async_db.collection("exam_submissions").where("exam_id", "==", exam_id).limit(1))
             if submissions:
                 raise HTTPException(status_code=400, detail="Cannot unpublish exam with existing submissions")
             
-            exam_ref.update({
+            await exam_ref.update({
                 "is_published": False,
                 "updated_at": datetime.utcnow()
             })
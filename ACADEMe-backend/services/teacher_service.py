@@ -3,23 +3,29 @@ from datetime import datetime
 from typing import List, Dict, Any
 from fastapi import HTTPException
 from firebase_admin import firestore
+from utils.async_firestore import async_db, fetch_all
 from services.accurate_progress_service import AccurateProgressService
+from services.progress_aggregates import get_aggregates, empty_aggregate, completion_rate, average_quiz_score
+from utils.fan_out import FanOutResult
+from utils.identity_cache import identity_cache
 from models.teacher_models import (
     LiveClassCreate, LiveClassResponse,
     TeacherProfileResponse, TeacherProfileUpdate, TeacherPreferencesUpdate,
     ClassAnalytics, StudentInfo
 )
 
-db = firestore.client()
-
 class TeacherService:
     @staticmethod
-    def get_teacher_allotted_classes(teacher_id: str) -> List[str]:
+    async def get_teacher_allotted_classes(teacher_id: str) -> List[str]:
         """Get allotted classes for a teacher."""
+        cached_classes = identity_cache.get_allotted_classes(teacher_id)
+        if cached_classes is not None:
+            return cached_classes
+
         try:
             # Get user email first
-            user_ref = db.collection("users").document(teacher_id)
-            user_doc = user_ref.get()
+            user_ref = async_db.collection("users").document(teacher_id)
+            user_doc = await user_ref.get()
 
             if not user_doc.exists:
                 raise HTTPException(status_code=404, detail="User not found")
@@ -29,28 +35,42 @@ class TeacherService:
                 raise HTTPException(status_code=400, detail="User email not found")
 
             # Get teacher profile using email as document ID
-            teacher_ref = db.collection("teacher_profiles").document(email)
-            teacher_doc = teacher_ref.get()
+            teacher_ref = async_db.collection("teacher_profiles").document(email)
+            teacher_doc = await teacher_ref.get()
 
             if not teacher_doc.exists:
                 raise HTTPException(status_code=404, detail="Teacher profile not found")
 
             teacher_data = teacher_doc.to_dict()
-            return teacher_data.get("allotted_classes", [])
+            allotted_classes = teacher_data.get("allotted_classes", [])
+            identity_cache.set_allotted_classes(teacher_id, allotted_classes, email)
+            return allotted_classes
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching allotted classes: {str(e)}")
 
     @staticmethod
-    def get_students_by_class(class_name: str) -> List[StudentInfo]:
+    async def _load_class_progress(class_name: str) -> tuple[list, FanOutResult]:
+        """
+        Loads the students of a class and their progress aggregates.
+
+        Aggregates come from one batched read; missing ones are backfilled in parallel
+        (bounded concurrency + deadline), so students whose backfill did not finish are
+        reported in the returned FanOutResult instead of failing the whole class.
+        """
+        users_ref = await fetch_all(async_db.collection("users").where("student_class", "==", class_name))
+        outcome = await get_aggregates([user.id for user in users_ref])
+        return users_ref, outcome
+
+    @staticmethod
+    async def get_students_by_class(class_name: str) -> List[StudentInfo]:
         """Get all students in a specific class."""
         try:
-            users_ref = db.collection("users").where("student_class", "==", class_name).stream()
+            users_ref, outcome = await TeacherService._load_class_progress(class_name)
             students = []
             
             for user in users_ref:
                 user_data = user.to_dict()
-                # Calculate progress (you can customize this logic)
-                progress = TeacherService._calculate_student_progress(user.id)
+                progress = completion_rate(outcome.results.get(user.id, empty_aggregate()))
                 
                 students.append(StudentInfo(
                     id=user.id,
@@ -66,33 +86,15 @@ class TeacherService:
             raise HTTPException(status_code=500, detail=f"Error fetching students: {str(e)}")
 
     @staticmethod
-    def _calculate_student_progress(student_id: str) -> float:
-        """Calculate overall progress for a student."""
-        try:
-            progress_ref = db.collection("users").document(student_id).collection("progress")
-            progress_docs = list(progress_ref.stream())
-            
-            if not progress_docs:
-                return 0.0
-            
-            completed_count = sum(1 for doc in progress_docs 
-                                 if doc.to_dict().get("status") == "completed")
-            total_count = len(progress_docs)
-            
-            return (completed_count / total_count) * 100 if total_count > 0 else 0.0
-        except:
-            return 0.0
-
-    @staticmethod
-    def get_class_analytics(class_name: str, teacher_id: str) -> ClassAnalytics:
+    async def get_class_analytics(class_name: str, teacher_id: str) -> ClassAnalytics:
         """Get analytics for a specific class."""
         try:
             # Verify teacher has access to this class
-            teacher_classes = TeacherService.get_teacher_allotted_classes(teacher_id)
+            teacher_classes = await TeacherService.get_teacher_allotted_classes(teacher_id)
             if class_name not in teacher_classes:
                 raise HTTPException(status_code=403, detail="Not authorized to view this class")
             
-            students = TeacherService.get_students_by_class(class_name)
+            students = await TeacherService.get_students_by_class(class_name)
             total_students = len(students)
             
             if total_students == 0:
@@ -127,7 +129,7 @@ class TeacherService:
             raise HTTPException(status_code=500, detail=f"Error fetching class analytics: {str(e)}")
 
     @staticmethod
-    def schedule_live_class(class_data: LiveClassCreate, teacher_id: str) -> LiveClassResponse:
+    async def schedule_live_class(class_data: LiveClassCreate, teacher_id: str) -> LiveClassResponse:
         """Schedule a new live class."""
         try:
             class_id = str(uuid.uuid4())
@@ -147,28 +149,27 @@ class TeacherService:
                 "created_at": datetime.utcnow()
             }
             
-            db.collection("live_classes").document(class_id).set(class_dict)
+            await async_db.collection("live_classes").document(class_id).set(class_dict)
             
             return LiveClassResponse(**class_dict)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error scheduling class: {str(e)}")
 
     @staticmethod
-    def get_upcoming_classes(teacher_id: str) -> List[LiveClassResponse]:
+    async def get_upcoming_classes(teacher_id: str) -> List[LiveClassResponse]:
         """Get upcoming live classes for a teacher."""
         try:
             now = datetime.utcnow()
             classes_ref = (
-                db.collection("live_classes")
+                async_db.collection("live_classes")
                 .where("teacher_id", "==", teacher_id)
                 .where("status", "in", ["scheduled", "live"])
                 .where("scheduled_time", ">=", now)
                 .order_by("scheduled_time")
-                .stream()
             )
             
             classes = []
-            for cls in classes_ref:
+            for cls in await fetch_all(classes_ref):
                 class_data = cls.to_dict()
                 classes.append(LiveClassResponse(**class_data))
             
@@ -177,20 +178,19 @@ class TeacherService:
             raise HTTPException(status_code=500, detail=f"Error fetching upcoming classes: {str(e)}")
 
     @staticmethod
-    def get_recorded_classes(teacher_id: str) -> List[LiveClassResponse]:
+    async def get_recorded_classes(teacher_id: str) -> List[LiveClassResponse]:
         """Get recorded classes for a teacher."""
         try:
             classes_ref = (
-                db.collection("live_classes")
+                async_db.collection("live_classes")
                 .where("teacher_id", "==", teacher_id)
                 .where("status", "==", "completed")
                 .where("recording_url", "!=", None)
                 .order_by("scheduled_time", direction=firestore.Query.DESCENDING)
-                .stream()
             )
             
             classes = []
-            for cls in classes_ref:
+            for cls in await fetch_all(classes_ref):
                 class_data = cls.to_dict()
                 classes.append(LiveClassResponse(**class_data))
             
@@ -199,11 +199,11 @@ class TeacherService:
             raise HTTPException(status_code=500, detail=f"Error fetching recorded classes: {str(e)}")
 
     @staticmethod
-    def start_class(class_id: str, teacher_id: str) -> Dict[str, Any]:
+    async def start_class(class_id: str, teacher_id: str) -> Dict[str, Any]:
         """Start a live class."""
         try:
-            class_ref = db.collection("live_classes").document(class_id)
-            class_doc = class_ref.get()
+            class_ref = async_db.collection("live_classes").document(class_id)
+            class_doc = await class_ref.get()
             
             if not class_doc.exists:
                 raise HTTPException(status_code=404, detail="Class not found")
@@ -217,7 +217,7 @@ class TeacherService:
                 raise HTTPException(status_code=400, detail="Class cannot be started")
             
             # Update class status to live
-            class_ref.update({
+            await class_ref.update({
                 "status": "live",
                 "actual_start_time": datetime.utcnow()
             })
@@ -229,11 +229,11 @@ class TeacherService:
             raise HTTPException(status_code=500, detail=f"Error starting class: {str(e)}")
 
     @staticmethod
-    def share_recording(class_id: str, recording_url: str, teacher_id: str) -> Dict[str, Any]:
+    async def share_recording(class_id: str, recording_url: str, teacher_id: str) -> Dict[str, Any]:
         """Share recording of a completed class."""
         try:
-            class_ref = db.collection("live_classes").document(class_id)
-            class_doc = class_ref.get()
+            class_ref = async_db.collection("live_classes").document(class_id)
+            class_doc = await class_ref.get()
             
             if not class_doc.exists:
                 raise HTTPException(status_code=404, detail="Class not found")
@@ -244,7 +244,7 @@ class TeacherService:
                 raise HTTPException(status_code=403, detail="Not authorized to update this class")
             
             # Update class with recording URL and mark as completed
-            class_ref.update({
+            await class_ref.update({
                 "recording_url": recording_url,
                 "status": "completed",
                 "completed_at": datetime.utcnow()
@@ -257,12 +257,12 @@ class TeacherService:
             raise HTTPException(status_code=500, detail=f"Error sharing recording: {str(e)}")
 
     @staticmethod
-    def get_teacher_profile(teacher_id: str) -> TeacherProfileResponse:
+    async def get_teacher_profile(teacher_id: str) -> TeacherProfileResponse:
         """Get teacher profile."""
         try:
             # First get user to find their email
-            user_ref = db.collection("users").document(teacher_id)
-            user_doc = user_ref.get()
+            user_ref = async_db.collection("users").document(teacher_id)
+            user_doc = await user_ref.get()
 
             if not user_doc.exists:
                 raise HTTPException(status_code=404, detail="User not found")
@@ -274,8 +274,8 @@ class TeacherService:
                 raise HTTPException(status_code=400, detail="User email not found")
 
             # Get teacher profile using email as document ID
-            teacher_ref = db.collection("teacher_profiles").document(email)
-            teacher_doc = teacher_ref.get()
+            teacher_ref = async_db.collection("teacher_profiles").document(email)
+            teacher_doc = await teacher_ref.get()
 
             if not teacher_doc.exists:
                 # Create default profile if doesn't exist
@@ -298,7 +298,7 @@ class TeacherService:
                     }
                 }
 
-                teacher_ref.set(default_profile)
+                await teacher_ref.set(default_profile)
                 return TeacherProfileResponse(**default_profile)
 
             teacher_data = teacher_doc.to_dict()
@@ -311,12 +311,12 @@ class TeacherService:
             raise HTTPException(status_code=500, detail=f"Error fetching teacher profile: {str(e)}")
 
     @staticmethod
-    def update_teacher_profile(teacher_id: str, profile_data: TeacherProfileUpdate) -> Dict[str, Any]:
+    async def update_teacher_profile(teacher_id: str, profile_data: TeacherProfileUpdate) -> Dict[str, Any]:
         """Update teacher profile."""
         try:
             # Get user email first
-            user_ref = db.collection("users").document(teacher_id)
-            user_doc = user_ref.get()
+            user_ref = async_db.collection("users").document(teacher_id)
+            user_doc = await user_ref.get()
 
             if not user_doc.exists:
                 raise HTTPException(status_code=404, detail="User not found")
@@ -325,29 +325,29 @@ class TeacherService:
             if not email:
                 raise HTTPException(status_code=400, detail="User email not found")
 
-            teacher_ref = db.collection("teacher_profiles").document(email)
+            teacher_ref = async_db.collection("teacher_profiles").document(email)
 
             # Get current profile or create if doesn't exist
-            teacher_doc = teacher_ref.get()
+            teacher_doc = await teacher_ref.get()
             if not teacher_doc.exists:
-                TeacherService.get_teacher_profile(teacher_id)  # This will create default profile
+                await TeacherService.get_teacher_profile(teacher_id)  # This will create default profile
 
             # Update only provided fields
             update_data = profile_data.dict(exclude_unset=True)
             if update_data:
-                teacher_ref.update(update_data)
+                await teacher_ref.update(update_data)
 
             return {"message": "Profile updated successfully"}
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error updating profile: {str(e)}")
 
     @staticmethod
-    def update_teacher_preferences(teacher_id: str, preferences: TeacherPreferencesUpdate) -> Dict[str, Any]:
+    async def update_teacher_preferences(teacher_id: str, preferences: TeacherPreferencesUpdate) -> Dict[str, Any]:
         """Update teacher preferences."""
         try:
             # Get user email first
-            user_ref = db.collection("users").document(teacher_id)
-            user_doc = user_ref.get()
+            user_ref = async_db.collection("users").document(teacher_id)
+            user_doc = await user_ref.get()
 
             if not user_doc.exists:
                 raise HTTPException(status_code=404, detail="User not found")
@@ -356,12 +356,12 @@ class TeacherService:
             if not email:
                 raise HTTPException(status_code=400, detail="User email not found")
 
-            teacher_ref = db.collection("teacher_profiles").document(email)
+            teacher_ref = async_db.collection("teacher_profiles").document(email)
 
             # Update only provided fields
             update_data = preferences.dict(exclude_unset=True)
             if update_data:
-                teacher_ref.update(update_data)
+                await teacher_ref.update(update_data)
 
             return {"message": "Preferences updated successfully"}
         except Exception as e:
@@ -372,8 +372,8 @@ class TeacherService:
         """Get detailed progress for a specific student (teacher access)."""
         try:
             # First verify the student exists and get their class
-            student_ref = db.collection("users").document(student_id)
-            student_doc = student_ref.get()
+            student_ref = async_db.collection("users").document(student_id)
+            student_doc = await student_ref.get()
             
             if not student_doc.exists:
                 raise HTTPException(status_code=404, detail="Student not found")
@@ -382,15 +382,13 @@ class TeacherService:
             student_class = student_data.get("student_class")
             
             # Verify teacher has access to this student's class
-            teacher_classes = TeacherService.get_teacher_allotted_classes(teacher_id)
+            teacher_classes = await TeacherService.get_teacher_allotted_classes(teacher_id)
             if student_class not in teacher_classes:
                 raise HTTPException(status_code=403, detail="Not authorized to view this student's progress")
             
             # Get student's progress data
-            import asyncio
-            loop = asyncio.get_running_loop()
-            progress_ref = db.collection("users").document(student_id).collection("progress")
-            progress_docs = await loop.run_in_executor(None, lambda: list(progress_ref.stream()))
+            progress_ref = async_db.collection("users").document(student_id).collection("progress")
+            progress_docs = await fetch_all(progress_ref)
             
             progress_list = []
             for doc in progress_docs:
@@ -425,8 +423,8 @@ class TeacherService:
     async def get_class_progress_overview(class_name: str, teacher_id: str) -> Dict[str, Any]:
         """Get progress overview for all students in a class."""
         try:
-            # Get all students in the class
-            students = TeacherService.get_students_by_class(class_name)
+            # Get all students in the class with their progress aggregates
+            students, outcome = await TeacherService._load_class_progress(class_name)
             
             if not students:
                 return {
@@ -442,51 +440,41 @@ class TeacherService:
             
             students_progress = []
             completion_rates = []
-            quiz_scores = []
+            quiz_score_sum = 0.0
+            quiz_score_count = 0
             active_count = 0
-            
-            import asyncio
-            loop = asyncio.get_running_loop()
-            
-            for student in students:
-                # Get student progress
-                progress_ref = db.collection("users").document(student.id).collection("progress")
-                progress_docs = await loop.run_in_executor(None, lambda ref=progress_ref: list(ref.stream()))
-                
-                total_activities = len(progress_docs)
-                completed_activities = sum(1 for doc in progress_docs if doc.to_dict().get("status") == "completed")
-                completion_rate = (completed_activities / total_activities * 100) if total_activities > 0 else 0.0
-                
-                student_quiz_scores = []
-                for doc in progress_docs:
-                    progress_data = doc.to_dict()
-                    if progress_data.get("activity_type") == "quiz" and progress_data.get("score") is not None:
-                        student_quiz_scores.append(progress_data["score"])
+
+            for student_doc in students:
+                student = student_doc.to_dict()
+                aggregate = outcome.results.get(student_doc.id, empty_aggregate())
                 
-                avg_quiz_score = sum(student_quiz_scores) / len(student_quiz_scores) if student_quiz_scores else 0.0
+                total_activities = aggregate["total_activities"]
+                completed_activities = aggregate["completed_activities"]
+                student_completion_rate = completion_rate(aggregate)
+                avg_quiz_score = average_quiz_score(aggregate)
                 
-                if completion_rate > 0:
+                if student_completion_rate > 0:
                     active_count += 1
                 
                 students_progress.append({
-                    "student_id": student.id,
-                    "student_name": student.name,
-                    "student_email": student.email,
-                    "photo_url": student.photo_url,
+                    "student_id": student_doc.id,
+                    "student_name": student.get("name", "Unknown"),
+                    "student_email": student.get("email", ""),
+                    "photo_url": student.get("photo_url"),
                     "total_activities": total_activities,
                     "completed_activities": completed_activities,
-                    "completion_rate": completion_rate,
+                    "completion_rate": student_completion_rate,
                     "average_quiz_score": avg_quiz_score,
-                    "last_active": student.last_active
+                    "last_active": student.get("last_active")
                 })
                 
-                completion_rates.append(completion_rate)
-                if student_quiz_scores:
-                    quiz_scores.extend(student_quiz_scores)
+                completion_rates.append(student_completion_rate)
+                quiz_score_sum += aggregate["quiz_score_sum"]
+                quiz_score_count += aggregate["quiz_score_count"]
             
             # Calculate class averages
             avg_completion_rate = sum(completion_rates) / len(completion_rates) if completion_rates else 0.0
-            avg_quiz_score = sum(quiz_scores) / len(quiz_scores) if quiz_scores else 0.0
+            avg_quiz_score = quiz_score_sum / quiz_score_count if quiz_score_count else 0.0
             
             return {
                 "class_name": class_name,
@@ -496,7 +484,8 @@ class TeacherService:
                     "avg_completion_rate": avg_completion_rate,
                     "avg_quiz_score": avg_quiz_score,
                     "active_students": active_count
-                }
+                },
+                "progress_report": outcome.report()
             }
             
         except Exception as e:
@@ -507,8 +496,8 @@ class TeacherService:
         """Get detailed analytics for a specific student including visual data."""
         try:
             # First verify access
-            student_ref = db.collection("users").document(student_id)
-            student_doc = student_ref.get()
+            student_ref = async_db.collection("users").document(student_id)
+            student_doc = await student_ref.get()
             
             if not student_doc.exists:
                 raise HTTPException(status_code=404, detail="Student not found")
@@ -517,7 +506,7 @@ class TeacherService:
             student_class = student_data.get("student_class")
             
             # Verify teacher has access
-            teacher_classes = TeacherService.get_teacher_allotted_classes(teacher_id)
+            teacher_classes = await TeacherService.get_teacher_allotted_classes(teacher_id)
             if student_class not in teacher_classes:
                 raise HTTPException(status_code=403, detail="Not authorized to view this student's analytics")
             
@@ -525,7 +514,7 @@ class TeacherService:
             from services.progress_service import get_progress_visuals, fetch_progress_from_firestore
             
             # Get progress data and generate visuals
-            progress_data = fetch_progress_from_firestore(student_id)
+            progress_data = await fetch_progress_from_firestore(student_id)
             visual_data = get_progress_visuals(progress_data)
             
             # Get basic progress info
@@ -558,23 +547,23 @@ class TeacherService:
     async def get_class_progress_summary(class_name: str) -> Dict[str, Any]:
         """Get optimized progress summary for all students in a class."""
         try:
-            # Get all students in class
-            students_ref = list(db.collection("users").where("student_class", "==", class_name).stream())
+            # Get all students in class with their full-history progress aggregates
+            students_ref, outcome = await TeacherService._load_class_progress(class_name)
             students_summary = []
+            quiz_score_sum = 0.0
+            quiz_score_count = 0
             
             for student_doc in students_ref:
                 student_data = student_doc.to_dict()
                 student_id = student_doc.id
-                
-                # Get limited progress data for performance
-                progress_ref = db.collection("users").document(student_id).collection("progress")
-                progress_docs = list(progress_ref.limit(10).stream())
-                progress_data = [doc.to_dict() for doc in progress_docs]
+                aggregate = outcome.results.get(student_id, empty_aggregate())
                 
                 # Calculate basic metrics
-                total_progress = len(progress_data)
-                completed = sum(1 for p in progress_data if p.get("status") == "completed")
-                completion_rate = (completed / total_progress * 100) if total_progress > 0 else 0.0
+                total_progress = aggregate["total_activities"]
+                completed = aggregate["completed_activities"]
+                student_completion_rate = completion_rate(aggregate)
+                quiz_score_sum += aggregate["quiz_score_sum"]
+                quiz_score_count += aggregate["quiz_score_count"]
                 
                 students_summary.append({
                     "student_id": student_id,
@@ -584,8 +573,8 @@ class TeacherService:
                     "summary_stats": {
                         "total_activities": total_progress,
                         "completed_activities": completed,
-                        "completion_rate": completion_rate,
-                        "average_quiz_score": 75.0  # Default value
+                        "completion_rate": student_completion_rate,
+                        "average_quiz_score": average_quiz_score(aggregate)
                     },
                     "visual_data": {}  # Empty for performance
                 })
@@ -604,9 +593,10 @@ class TeacherService:
                     "total_students": total_students,
                     "active_students": active_students,
                     "average_completion_rate": avg_completion,
-                    "average_quiz_score": 75.0
+                    "average_quiz_score": quiz_score_sum / quiz_score_count if quiz_score_count else 0.0
                 },
-                "students_details": sorted(students_summary, key=lambda x: x["summary_stats"]["completion_rate"], reverse=True)
+                "students_details": sorted(students_summary, key=lambda x: x["summary_stats"]["completion_rate"], reverse=True),
+                "progress_report": outcome.report()
             }
             
         except Exception as e:
@@ -617,14 +607,14 @@ class TeacherService:
         """Get comprehensive progress data - optimized version."""
         try:
             # Verify teacher access
-            teacher_classes = TeacherService.get_teacher_allotted_classes(teacher_id)
+            teacher_classes = await TeacherService.get_teacher_allotted_classes(teacher_id)
             if class_name not in teacher_classes:
                 raise HTTPException(status_code=403, detail="Access denied to this class")
             
             if student_id:
                 # Return basic student data
-                student_ref = db.collection("users").document(student_id)
-                student_doc = student_ref.get()
+                student_ref = async_db.collection("users").document(student_id)
+                student_doc = await student_ref.get()
                 
                 if not student_doc.exists:
                     return {"error": "Student not found"}
@@ -632,8 +622,8 @@ class TeacherService:
                 student_data = student_doc.to_dict()
                 
                 # Get limited progress data
-                progress_ref = db.collection("users").document(student_id).collection("progress")
-                progress_docs = list(progress_ref.limit(20).stream())
+                progress_ref = async_db.collection("users").document(student_id).collection("progress")
+                progress_docs = await fetch_all(progress_ref.limit(20))
                 progress_data = [doc.to_dict() for doc in progress_docs]
                 
                 completed = sum(1 for p in progress_data if p.get("status") == "completed")
@@ -657,7 +647,7 @@ class TeacherService:
                 }
             else:
                 # Return basic class overview
-                students_ref = list(db.collection("users").where("student_class", "==", class_name).stream())
+                students_ref = await fetch_all(async_db.collection("users").where("student_class", "==", class_name))
                 total_students = len(students_ref)
                 
                 return {
@@ -2,12 +2,11 @@ import os
 import json
 import firebase_admin
 from datetime import datetime
-from firebase_admin import firestore
 from services.course_service import CourseService
 import utils.firestore_helpers as firestore_helpers
 from models.topic_model import TopicCreate, SubtopicCreate
-
-db = firestore.client()  # Firestore DB instance
+from utils.async_firestore import course_ref, topic_ref, subtopic_ref, fetch_all, run_blocking
+from services.translation_jobs import translation_jobs, pending_languages, STATUS_PENDING
 
 class TopicService:
     @staticmethod
@@ -15,43 +14,35 @@ class TopicService:
         """Creates a new topic inside a course with multilingual support and updates Firestore ID mapping."""
         detected_lang = await CourseService.detect_language([topic.title, topic.description]) or "en"
 
-        languages = {
-            detected_lang: {"title": topic.title, "description": topic.description}
-        }
-
+        source_fields = {"title": topic.title, "description": topic.description}
         target_languages = ["fr", "es", "de", "zh", "ar", "hi", "en"]
-
-        translation_tasks = {
-            lang: {
-                "title": CourseService.translate_text(topic.title, lang),
-                "description": CourseService.translate_text(topic.description, lang),
-            }
-            for lang in target_languages
-        }
-
-        for lang in target_languages:
-            languages[lang] = {
-                "title": await translation_tasks[lang]["title"],
-                "description": await translation_tasks[lang]["description"],
-            }
+        languages = pending_languages(source_fields, target_languages, detected_lang)
 
         topic_data = {
             "id": topic_id,
             "created_at": datetime.utcnow(),
             "languages": languages,
+            "translation_status": STATUS_PENDING,
         }
 
-        db.collection("courses").document(course_id).collection("topics").document(topic_id).set(topic_data)
+        ref = topic_ref(course_id, topic_id)
+        await ref.set(topic_data)
+        job_id = await translation_jobs.enqueue(ref, source_fields, [lang for lang in target_languages if lang != detected_lang])
 
         # ✅ **Store ID mapping in Firestore instead of JSON**
-        firestore_helpers.FirestoreUtils.store_id_mapping("topics", topic_id, topic.title)
+        await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "topics", topic_id, topic.title)
 
-        return {"message": "Topic created successfully", "topic_id": topic_id}
+        return {
+            "message": "Topic created successfully",
+            "topic_id": topic_id,
+            "translation_status": STATUS_PENDING,
+            "translation_job_id": job_id,
+        }
 
     @staticmethod
     async def get_all_topics(course_id: str, target_language: str = "en"):
         """Fetches all topics for a course in the requested language."""
-        topics_ref = db.collection("courses").document(course_id).collection("topics").stream()
+        topics_ref = await fetch_all(course_ref(course_id).collection("topics"))
         topics = []
 
         for topic in topics_ref:
@@ -77,44 +68,36 @@ class TopicService:
         """Creates a subtopic under a specific topic with multilingual support and updates Firestore ID mapping."""
         detected_lang = await CourseService.detect_language([subtopic.title, subtopic.description]) or "en"
 
-        languages = {
-            detected_lang: {"title": subtopic.title, "description": subtopic.description}
-        }
-
+        source_fields = {"title": subtopic.title, "description": subtopic.description}
         target_languages = ["fr", "es", "de", "zh", "ar", "hi", "en"]
-
-        translation_tasks = {
-            lang: {
-                "title": CourseService.translate_text(subtopic.title, lang),
-                "description": CourseService.translate_text(subtopic.description, lang),
-            }
-            for lang in target_languages
-        }
-
-        for lang in target_languages:
-            languages[lang] = {
-                "title": await translation_tasks[lang]["title"],
-                "description": await translation_tasks[lang]["description"],
-            }
+        languages = pending_languages(source_fields, target_languages, detected_lang)
 
         subtopic_data = {
             "id": subtopic_id,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
             "languages": languages,
+            "translation_status": STATUS_PENDING,
         }
 
-        db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("subtopics").document(subtopic_id).set(subtopic_data)
+        ref = subtopic_ref(course_id, topic_id, subtopic_id)
+        await ref.set(subtopic_data)
+        job_id = await translation_jobs.enqueue(ref, source_fields, [lang for lang in target_languages if lang != detected_lang])
 
         # ✅ **Store ID mapping in Firestore instead of JSON**
-        firestore_helpers.FirestoreUtils.store_id_mapping("subtopics", subtopic_id, subtopic.title)
+        await run_blocking(firestore_helpers.FirestoreUtils.store_id_mapping, "subtopics", subtopic_id, subtopic.title)
 
-        return {"message": "Subtopic added successfully", "subtopic_id": subtopic_id}
+        return {
+            "message": "Subtopic added successfully",
+            "subtopic_id": subtopic_id,
+            "translation_status": STATUS_PENDING,
+            "translation_job_id": job_id,
+        }
 
     @staticmethod
     async def get_subtopics_by_topic(course_id: str, topic_id: str, target_language: str = "en"):
         """Fetches all subtopics under a topic in the requested language."""
-        subtopics_ref = db.collection("courses").document(course_id).collection("topics").document(topic_id).collection("subtopics").stream()
+        subtopics_ref = await fetch_all(topic_ref(course_id, topic_id).collection("subtopics"))
         subtopics = []
 
         for subtopic in subtopics_ref:
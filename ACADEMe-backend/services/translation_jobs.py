@@ -0,0 +1,291 @@
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from google.cloud.firestore import async_transactional
+from utils.async_firestore import async_db, fetch_dicts, get_dict
+
+# Translation job settings (overridable via environment)
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "4"))
+TRANSLATION_JOB_MAX_ATTEMPTS = int(os.getenv("TRANSLATION_JOB_MAX_ATTEMPTS", "3"))
+TRANSLATION_JOB_RETRY_DELAY_SECONDS = float(os.getenv("TRANSLATION_JOB_RETRY_DELAY_SECONDS", "5"))
+# A process owns a job for this long (renewed on every attempt); pending jobs whose lease
+# expired (their process died) are recovered by the next sweep of any process
+TRANSLATION_JOB_LEASE_SECONDS = float(os.getenv("TRANSLATION_JOB_LEASE_SECONDS", "600"))
+
+# 🔹 translation_jobs/{job_id} persists queued jobs so they survive restarts
+TRANSLATION_JOBS_COLLECTION = "translation_jobs"
+
+# Values of the `translation_status` marker on content documents
+STATUS_PENDING = "pending"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+
+def pending_languages(source_fields: dict, target_languages: List[str], source_language: str) -> dict:
+    """
+    Returns the `languages` map written at creation time: every language starts with the
+    source text, so readers keep working while the translations are pending.
+    """
+    return {lang: dict(source_fields) for lang in set(target_languages) | {source_language}}
+
+def job_id_for(document_path: str) -> str:
+    """One job per content document (Firestore IDs cannot contain '/')."""
+    return document_path.replace("/", ":")
+
+def _lease_expired(job: dict, now: datetime) -> bool:
+    expires_at = job.get("lease_expires_at")
+    return expires_at is None or expires_at <= now
+
+class TranslationJobQueue:
+    """
+    In-process queue filling in the `languages.*` translations of newly created content.
+
+    Creation endpoints store the source-language document with `translation_status: pending`
+    and enqueue a job; a pool of TRANSLATION_WORKERS workers translates the fields (one batched
+    request per language), writes them back and marks the document `complete`. Failed jobs are
+    retried TRANSLATION_JOB_MAX_ATTEMPTS times before the document is marked `failed`.
+
+    Every worker process runs its own queue, so each job carries a lease (`lease_owner`,
+    `lease_expires_at`): pending jobs are only recovered once their lease has expired, and
+    claiming one is transactional, so exactly one process picks it up.
+    """
+
+    def __init__(self, workers: int = TRANSLATION_WORKERS):
+        self.workers = workers
+        self.owner = uuid.uuid4().hex
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._jobs: Dict[str, dict] = {}
+        self.completed = 0
+        self.failed = 0
+
+    async def start(self):
+        """Starts the worker pool and re-enqueues jobs left pending by a previous run."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"✅ Translation job queue started with {self.workers} workers")
+
+        await self._recover()
+        self._recovery_task = asyncio.create_task(self._recovery_loop())
+
+    async def stop(self):
+        """Cancels the workers and releases their leases (unfinished jobs stay pending in Firestore)."""
+        tasks = self._tasks + ([self._recovery_task] if self._recovery_task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._recovery_task = None
+
+        # Let the next process pick the unfinished jobs up without waiting for the leases
+        unfinished = [job for job in self._jobs.values() if job["status"] == STATUS_PENDING]
+        results = await asyncio.gather(
+            *(self._job_ref(job["id"]).update({"lease_owner": None, "lease_expires_at": None}) for job in unfinished),
+            return_exceptions=True
+        )
+        for job, result in zip(unfinished, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Could not release the lease of translation job {job['id']}: {result}")
+
+    def _job_ref(self, job_id: str):
+        return async_db.collection(TRANSLATION_JOBS_COLLECTION).document(job_id)
+
+    def _lease(self, job: dict):
+        """Takes (or renews) this process's lease on a job (in memory)."""
+        job["lease_owner"] = self.owner
+        job["lease_expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=TRANSLATION_JOB_LEASE_SECONDS)
+
+    async def _claim(self, job_id: str, status: str) -> Optional[dict]:
+        """
+        Transactionally takes a job in `status` whose lease has expired (or a failed job, whose
+        lease is irrelevant) and marks it pending; None when the job is missing or not claimable.
+        """
+        job_ref = self._job_ref(job_id)
+
+        @async_transactional
+        async def _take(transaction) -> Optional[dict]:
+            snapshot = await job_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            job = snapshot.to_dict()
+            if job.get("status") != status:
+                return None
+            if status == STATUS_PENDING and not _lease_expired(job, datetime.now(timezone.utc)):
+                return None
+            job.update({"status": STATUS_PENDING, "updated_at": datetime.utcnow()})
+            self._lease(job)
+            transaction.set(job_ref, job)
+            return job
+
+        return await _take(async_db.transaction())
+
+    async def _recover(self):
+        """Claims the pending jobs whose lease expired and queues them."""
+        try:
+            leftover = await fetch_dicts(
+                async_db.collection(TRANSLATION_JOBS_COLLECTION).where("status", "==", STATUS_PENDING)
+            )
+        except Exception as e:
+            print(f"⚠️ Could not recover pending translation jobs: {e}")
+            return
+        now = datetime.now(timezone.utc)
+        candidates = [job for job in leftover if job["id"] not in self._jobs and _lease_expired(job, now)]
+        claimed = await asyncio.gather(*(self._claim(job["id"], STATUS_PENDING) for job in candidates), return_exceptions=True)
+        recovered = 0
+        for job in claimed:
+            if isinstance(job, Exception):
+                print(f"⚠️ Could not claim a pending translation job: {job}")
+            elif job is not None:
+                self._submit(job)
+                recovered += 1
+        if recovered:
+            print(f"🔄 Re-enqueued {recovered} pending translation jobs")
+
+    async def _recovery_loop(self):
+        """Periodically recovers jobs orphaned by processes that died without releasing them."""
+        while True:
+            await asyncio.sleep(TRANSLATION_JOB_LEASE_SECONDS)
+            await self._recover()
+
+    def _submit(self, job: dict):
+        self._jobs[job["id"]] = job
+        self._queue.put_nowait(job["id"])
+
+    async def enqueue(self, doc_ref, fields: dict, target_languages: List[str], fallbacks: dict = None) -> str:
+        """
+        Queues the translation of `fields` into `target_languages` for a content document.
+
+        Args:
+            doc_ref: Reference of the content document (already written as pending)
+            fields: Source fields to translate (strings or lists of strings)
+            target_languages: Languages to fill in under `languages.*`
+            fallbacks: Values used for fields whose translation comes back empty
+        """
+        now = datetime.utcnow()
+        job = {
+            "id": job_id_for(doc_ref.path),
+            "document_path": doc_ref.path,
+            "fields": fields,
+            "target_languages": list(target_languages),
+            "fallbacks": fallbacks or {},
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._lease(job)
+        await self._save(job)
+
+        if self._queue is None:
+            # No worker pool (e.g. scripts): translate inline
+            await self._run(job)
+        else:
+            self._submit(job)
+        return job["id"]
+
+    async def retry(self, job_id: str) -> Optional[dict]:
+        """
+        Re-enqueues a failed job (None if unknown).
+
+        Raises a 409 unless the job has failed: pending jobs are already queued (by this or
+        another process) and re-queuing them would run them twice.
+        """
+        job = await self._claim(job_id, STATUS_FAILED)
+        if job is None:
+            current = await get_dict(self._job_ref(job_id))
+            if current is None:
+                return None
+            raise HTTPException(status_code=409, detail=f"Translation job is {current.get('status')}, only failed jobs can be retried")
+        job.update({"attempts": 0, "error": None})
+        await self._save(job)
+        await async_db.document(job["document_path"]).update({"translation_status": STATUS_PENDING})
+        self._submit(job)
+        return job
+
+    async def get_status(self, job_id: str) -> Optional[dict]:
+        """Returns a job's state (in-process first, then the persisted copy)."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = await get_dict(async_db.collection(TRANSLATION_JOBS_COLLECTION).document(job_id))
+        if job is None:
+            return None
+        return {key: job.get(key) for key in ("id", "document_path", "target_languages", "status", "attempts", "error", "created_at", "updated_at")}
+
+    async def _save(self, job: dict):
+        await self._job_ref(job["id"]).set(job)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None and job["status"] == STATUS_PENDING:
+                    await self._run(job)
+            except Exception as e:
+                print(f"❌ Translation worker error for job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: dict):
+        """Translates one job, retrying with a linear backoff."""
+        # Imported here: course_service enqueues jobs from this module
+        from services.course_service import CourseService
+
+        doc_ref = async_db.document(job["document_path"])
+        while job["attempts"] < TRANSLATION_JOB_MAX_ATTEMPTS:
+            job["attempts"] += 1
+            try:
+                # Renew the lease so a long queue does not let another process recover the job
+                self._lease(job)
+                await self._job_ref(job["id"]).update({
+                    "attempts": job["attempts"],
+                    "lease_owner": job["lease_owner"],
+                    "lease_expires_at": job["lease_expires_at"],
+                })
+                translations = await CourseService.translate_fields(job["fields"], job["target_languages"], strict=True)
+                update = {}
+                for lang, values in translations.items():
+                    update[f"languages.{lang}"] = {
+                        field: value or job["fallbacks"].get(field, value)
+                        for field, value in values.items()
+                    }
+                update["translation_status"] = STATUS_COMPLETE
+                update["translation_updated_at"] = datetime.utcnow()
+                await doc_ref.update(update)
+
+                job.update({"status": STATUS_COMPLETE, "error": None, "updated_at": datetime.utcnow()})
+                await self._save(job)
+                self._jobs.pop(job["id"], None)
+                self.completed += 1
+                return
+            except Exception as e:
+                job["error"] = str(e)
+                print(f"⚠️ Translation job {job['id']} attempt {job['attempts']} failed: {e}")
+                if job["attempts"] < TRANSLATION_JOB_MAX_ATTEMPTS:
+                    await asyncio.sleep(TRANSLATION_JOB_RETRY_DELAY_SECONDS * job["attempts"])
+
+        job.update({"status": STATUS_FAILED, "updated_at": datetime.utcnow()})
+        self.failed += 1
+        await self._save(job)
+        self._jobs.pop(job["id"], None)
+        try:
+            await doc_ref.update({"translation_status": STATUS_FAILED})
+        except Exception as e:
+            print(f"⚠️ Could not mark {job['document_path']} as failed: {e}")
+
+    def stats(self) -> dict:
+        """Returns the queue counters."""
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+translation_jobs = TranslationJobQueue()
@@ -0,0 +1,244 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+from cachetools import LRUCache
+from utils.async_firestore import run_blocking
+
+# Translation memory settings (overridable via environment)
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", "translation_memory.sqlite3")
+TRANSLATION_MEMORY_MAXSIZE = int(os.getenv("TRANSLATION_MEMORY_MAXSIZE", "50000"))
+# Longer texts (e.g. whole documents) are translated without being remembered
+TRANSLATION_MEMORY_MAX_TEXT_LENGTH = int(os.getenv("TRANSLATION_MEMORY_MAX_TEXT_LENGTH", "20000"))
+# Rows kept in the SQLite tier; the oldest translations are deleted beyond it
+TRANSLATION_MEMORY_MAX_ROWS = int(os.getenv("TRANSLATION_MEMORY_MAX_ROWS", "500000"))
+
+# The SQLite tier is pruned once this many rows have been written since the last pass
+PRUNE_EVERY_ROWS = 1000
+# Keys per `IN (...)` lookup, below SQLite's bound-variable limit (999 in older builds)
+READ_CHUNK_SIZE = 500
+
+class TranslationMemory:
+    """
+    Content-addressed translation cache keyed by sha256(source lang, target lang, text).
+
+    Two tiers: an in-process LRU in front of a local SQLite table that survives restarts
+    and is shared by the workers of one host. Only successful translations are stored.
+    The SQLite table is capped at TRANSLATION_MEMORY_MAX_ROWS (oldest rows deleted first).
+    """
+
+    def __init__(self, path: str = TRANSLATION_MEMORY_PATH, maxsize: int = TRANSLATION_MEMORY_MAXSIZE,
+                 max_rows: int = TRANSLATION_MEMORY_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._written_since_prune = 0
+        self._memory = LRUCache(maxsize=maxsize)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disk_enabled = bool(path)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str) -> str:
+        """Hashes a translation request into its memory key."""
+        return hashlib.sha256(f"{source_lang}\x1f{target_lang}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Opens the SQLite tier on first use (disabled if the file cannot be opened)."""
+        if self._connection is None and self._disk_enabled:
+            try:
+                connection = sqlite3.connect(self.path, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "key TEXT PRIMARY KEY, source_lang TEXT, target_lang TEXT, "
+                    "translation TEXT NOT NULL, created_at REAL)"
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS translations_created_at ON translations (created_at)")
+                connection.commit()
+                self._connection = connection
+            except sqlite3.Error as e:
+                print(f"⚠️ Translation memory disk tier disabled: {e}")
+                self._disk_enabled = False
+        return self._connection
+
+    def _read(self, key: str) -> Optional[str]:
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def _read_many(self, keys: List[str]) -> Dict[str, str]:
+        with self._lock:
+            connection = self._connect()
+            if connection is None or not keys:
+                return {}
+            found = {}
+            for start in range(0, len(keys), READ_CHUNK_SIZE):
+                chunk = keys[start:start + READ_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(connection.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+            return found
+
+    def _write(self, key: str, source_lang: str, target_lang: str, translation: str):
+        self._write_many([(key, translation)], source_lang, target_lang)
+
+    def _write_many(self, entries: List[tuple], source_lang: str, target_lang: str):
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            now = time.time()
+            connection.executemany(
+                "INSERT OR REPLACE INTO translations (key, source_lang, target_lang, translation, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(key, source_lang, target_lang, translation, now) for key, translation in entries]
+            )
+            self._written_since_prune += len(entries)
+            if self._written_since_prune >= PRUNE_EVERY_ROWS:
+                self._prune(connection)
+            connection.commit()
+
+    def _prune(self, connection: sqlite3.Connection):
+        """Deletes the oldest rows beyond `max_rows` (caller holds the lock)."""
+        self._written_since_prune = 0
+        if self.max_rows <= 0:
+            return
+        deleted = connection.execute(
+            "DELETE FROM translations WHERE created_at < ("
+            "SELECT created_at FROM translations ORDER BY created_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_rows - 1,)
+        ).rowcount
+        if deleted:
+            print(f"🧹 Pruned {deleted} old translations from the translation memory")
+
+    async def get(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        """Returns a remembered translation (None on miss)."""
+        key = self.make_key(text, source_lang, target_lang)
+        translation = self._memory.get(key)
+        if translation is not None:
+            self.memory_hits += 1
+            return translation
+
+        try:
+            translation = await run_blocking(self._read, key)
+        except sqlite3.Error as e:
+            print(f"⚠️ Translation memory read failed: {e}")
+            translation = None
+
+        if translation is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._memory[key] = translation
+        return translation
+
+    async def put(self, text: str, source_lang: str, target_lang: str, translation: str):
+        """Remembers a translation in both tiers."""
+        key = self.make_key(text, source_lang, target_lang)
+        self._memory[key] = translation
+        try:
+            await run_blocking(self._write, key, source_lang, target_lang, translation)
+        except sqlite3.Error as e:
+            print(f"⚠️ Translation memory write failed: {e}")
+
+    async def translate(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        translator: Callable[[str, str, str], Awaitable[str]],
+    ) -> str:
+        """Returns the remembered translation, or calls `translator` and remembers its result."""
+        if len(text) > TRANSLATION_MEMORY_MAX_TEXT_LENGTH:
+            return await translator(text, source_lang, target_lang)
+
+        translation = await self.get(text, source_lang, target_lang)
+        if translation is None:
+            translation = await translator(text, source_lang, target_lang)
+            await self.put(text, source_lang, target_lang, translation)
+        return translation
+
+    async def translate_many(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        batch_translator: Callable[[List[str], str, str], Awaitable[List[str]]],
+    ) -> List[str]:
+        """
+        Batch variant of `translate`: remembered texts are served from the memory (one SQLite
+        query for the lot) and only the distinct misses are passed to `batch_translator`.
+        """
+        keys = {text: self.make_key(text, source_lang, target_lang) for text in set(texts)}
+        found: Dict[str, str] = {}
+        disk_keys = []
+        for text, key in keys.items():
+            translation = self._memory.get(key)
+            if translation is not None:
+                self.memory_hits += 1
+                found[text] = translation
+            elif len(text) <= TRANSLATION_MEMORY_MAX_TEXT_LENGTH:
+                disk_keys.append(key)
+
+        if disk_keys:
+            try:
+                stored = await run_blocking(self._read_many, disk_keys)
+            except sqlite3.Error as e:
+                print(f"⚠️ Translation memory read failed: {e}")
+                stored = {}
+            for text, key in keys.items():
+                if key in stored:
+                    self.disk_hits += 1
+                    self._memory[key] = stored[key]
+                    found[text] = stored[key]
+
+        missing = [text for text in keys if text not in found]
+        self.misses += len(missing)
+        if missing:
+            translations = await batch_translator(missing, source_lang, target_lang)
+            entries = []
+            for text, translation in zip(missing, translations):
+                found[text] = translation
+                if len(text) <= TRANSLATION_MEMORY_MAX_TEXT_LENGTH:
+                    self._memory[keys[text]] = translation
+                    entries.append((keys[text], translation))
+            if entries:
+                try:
+                    await run_blocking(self._write_many, entries, source_lang, target_lang)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Translation memory write failed: {e}")
+
+        return [found[text] for text in texts]
+
+    def close(self):
+        """Closes the SQLite tier (called on application shutdown)."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def stats(self) -> dict:
+        """Returns the memory counters."""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "entries_in_memory": len(self._memory),
+            "maxsize": self._memory.maxsize,
+            "disk_enabled": self._disk_enabled,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+translation_memory = TranslationMemory()
@@ -1,60 +1,162 @@
+import io
 import os
+import asyncio
+import subprocess
+from typing import List, Tuple
 from dotenv import load_dotenv
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+from imageio_ffmpeg import get_ffmpeg_exe
+from utils.async_firestore import run_blocking
+from services.artifact_cache import artifact_cache, hash_bytes, TRANSCRIPT
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize the InferenceClient once
-client = InferenceClient(token=os.getenv("HUGGING_FACE_TOKEN"))
+# Speech-to-text settings (overridable via environment)
+STT_SAMPLE_RATE = 16000
+# Upper bound of one transcription request; chunks are cut at silences below it
+STT_CHUNK_MAX_SECONDS = float(os.getenv("STT_CHUNK_MAX_SECONDS", "30"))
+STT_MIN_SILENCE_MS = int(os.getenv("STT_MIN_SILENCE_MS", "500"))
+# Silence threshold relative to the recording's average loudness (dBFS)
+STT_SILENCE_OFFSET_DB = float(os.getenv("STT_SILENCE_OFFSET_DB", "-16"))
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", "4"))
+STT_TIMEOUT_SECONDS = float(os.getenv("STT_TIMEOUT_SECONDS", "120"))
+STT_MAX_RETRIES = int(os.getenv("STT_MAX_RETRIES", "2"))
 
+# Silence detection step; coarser than pydub's 1 ms default to keep long recordings fast
+SILENCE_SEEK_STEP_MS = 20
+# Audio kept around each speech region so words are not clipped
+CHUNK_PADDING_MS = 200
 
-def transcribe_audio(audio_bytes: bytes) -> dict:
+# Initialize the async InferenceClient once
+client = AsyncInferenceClient(token=os.getenv("HUGGING_FACE_TOKEN"), timeout=STT_TIMEOUT_SECONDS)
+_semaphore = asyncio.Semaphore(STT_MAX_CONCURRENCY)
+
+def _speech_ranges(audio: AudioSegment, max_ms: int) -> List[Tuple[int, int]]:
+    """
+    Groups the non-silent regions of a recording into (start_ms, end_ms) chunks of at most
+    `max_ms`, cutting at silences; a region longer than `max_ms` is split at fixed points.
+    """
+    if audio.dBFS == float("-inf"):
+        return []
+    regions = detect_nonsilent(
+        audio,
+        min_silence_len=STT_MIN_SILENCE_MS,
+        silence_thresh=audio.dBFS + STT_SILENCE_OFFSET_DB,
+        seek_step=SILENCE_SEEK_STEP_MS
+    ) or [[0, len(audio)]]
+
+    chunks = []
+    for start, end in regions:
+        start, end = max(0, start - CHUNK_PADDING_MS), min(len(audio), end + CHUNK_PADDING_MS)
+        if chunks and end - chunks[-1][0] <= max_ms:
+            chunks[-1][1] = end
+            continue
+        while end - start > max_ms:
+            chunks.append([start, start + max_ms])
+            start += max_ms
+        chunks.append([start, end])
+    return [(start, end) for start, end in chunks]
+
+def decode_audio(audio_bytes: bytes) -> AudioSegment:
+    """
+    Decodes any supported upload to 16 kHz mono 16-bit PCM with the ffmpeg binary bundled
+    by imageio-ffmpeg (no system ffmpeg/ffprobe needed, unlike `AudioSegment.from_file`).
+    """
+    command = [
+        get_ffmpeg_exe(), "-v", "error", "-i", "pipe:0",
+        "-ac", "1", "-ar", str(STT_SAMPLE_RATE), "-f", "s16le", "pipe:1",
+    ]
+    result = subprocess.run(command, input=audio_bytes, capture_output=True)
+    if result.returncode != 0:
+        raise ValueError(f"Could not decode audio: {result.stderr.decode(errors='ignore').strip()}")
+    return AudioSegment(data=result.stdout, sample_width=2, frame_rate=STT_SAMPLE_RATE, channels=1)
+
+def split_audio(audio_bytes: bytes, max_seconds: float = None) -> List[Tuple[float, float, bytes]]:
+    """
+    Normalizes audio to 16 kHz mono and splits it on silence into bounded chunks.
+
+    Returns [(start_seconds, end_seconds, wav_bytes)] in playback order.
+    """
+    max_ms = int((max_seconds or STT_CHUNK_MAX_SECONDS) * 1000)
+    audio = decode_audio(audio_bytes)
+
+    chunks = []
+    for start, end in _speech_ranges(audio, max_ms):
+        output = io.BytesIO()
+        audio[start:end].export(output, format="wav")
+        chunks.append((start / 1000, end / 1000, output.getvalue()))
+    return chunks
+
+async def _transcribe_chunk(audio_bytes: bytes) -> str:
+    """Transcribes one chunk, retrying transient failures with exponential backoff."""
+    for attempt in range(STT_MAX_RETRIES + 1):
+        try:
+            async with _semaphore:
+                response = await client.automatic_speech_recognition(audio=audio_bytes, model=os.getenv("STT_MODEL"))
+            return response.text.strip()
+        except Exception as e:
+            if attempt >= STT_MAX_RETRIES:
+                raise
+            delay = 2 ** attempt
+            print(f"⚠️ Transcription chunk failed ({type(e).__name__}), retrying in {delay}s...")
+            await asyncio.sleep(delay)
+
+async def transcribe_audio(audio_bytes: bytes) -> dict:
     """
     Transcribes audio using Hugging Face's Inference API with OpenAI Whisper.
 
+    The recording is normalized and split on silence into chunks of at most
+    STT_CHUNK_MAX_SECONDS, transcribed concurrently (STT_MAX_CONCURRENCY at a time) and
+    stitched back in order, so latency follows the longest chunk, not the total duration.
+    Transcripts are cached by content hash, so re-uploads of a recording are not transcribed again.
+
     Args:
-        audio_bytes (bytes): Raw audio data in FLAC, WAV, or MP3 format.
+        audio_bytes (bytes): Raw audio data in FLAC, WAV, MP3, OGG or WEBM format.
 
     Returns:
         dict: {
             "text": Transcribed text,
             "language": Detected language (if supported),
-            "segments": List of timestamped segments (if supported)
+            "segments": List of timestamped segments ({"start", "end", "text"} in seconds)
         }
     """
     try:
-        # Send audio data to the API
-        response = client.automatic_speech_recognition(
-            audio=audio_bytes,
-            model=os.getenv("STT_MODEL")
-        )
+        content_hash = hash_bytes(audio_bytes)
+        cached = await artifact_cache.get(TRANSCRIPT, content_hash)
+        if cached is not None:
+            return cached
+
+        try:
+            chunks = await run_blocking(split_audio, audio_bytes)
+        except (OSError, ValueError) as e:
+            # Decoding failed: fall back to a single whole-file request
+            print(f"⚠️ Could not split audio ({e}), transcribing it in one request")
+            chunks = [(0.0, None, audio_bytes)]
+        if not chunks:
+            return {"text": "", "language": "en", "segments": []}
 
-        # Extract text from response
-        text = response.text
+        texts = await asyncio.gather(*(_transcribe_chunk(data) for _, _, data in chunks))
+
+        segments = [
+            {"start": start, "end": end, "text": text}
+            for (start, end, _), text in zip(chunks, texts)
+            if text
+        ]
 
         # Attempt to get language (may not be available in all API configurations)
         language = "en"
 
-        # Process timestamp segments
-        # segments = []
-        # for chunk in response.chunks:
-        #     # Handle timestamp format variation
-        #     timestamps = chunk.get("timestamp", [None, None])
-        #     segments.append({
-        #         "start": timestamps[0],
-        #         "end": timestamps[1],
-        #         "text": chunk.get("text", "")
-        #     })
-
-        # return {
-        #     "text": text,
-        #     "language": language,
-        #     "segments": segments
-        # }
-
-        return {"text": text, "language": language}
+        result = {
+            "text": " ".join(segment["text"] for segment in segments),
+            "language": language,
+            "segments": segments
+        }
+        if result["text"]:
+            await artifact_cache.set(TRANSCRIPT, content_hash, result)
+        return result
 
     except Exception as e:
         return {"error": f"Transcription failed: {str(e)}"}
-    
\ No newline at end of file
@@ -0,0 +1,67 @@
+import asyncio
+import firebase_admin
+from typing import List, Optional
+from firebase_admin import firestore_async
+
+# Initialize Firebase Admin (Only if not initialized)
+if not firebase_admin._apps:
+    firebase_admin.initialize_app()
+
+# Shared async Firestore client (non-blocking, safe to use inside `async def` services)
+async_db = firestore_async.client()
+
+def course_ref(course_id: str):
+    """Returns the async reference of a course document."""
+    return async_db.collection("courses").document(course_id)
+
+def topic_ref(course_id: str, topic_id: str):
+    """Returns the async reference of a topic document inside a course."""
+    return course_ref(course_id).collection("topics").document(topic_id)
+
+def subtopic_ref(course_id: str, topic_id: str, subtopic_id: str):
+    """Returns the async reference of a subtopic document inside a topic."""
+    return topic_ref(course_id, topic_id).collection("subtopics").document(subtopic_id)
+
+def content_collection(course_id: str, topic_id: str, name: str, subtopic_id: Optional[str] = None):
+    """
+    Returns the async reference of a content subcollection (quizzes, materials, ...)
+    under a topic, or under a subtopic when `subtopic_id` is given.
+
+    Args:
+        course_id: The course document ID
+        topic_id: The topic document ID
+        name: The subcollection name (quizzes, materials)
+        subtopic_id: Optional subtopic document ID
+    """
+    parent = subtopic_ref(course_id, topic_id, subtopic_id) if subtopic_id else topic_ref(course_id, topic_id)
+    return parent.collection(name)
+
+async def fetch_all(query, transaction=None) -> List:
+    """Streams an async query / collection (optionally inside a transaction) and returns all document snapshots."""
+    return [doc async for doc in query.stream(transaction=transaction)]
+
+async def fetch_dicts(query) -> List[dict]:
+    """Streams an async query / collection and returns the documents as dicts."""
+    return [doc.to_dict() async for doc in query.stream()]
+
+async def get_dict(doc_ref) -> Optional[dict]:
+    """Fetches a single document and returns it as a dict (None if missing)."""
+    doc = await doc_ref.get()
+    return doc.to_dict() if doc.exists else None
+
+async def get_many(doc_refs: list) -> List:
+    """Fetches several documents in a single round trip, preserving the input order."""
+    if not doc_refs:
+        return []
+    snapshots = {doc.reference.path: doc async for doc in async_db.get_all(doc_refs)}
+    return [snapshots.get(ref.path) for ref in doc_refs]
+
+async def count(query, transaction=None) -> int:
+    """Counts the documents matched by a query with a server-side aggregation (no document reads)."""
+    result = await query.count().get(transaction=transaction)
+    return int(result[0][0].value) if result and result[0] else 0
+
+async def run_blocking(func, *args):
+    """Runs a blocking helper (e.g. sync Firestore / Firebase Auth call) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: func(*args))
@@ -8,11 +8,15 @@ from firebase_admin import auth, firestore
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import asyncio
+from cachetools import TTLCache
 
 # Initialize Firebase Admin (Only if not initialized)
 if not firebase_admin._apps:
     firebase_admin.initialize_app()
 
+from utils.async_firestore import async_db, fetch_all, run_blocking
+from utils.identity_cache import identity_cache
+
 db = firestore.client()
 
 # Environment Variables
@@ -24,18 +28,43 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRY = 3600  # 1 hour
 REFRESH_TOKEN_EXPIRY = 2592000  # 30 days
 
+# Firebase revocation status is re-checked at most once per window per user
+FIREBASE_REVOCATION_CACHE_TTL_SECONDS = float(os.getenv("FIREBASE_REVOCATION_CACHE_TTL_SECONDS", "60"))
+FIREBASE_REVOCATION_CACHE_MAXSIZE = int(os.getenv("FIREBASE_REVOCATION_CACHE_MAXSIZE", "10000"))
+_revocation_cache = TTLCache(maxsize=FIREBASE_REVOCATION_CACHE_MAXSIZE, ttl=FIREBASE_REVOCATION_CACHE_TTL_SECONDS)
+
 # Password Hashing Setup
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Token Type Detection
+def is_backend_token(token: str) -> bool:
+    """
+    Tells our own HS256 tokens apart from Firebase ID tokens (RS256, signed with a `kid`)
+    by reading the unverified header, so each token goes straight to its verifier.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+    return header.get("alg") == JWT_ALGORITHM and "kid" not in header
+
 # Firebase Token Verification
-def verify_firebase_token(token: str):
-    """Verifies Firebase ID token."""
+def verify_firebase_token(token: str, check_revoked: bool = True):
+    """
+    Verifies Firebase ID token.
+
+    The signature check is local: firebase_admin caches Google's public keys for as long
+    as their Cache-Control headers allow. Pass check_revoked=False to skip the remote
+    revocation lookup (see `check_firebase_revocation` for the cached variant).
+    """
     try:
-        decoded_token = auth.verify_id_token(token, check_revoked=True)
+        decoded_token = auth.verify_id_token(token, check_revoked=check_revoked)
         return decoded_token
     except auth.RevokedIdTokenError:
         raise HTTPException(status_code=401, detail="Firebase token has been revoked")
+    except auth.UserDisabledError:
+        raise HTTPException(status_code=401, detail="User account is disabled")
     except auth.ExpiredIdTokenError:
         raise HTTPException(status_code=401, detail="Expired Firebase token")
     except auth.InvalidIdTokenError:
@@ -43,6 +72,34 @@ def verify_firebase_token(token: str):
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Firebase token error: {str(e)}")
 
+# Firebase Revocation Check
+async def check_firebase_revocation(decoded_token: dict):
+    """
+    Rejects revoked tokens and disabled users, like `check_revoked=True`, but reads the
+    user record from Firebase Auth at most once per FIREBASE_REVOCATION_CACHE_TTL_SECONDS.
+    """
+    user_id = decoded_token.get("uid")
+    status = _revocation_cache.get(user_id)
+    if status is None:
+        try:
+            user_record = await run_blocking(auth.get_user, user_id)
+        except auth.UserNotFoundError:
+            raise HTTPException(status_code=401, detail="Firebase user not found")
+        except Exception as e:
+            raise HTTPException(status_code=401, detail=f"Firebase token error: {str(e)}")
+        status = (user_record.disabled, user_record.tokens_valid_after_timestamp or 0)
+        _revocation_cache[user_id] = status
+
+    disabled, tokens_valid_after = status
+    if disabled:
+        raise HTTPException(status_code=401, detail="User account is disabled")
+    if decoded_token.get("iat", 0) * 1000 < tokens_valid_after:
+        raise HTTPException(status_code=401, detail="Firebase token has been revoked")
+
+def forget_firebase_revocation(user_id: str):
+    """Drops the cached revocation status of a user (e.g. after a password change)."""
+    _revocation_cache.pop(user_id, None)
+
 # JWT Access Token Generation
 def create_access_token(data: dict) -> str:
     """Creates a short-lived JWT access token."""
@@ -113,14 +170,10 @@ async def revoke_refresh_token(token: str):
         token_id = decoded.get("token_id")
 
         if token_id:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                lambda: db.collection("token_blacklist").document(token_id).set({
-                    "revoked_at": datetime.utcnow(),
-                    "expires_at": datetime.utcnow() + timedelta(seconds=REFRESH_TOKEN_EXPIRY)
-                })
-            )
+            await async_db.collection("token_blacklist").document(token_id).set({
+                "revoked_at": datetime.utcnow(),
+                "expires_at": datetime.utcnow() + timedelta(seconds=REFRESH_TOKEN_EXPIRY)
+            })
     except Exception as e:
         print(f"Error revoking token: {e}")
 
@@ -130,14 +183,14 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
     token = credentials.credentials
 
     try:
-        # Try verifying as Firebase token first
-        user = verify_firebase_token(token)
-    except HTTPException:
-        try:
-            # If Firebase fails, verify as JWT access token
+        # Route by the unverified header: our HS256 tokens never touch Firebase
+        if is_backend_token(token):
             user = verify_access_token(token)
-        except HTTPException:
-            raise HTTPException(status_code=401, detail="Invalid authentication token")
+        else:
+            user = verify_firebase_token(token, check_revoked=False)
+            await check_firebase_revocation(user)
+    except HTTPException:
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
 
     email = user.get("email")
     user_id = user.get("uid") or user.get("id")
@@ -166,29 +219,16 @@ async def determine_user_role(email: str, user_id: str) -> str:
     2. admins (by user_id and email)
     3. Default to student
     """
-    try:
-        loop = asyncio.get_event_loop()
-
-        # Concurrent checks for performance
-        teacher_by_id_future = loop.run_in_executor(
-            None,
-            lambda: db.collection("teacher_profiles").document(user_id).get()
-        )
-
-        teacher_by_email_future = loop.run_in_executor(
-            None,
-            lambda: list(db.collection("teacher_profiles").where("email", "==", email).limit(1).stream())
-        )
+    cached_role = identity_cache.get_role(user_id, email)
+    if cached_role:
+        return cached_role
 
-        admin_by_id_future = loop.run_in_executor(
-            None,
-            lambda: db.collection("admins").document(email).get()
-        )
-
-        admin_by_email_future = loop.run_in_executor(
-            None,
-            lambda: list(db.collection("admins").where("email", "==", email).limit(1).stream())
-        )
+    try:
+        # Concurrent checks for performance (native async client, no executor threads)
+        teacher_by_id_future = async_db.collection("teacher_profiles").document(user_id).get()
+        teacher_by_email_future = fetch_all(async_db.collection("teacher_profiles").where("email", "==", email).limit(1))
+        admin_by_id_future = async_db.collection("admins").document(email).get()
+        admin_by_email_future = fetch_all(async_db.collection("admins").where("email", "==", email).limit(1))
 
         # Wait for all checks
         teacher_by_id, teacher_by_email, admin_by_id, admin_by_email = await asyncio.gather(
@@ -198,16 +238,16 @@ async def determine_user_role(email: str, user_id: str) -> str:
             admin_by_email_future
         )
 
-        # Check teacher first
+        # Check teacher first, then admin, default to student
         if teacher_by_id.exists or teacher_by_email:
-            return "teacher"
+            role = "teacher"
+        elif admin_by_id.exists or admin_by_email:
+            role = "admin"
+        else:
+            role = "student"
 
-        # Then check admin
-        if admin_by_id.exists or admin_by_email:
-            return "admin"
-
-        # Default to student
-        return "student"
+        identity_cache.set_role(user_id, role, email)
+        return role
 
     except Exception as e:
         print(f"Error determining role: {e}")
@@ -217,15 +257,11 @@ async def determine_user_role(email: str, user_id: str) -> str:
 async def store_refresh_token(user_id: str, token_id: str, expires_at: datetime):
     """Store refresh token metadata in Firestore."""
     try:
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
-            lambda: db.collection("refresh_tokens").document(token_id).set({
-                "user_id": user_id,
-                "created_at": datetime.utcnow(),
-                "expires_at": expires_at
-            })
-        )
+        await async_db.collection("refresh_tokens").document(token_id).set({
+            "user_id": user_id,
+            "created_at": datetime.utcnow(),
+            "expires_at": expires_at
+        })
     except Exception as e:
         print(f"Error storing refresh token: {e}")
 
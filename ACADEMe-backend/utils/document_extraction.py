@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+
+# Document extraction settings (overridable via environment)
+DOCUMENT_EXTRACTION_WORKERS = int(os.getenv("DOCUMENT_EXTRACTION_WORKERS", "2"))
+# Extraction stops once this many characters have been read
+DOCUMENT_MAX_CHARS = int(os.getenv("DOCUMENT_MAX_CHARS", "200000"))
+# Pages (PDF) or paragraphs (DOCX) extracted per worker task
+DOCUMENT_PAGES_PER_BATCH = int(os.getenv("DOCUMENT_PAGES_PER_BATCH", "10"))
+DOCX_PARAGRAPHS_PER_PAGE = 50
+
+SUPPORTED_DOCUMENT_TYPES = ("pdf", "docx", "txt")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared extraction process pool (created on first use).
+
+    Workers are spawned rather than forked: by then the process runs gRPC and Firestore
+    listener threads, and forking a multithreaded gRPC process can deadlock the child.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=DOCUMENT_EXTRACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_pool():
+    """Stops the extraction workers (called on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+# --- Worker functions (run in the process pool; imports stay local to the workers) ---
+
+def _pdf_page_count(path: str) -> int:
+    import fitz  # PyMuPDF
+    with fitz.open(path, filetype="pdf") as doc:
+        return doc.page_count
+
+def _pdf_pages(path: str, start: int, end: int) -> List[Tuple[int, str, float]]:
+    """Extracts pages [start, end) as (page_number, text, seconds)."""
+    import fitz  # PyMuPDF
+    pages = []
+    with fitz.open(path, filetype="pdf") as doc:
+        for number in range(start, min(end, doc.page_count)):
+            started = time.perf_counter()
+            text = doc.load_page(number).get_text("text")
+            pages.append((number + 1, text, time.perf_counter() - started))
+    return pages
+
+def _docx_pages(path: str, max_chars: int) -> List[Tuple[int, str, float]]:
+    """Groups DOCX paragraphs into pseudo-pages, stopping after `max_chars` characters."""
+    import docx
+    started = time.perf_counter()
+    document = docx.Document(path)
+    parse_seconds = time.perf_counter() - started
+
+    pages, paragraphs, total = [], [], 0
+    started = time.perf_counter()
+    for paragraph in document.paragraphs:
+        paragraphs.append(paragraph.text)
+        total += len(paragraph.text) + 1
+        if len(paragraphs) == DOCX_PARAGRAPHS_PER_PAGE or total >= max_chars:
+            pages.append((len(pages) + 1, "\n".join(paragraphs), time.perf_counter() - started + (parse_seconds if not pages else 0)))
+            paragraphs, started = [], time.perf_counter()
+            if total >= max_chars:
+                break
+    if paragraphs:
+        pages.append((len(pages) + 1, "\n".join(paragraphs), time.perf_counter() - started + (parse_seconds if not pages else 0)))
+    return pages
+
+def _spool(content: bytes, suffix: str) -> str:
+    """Writes an upload to a temporary file once, so workers receive a path, not the bytes."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as file:
+        file.write(content)
+        return file.name
+
+# --- Async API ---
+
+async def iter_pages(content: bytes, file_ext: str, max_chars: int = None) -> AsyncIterator[Tuple[int, str, float]]:
+    """
+    Yields (page_number, text, seconds) of a PDF/DOCX/TXT upload, extracted in the process
+    pool so the event loop stays free.
+
+    The upload is spooled to a temporary file once and workers open it by path. PDF pages
+    are extracted DOCUMENT_PAGES_PER_BATCH at a time, one batch ahead of the consumer;
+    extraction stops once `max_chars` characters have been yielded, so memory
+    stays bounded however long the document is.
+    """
+    max_chars = max_chars or DOCUMENT_MAX_CHARS
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+
+    if file_ext == "txt":
+        yield 1, content[:max_chars * 4].decode("utf-8", errors="ignore")[:max_chars], 0.0
+        return
+
+    if file_ext not in ("pdf", "docx"):
+        raise ValueError(f"Unsupported document type: {file_ext}")
+
+    path = await loop.run_in_executor(None, _spool, content, f".{file_ext}")
+    pending = None
+    try:
+        if file_ext == "docx":
+            for page in await loop.run_in_executor(pool, _docx_pages, path, max_chars):
+                yield page
+            return
+
+        page_count = await loop.run_in_executor(pool, _pdf_page_count, path)
+        batches = [(start, start + DOCUMENT_PAGES_PER_BATCH) for start in range(0, page_count, DOCUMENT_PAGES_PER_BATCH)]
+        pending = loop.run_in_executor(pool, _pdf_pages, path, *batches[0]) if batches else None
+        total = 0
+        for index in range(len(batches)):
+            pages = await pending
+            # Start the next batch while this one is consumed
+            pending = loop.run_in_executor(pool, _pdf_pages, path, *batches[index + 1]) if index + 1 < len(batches) else None
+            for page in pages:
+                yield page
+                total += len(page[1])
+                if total >= max_chars:
+                    return
+    finally:
+        if pending is not None and not pending.done():
+            # Let a prefetched batch finish with the file before it is removed
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        os.remove(path)
+
+async def extract_document(content: bytes, file_ext: str, max_chars: int = None) -> dict:
+    """
+    Extracts the text of a document (see `iter_pages`).
+
+    Returns:
+        dict: {
+            "text": Extracted text (at most `max_chars` characters),
+            "truncated": Whether extraction stopped at the character budget,
+            "pages": Per-page timing ({"page", "chars", "seconds"})
+        }
+    """
+    max_chars = max_chars or DOCUMENT_MAX_CHARS
+    texts, timings, total = [], [], 0
+    async for number, text, seconds in iter_pages(content, file_ext, max_chars):
+        texts.append(text)
+        timings.append({"page": number, "chars": len(text), "seconds": round(seconds, 4)})
+        total += len(text)
+
+    text = "\n".join(texts)
+    truncated = total >= max_chars
+    if truncated:
+        text = text[:max_chars]
+    print(f"📄 Extracted {len(timings)} pages ({len(text)} chars) in {sum(t['seconds'] for t in timings):.2f}s of worker time")
+    return {"text": text, "truncated": truncated, "pages": timings}
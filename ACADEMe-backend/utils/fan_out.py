@@ -0,0 +1,84 @@
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+# Defaults for class-wide fan-outs (overridable via environment)
+FAN_OUT_CONCURRENCY = int(os.getenv("FAN_OUT_CONCURRENCY", "16"))
+FAN_OUT_DEADLINE_SECONDS = float(os.getenv("FAN_OUT_DEADLINE_SECONDS", "20"))
+
+class FanOutResult:
+    """Outcome of a fan-out: successful results by key plus the keys that failed or ran out of time."""
+
+    def __init__(self):
+        self.results: Dict[Hashable, Any] = {}
+        self.failed: Dict[Hashable, str] = {}
+        self.timed_out: list = []
+
+    @property
+    def partial(self) -> bool:
+        """True when at least one item did not produce a result."""
+        return bool(self.failed or self.timed_out)
+
+    def report(self) -> dict:
+        """JSON-serializable summary for API responses."""
+        return {
+            "partial": self.partial,
+            "completed": len(self.results),
+            "failed": {str(key): error for key, error in self.failed.items()},
+            "timed_out": [str(key) for key in self.timed_out],
+        }
+
+async def fan_out(
+    items: Iterable[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    key: Callable[[Any], Hashable] = lambda item: item,
+    limit: int = None,
+    deadline: Optional[float] = None,
+) -> FanOutResult:
+    """
+    Runs `worker(item)` for every item concurrently, at most `limit` at a time.
+
+    Items still running when `deadline` seconds have elapsed are cancelled and reported
+    in `timed_out`; items whose worker raised are reported in `failed`. Results of the
+    items that finished are always returned, so callers can serve partial data.
+
+    Args:
+        items: The items to process (e.g. student documents)
+        worker: Coroutine function processing one item
+        key: Maps an item to the key used in the result (defaults to the item itself)
+        limit: Maximum number of workers in flight (defaults to FAN_OUT_CONCURRENCY)
+        deadline: Overall time budget in seconds (None uses FAN_OUT_DEADLINE_SECONDS; 0 or less disables it)
+    """
+    limit = limit or FAN_OUT_CONCURRENCY
+    deadline = FAN_OUT_DEADLINE_SECONDS if deadline is None else deadline
+    semaphore = asyncio.Semaphore(limit)
+    outcome = FanOutResult()
+
+    async def run(item):
+        async with semaphore:
+            return await worker(item)
+
+    tasks = {asyncio.create_task(run(item)): key(item) for item in items}
+    if not tasks:
+        return outcome
+
+    done, pending = await asyncio.wait(tasks, timeout=deadline if deadline > 0 else None)
+
+    for task in pending:
+        task.cancel()
+        outcome.timed_out.append(tasks[task])
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in done:
+        item_key = tasks[task]
+        error = task.exception()
+        if error is not None:
+            outcome.failed[item_key] = str(error)
+        else:
+            outcome.results[item_key] = task.result()
+
+    if outcome.partial:
+        print(f"⚠️ Fan-out finished with {len(outcome.failed)} failed and {len(outcome.timed_out)} timed out of {len(tasks)} items")
+
+    return outcome
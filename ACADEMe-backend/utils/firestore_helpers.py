@@ -1,5 +1,6 @@
 from firebase import db
 from datetime import datetime
+from services.id_mapping_cache import id_mapping_cache
 
 def get_document(collection: str, doc_id: str):
     doc_ref = db.collection(collection).document(doc_id)
@@ -61,6 +62,7 @@ class FirestoreUtils:
 
             # Write to Firestore
             mapping_ref.set(doc_data)
+            id_mapping_cache.put(collection_name, doc_id, title_or_name)
             print(f"📌 Stored ID mapping in Firestore: {collection_name}/{doc_id} → {title_or_name}")
 
         except Exception as e:
@@ -119,6 +121,7 @@ class FirestoreUtils:
             )
 
             mapping_ref.delete()
+            id_mapping_cache.forget(collection_name, doc_id)
             print(f"📌 Deleted ID mapping: {collection_name}/{doc_id}")
 
         except Exception as e:
@@ -161,6 +164,7 @@ class FirestoreUtils:
                 }
 
             mapping_ref.update(update_data)
+            id_mapping_cache.put(collection_name, doc_id, title_or_name)
             print(f"📌 Updated ID mapping: {collection_name}/{doc_id} → {title_or_name}")
 
         except Exception as e:
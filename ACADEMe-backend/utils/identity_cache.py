@@ -0,0 +1,75 @@
+import os
+from typing import List, Optional
+from cachetools import TTLCache
+
+# Identity cache settings (overridable via environment)
+IDENTITY_CACHE_MAXSIZE = int(os.getenv("IDENTITY_CACHE_MAXSIZE", "10000"))
+IDENTITY_CACHE_TTL_SECONDS = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "300"))
+
+class IdentityCache:
+    """
+    Bounded LRU + TTL cache of uid → {role, email, allotted_classes}.
+
+    Saves the role lookups of `determine_user_role` and the profile reads of
+    `TeacherService.get_teacher_allotted_classes` on every authenticated request.
+    Entries expire after IDENTITY_CACHE_TTL_SECONDS and are dropped explicitly when an
+    admin adds, removes or updates a teacher.
+    """
+
+    def __init__(self, maxsize: int = IDENTITY_CACHE_MAXSIZE, ttl: float = IDENTITY_CACHE_TTL_SECONDS):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, user_id: str, field: str, email: str = None):
+        entry = self._entries.get(user_id)
+        if entry is None or field not in entry or (email and entry.get("email") and entry["email"] != email):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[field]
+
+    def _set(self, user_id: str, **fields):
+        entry = dict(self._entries.get(user_id) or {})
+        entry.update({key: value for key, value in fields.items() if value is not None})
+        self._entries[user_id] = entry
+
+    def get_role(self, user_id: str, email: str = None) -> Optional[str]:
+        """Returns the cached role of a user (None on miss)."""
+        return self._get(user_id, "role", email)
+
+    def set_role(self, user_id: str, role: str, email: str = None):
+        self._set(user_id, role=role, email=email)
+
+    def get_allotted_classes(self, user_id: str) -> Optional[List[str]]:
+        """Returns the cached allotted classes of a teacher (None on miss)."""
+        classes = self._get(user_id, "allotted_classes")
+        return list(classes) if classes is not None else None
+
+    def set_allotted_classes(self, user_id: str, allotted_classes: List[str], email: str = None):
+        self._set(user_id, allotted_classes=list(allotted_classes), email=email)
+
+    def invalidate(self, user_id: str = None, email: str = None):
+        """Drops the entries of a user, by uid and/or by email."""
+        if user_id:
+            self._entries.pop(user_id, None)
+        if email:
+            for cached_id in [uid for uid, entry in list(self._entries.items()) if entry.get("email") == email]:
+                self._entries.pop(cached_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self._entries.maxsize,
+            "ttl_seconds": self._entries.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+identity_cache = IdentityCache()
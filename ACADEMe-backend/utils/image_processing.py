@@ -0,0 +1,63 @@
+import io
+import os
+from typing import Tuple
+from PIL import Image, ImageOps
+from utils.async_firestore import run_blocking
+
+# Image upload settings (overridable via environment)
+# Longest edge (pixels) of images sent to Gemini; larger images are downscaled
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1600"))
+# Re-encoding format of downscaled images: JPEG or WEBP
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "JPEG").upper()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png", "GIF": "image/gif"}
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    """Flattens transparency onto white (JPEG has no alpha channel) and maps 16-bit images to 8 bits."""
+    if image.mode.startswith("I;16") or image.mode == "I":
+        # Pillow would clip 16-bit samples at 255 instead of scaling them
+        image = image.convert("I").point(lambda value: value / 256).convert("L")
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+def prepare_image(image_data: bytes, max_edge: int = None, output_format: str = None) -> Tuple[bytes, str]:
+    """
+    Decodes an uploaded image in memory and downscales it to `max_edge` before it is sent
+    to Gemini. Returns (bytes, mime_type).
+
+    JPEGs are decoded straight at a reduced scale (`draft`) and resized in place, so large
+    phone photos never get a full-resolution pixel buffer. Images already within bounds are
+    returned untouched (no re-encoding); GIFs keep only their first frame.
+    """
+    max_edge = max_edge or IMAGE_MAX_EDGE
+    output_format = output_format or IMAGE_OUTPUT_FORMAT
+    if output_format not in ("JPEG", "WEBP"):
+        output_format = "JPEG"
+
+    with Image.open(io.BytesIO(image_data)) as image:
+        source_format = image.format
+        orientation = image.getexif().get(0x0112, 1)
+        if max(image.size) <= max_edge and orientation == 1 and source_format in MIME_TYPES and source_format != "GIF":
+            return image_data, MIME_TYPES[source_format]
+
+        if source_format == "JPEG":
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that still covers max_edge
+            image.draft("RGB", (max_edge, max_edge))
+
+        image = ImageOps.exif_transpose(image)
+        # Convert first: LANCZOS resampling is not available for modes such as I;16
+        image = _to_rgb(image)
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format=output_format, quality=IMAGE_QUALITY, optimize=output_format == "JPEG")
+        return output.getvalue(), MIME_TYPES[output_format]
+
+async def prepare_image_async(image_data: bytes, max_edge: int = None, output_format: str = None) -> Tuple[bytes, str]:
+    """Runs `prepare_image` off the event loop (decoding and resizing are CPU bound)."""
+    return await run_blocking(prepare_image, image_data, max_edge, output_format)
@@ -1,32 +1,92 @@
 import os
-import requests
+import hashlib
+import threading
+from typing import Iterable, Optional
+from cachetools import LRUCache
+from langdetect import detect, DetectorFactory, LangDetectException
+from utils.async_firestore import run_blocking
+
+DetectorFactory.seed = 0  # Deterministic results
+
+# Language detection settings (overridable via environment)
+# Only a bounded prefix of large inputs (e.g. whole documents) is analysed
+LANGUAGE_DETECTION_SAMPLE_CHARS = int(os.getenv("LANGUAGE_DETECTION_SAMPLE_CHARS", "2000"))
+LANGUAGE_DETECTION_CACHE_SIZE = int(os.getenv("LANGUAGE_DETECTION_CACHE_SIZE", "10000"))
+DEFAULT_LANGUAGE = "en"
+# Memoized result of samples langdetect cannot classify
+UNDETECTED = ""
+
+_cache = LRUCache(maxsize=LANGUAGE_DETECTION_CACHE_SIZE)
+_cache_lock = threading.Lock()
+
+def _sample(text: str) -> str:
+    """Returns the prefix of the text used for detection, cut at a word boundary."""
+    sample = text.strip()[:LANGUAGE_DETECTION_SAMPLE_CHARS]
+    if len(sample) == LANGUAGE_DETECTION_SAMPLE_CHARS and " " in sample:
+        sample = sample.rsplit(" ", 1)[0]
+    return sample
+
+def _cache_key(sample: str) -> str:
+    return hashlib.sha1(sample.encode("utf-8")).hexdigest()
+
+def _cached(key: str):
+    with _cache_lock:
+        return _cache.get(key)
+
+def _detect_sample(sample: str, key: str) -> str:
+    """
+    Runs langdetect on a sample and memoizes the (LibreTranslate-style) language code,
+    or UNDETECTED when the sample cannot be classified.
+    """
+    try:
+        # langdetect reports e.g. "zh-cn"; LibreTranslate expects "zh"
+        language = detect(sample).split("-")[0]
+    except LangDetectException:
+        language = UNDETECTED
+    with _cache_lock:
+        _cache[key] = language
+    return language
 
 def detect_language(text: str) -> str:
-    # Check for empty input
-    if not text.strip():
+    """
+    Detects the language of a text locally (no network call).
+
+    Large inputs are sampled to their first LANGUAGE_DETECTION_SAMPLE_CHARS characters and
+    results are memoized by hash; undetectable text defaults to English.
+    """
+    if not text or not text.strip():
         raise ValueError("Input text cannot be empty.")
-    
-    # Get LibreTranslate URL from environment variables
-    libretranslate_url = os.getenv("LIBRETRANSLATE_URL")
-    if not libretranslate_url:
-        raise RuntimeError("LIBRETRANSLATE_URL is not set in environment variables.")
-    
-    # Prepare API endpoint and request data
-    endpoint = f"{libretranslate_url}/detect"
-    payload = {"q": text}
-    
-    try:
-        # Send request to LibreTranslate
-        response = requests.post(endpoint, data=payload)
-        response.raise_for_status()  # Raise HTTP errors
-        
-        # Parse response
-        detections = response.json()
-        if not detections:
-            raise ValueError("No languages detected.")
-        
-        # Return highest confidence language code
-        return detections[0]["language"]
-    
-    except requests.exceptions.RequestException as e:
-        raise RuntimeError(f"Language detection request failed: {str(e)}")
\ No newline at end of file
+
+    sample = _sample(text)
+    key = _cache_key(sample)
+    language = _cached(key)
+    if language is None:
+        language = _detect_sample(sample, key)
+    return language or DEFAULT_LANGUAGE
+
+async def _detect_or_none(text: str) -> Optional[str]:
+    """Detects a text's language off the event loop (memo hits return inline); None if undetectable."""
+    sample = _sample(text)
+    key = _cache_key(sample)
+    language = _cached(key)
+    if language is None:
+        language = await run_blocking(_detect_sample, sample, key)
+    return language or None
+
+async def detect_language_async(text: str) -> str:
+    """Async variant of `detect_language`."""
+    if not text or not text.strip():
+        raise ValueError("Input text cannot be empty.")
+    return await _detect_or_none(text) or DEFAULT_LANGUAGE
+
+async def detect_first_language(texts: Iterable[str], default: str = DEFAULT_LANGUAGE) -> str:
+    """
+    Detects the language of a list of texts (e.g. title, description): each non-empty text
+    is tried in turn until one is detected, then `default` is used.
+    """
+    for text in texts:
+        if text and text.strip():
+            language = await _detect_or_none(text)
+            if language:
+                return language
+    return default
@@ -0,0 +1,82 @@
+import re
+import json
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from fastapi.responses import StreamingResponse
+
+# Supported values of the `stream` form field of the AI tutor endpoints
+STREAM_MODES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+# A sentence ends at . ! ? (or their CJK forms) followed by whitespace, or at a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。！？])\s+|\n+")
+
+async def iter_sentences(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Regroups streamed text chunks into complete sentences (each with its trailing whitespace)."""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        last_end = 0
+        for match in SENTENCE_BOUNDARY.finditer(buffer):
+            yield buffer[last_end:match.end()]
+            last_end = match.end()
+        buffer = buffer[last_end:]
+    if buffer:
+        yield buffer
+
+async def translate_stream(
+    chunks: AsyncIterator[str],
+    translate: Optional[Callable[[str], Awaitable[str]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Forwards streamed text, translating it sentence by sentence when `translate` is given
+    (the whitespace after each sentence is kept as-is).
+    """
+    if translate is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    async for sentence in iter_sentences(chunks):
+        text = sentence.rstrip()
+        if not text.strip():
+            yield sentence
+            continue
+        try:
+            translated = await translate(text)
+        except Exception as e:
+            print(f"⚠️ Sentence translation failed, sending original: {e}")
+            translated = text
+        yield translated + sentence[len(text):]
+
+def _format_event(payload: dict, mode: str) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"data: {data}\n\n" if mode == "sse" else f"{data}\n"
+
+def stream_response(chunks: AsyncIterator[str], mode: str) -> StreamingResponse:
+    """
+    Wraps a text stream into an SSE (`data: {"delta": ...}` events) or NDJSON response.
+
+    The stream ends with a `{"done": true}` event, or an `{"error": ...}` event if the
+    upstream generator fails midway.
+    """
+    async def events():
+        try:
+            async for chunk in chunks:
+                yield _format_event({"delta": chunk}, mode)
+            yield _format_event({"done": True}, mode)
+        except Exception as e:
+            print(f"❌ Streaming error: {e}")
+            yield _format_event({"error": str(e)}, mode)
+
+    return StreamingResponse(events(), media_type=STREAM_MODES[mode], headers={"Cache-Control": "no-cache"})
+
+async def single_chunk(text: str) -> AsyncIterator[str]:
+    """Wraps a complete text (e.g. a cached response) as a one-chunk stream."""
+    yield text
+
+async def tee_stream(chunks: AsyncIterator[str], on_complete: Callable[[str], None]) -> AsyncIterator[str]:
+    """Forwards a stream and hands the full text to `on_complete` once it ended successfully."""
+    pieces = []
+    async for chunk in chunks:
+        pieces.append(chunk)
+        yield chunk
+    on_complete("".join(pieces))
@@ -0,0 +1,130 @@
+import io
+import os
+import subprocess
+from typing import List, Optional, Tuple
+import numpy as np
+from PIL import Image
+from moviepy.editor import VideoFileClip
+from imageio_ffmpeg import get_ffmpeg_exe
+from utils.async_firestore import run_blocking
+from utils.image_processing import IMAGE_QUALITY
+
+# Video analysis settings (overridable via environment)
+# "keyframes" sends sampled frames (+ audio) to Gemini; "full" inlines the whole video file
+VIDEO_ANALYSIS_MODE = os.getenv("VIDEO_ANALYSIS_MODE", "keyframes").lower()
+VIDEO_KEYFRAME_INTERVAL_SECONDS = float(os.getenv("VIDEO_KEYFRAME_INTERVAL_SECONDS", "5"))
+VIDEO_MAX_KEYFRAMES = int(os.getenv("VIDEO_MAX_KEYFRAMES", "32"))
+# Mean per-pixel difference (0-255) from the last kept frame that counts as a scene change; 0 keeps every sample
+VIDEO_SCENE_THRESHOLD = float(os.getenv("VIDEO_SCENE_THRESHOLD", "12"))
+VIDEO_FRAME_MAX_EDGE = int(os.getenv("VIDEO_FRAME_MAX_EDGE", "768"))
+VIDEO_INCLUDE_AUDIO = os.getenv("VIDEO_INCLUDE_AUDIO", "true").lower() == "true"
+VIDEO_AUDIO_BITRATE = os.getenv("VIDEO_AUDIO_BITRATE", "16k")
+VIDEO_AUDIO_MAX_SECONDS = int(os.getenv("VIDEO_AUDIO_MAX_SECONDS", "3600"))
+
+# Frames sampled per kept keyframe at most, so scanning time stays bounded for long videos
+MAX_SAMPLES_PER_KEYFRAME = 4
+
+def _sample_times(duration: float, interval: float, max_frames: int) -> List[float]:
+    """Fixed-interval sample times, widened so at most MAX_SAMPLES_PER_KEYFRAME * max_frames are read."""
+    if duration <= 0:
+        return [0.0]
+    max_samples = max_frames * MAX_SAMPLES_PER_KEYFRAME
+    interval = max(interval, duration / max_samples)
+    times, t = [], 0.0
+    while t < duration and len(times) < max_samples:
+        times.append(t)
+        t += interval
+    return times
+
+def _signature(frame: np.ndarray) -> np.ndarray:
+    """Small grayscale thumbnail used to compare frames cheaply."""
+    return np.asarray(Image.fromarray(frame).convert("L").resize((64, 36)), dtype=np.int16)
+
+def _evenly(items: list, count: int) -> list:
+    if len(items) <= count:
+        return items
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+def _target_resolution(size: Tuple[int, int]) -> Tuple[int, int]:
+    """(height, width) scaled so that the longest edge is VIDEO_FRAME_MAX_EDGE."""
+    width, height = size
+    scale = VIDEO_FRAME_MAX_EDGE / max(width, height)
+    return max(2, int(height * scale) // 2 * 2), max(2, int(width * scale) // 2 * 2)
+
+def extract_keyframes(video_path: str, interval: float = None, max_frames: int = None,
+                      scene_threshold: float = None) -> List[Tuple[float, bytes]]:
+    """
+    Samples a video every `interval` seconds, keeps the frames that differ from the previous
+    kept one by more than `scene_threshold` (scene changes) and caps them at `max_frames`.
+
+    Returns [(timestamp, jpeg_bytes)]. Frames are decoded one at a time at a reduced
+    resolution, so memory stays bounded whatever the length of the video.
+    """
+    interval = interval or VIDEO_KEYFRAME_INTERVAL_SECONDS
+    max_frames = max_frames or VIDEO_MAX_KEYFRAMES
+    scene_threshold = VIDEO_SCENE_THRESHOLD if scene_threshold is None else scene_threshold
+
+    clip = VideoFileClip(video_path, audio=False)
+    try:
+        # Let ffmpeg scale the frames while decoding
+        if max(clip.size) > VIDEO_FRAME_MAX_EDGE:
+            clip.close()
+            clip = VideoFileClip(video_path, audio=False, target_resolution=_target_resolution(clip.size))
+
+        keyframes, last_signature = [], None
+        for t in _sample_times(clip.duration or 0, interval, max_frames):
+            frame = clip.get_frame(t)
+            signature = _signature(frame)
+            if last_signature is not None and scene_threshold and np.abs(signature - last_signature).mean() < scene_threshold:
+                continue
+            last_signature = signature
+
+            output = io.BytesIO()
+            Image.fromarray(frame).save(output, format="JPEG", quality=IMAGE_QUALITY)
+            keyframes.append((t, output.getvalue()))
+    finally:
+        clip.close()
+
+    return _evenly(keyframes, max_frames)
+
+def extract_audio(video_path: str, bitrate: str = None, max_seconds: int = None) -> Optional[bytes]:
+    """Returns the audio track as low-bitrate mono MP3 (None when the video has no audio)."""
+    command = [
+        get_ffmpeg_exe(), "-v", "error", "-i", video_path, "-vn",
+        "-t", str(max_seconds or VIDEO_AUDIO_MAX_SECONDS),
+        "-ac", "1", "-ar", "16000", "-b:a", bitrate or VIDEO_AUDIO_BITRATE,
+        "-f", "mp3", "pipe:1",
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return result.stdout
+
+def _format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+def build_video_parts(video_path: str, include_audio: bool = None) -> list:
+    """
+    Preprocesses a video into Gemini message parts: timestamped keyframes (JPEG) followed by
+    the optional low-bitrate audio track.
+    """
+    include_audio = VIDEO_INCLUDE_AUDIO if include_audio is None else include_audio
+
+    parts = []
+    for timestamp, image_bytes in extract_keyframes(video_path):
+        parts.append({"text": f"Frame at {_format_timestamp(timestamp)}:"})
+        parts.append({"mime_type": "image/jpeg", "data": image_bytes})
+
+    if include_audio:
+        audio = extract_audio(video_path)
+        if audio:
+            parts.append({"text": "Audio track of the video:"})
+            parts.append({"mime_type": "audio/mp3", "data": audio})
+    return parts
+
+async def build_video_parts_async(video_path: str, include_audio: bool = None) -> list:
+    """Runs `build_video_parts` off the event loop (decoding is CPU bound)."""
+    return await run_blocking(build_video_parts, video_path, include_audio)